@@ -0,0 +1,368 @@
+"""
+adoption_queue.py: Matching animals to adopters by priority
+
+Picking the next animal to offer for adoption by sorting Shelter.animals
+costs O(n log n) per request. This module covers:
+1. IndexedHeap: a binary heap that also remembers where every item sits, so
+   an item's priority can be changed (or the item removed) in O(log n)
+2. AdoptionQueue: a Shelter that keeps every animal in an IndexedHeap,
+   ordered by longest stay, then oldest, then Pet capability
+3. Keeping the heap consistent with the shelter: add_animal, remove_animal,
+   adopt and age changes (via Animal observers) all update it
+4. A benchmark against re-sorting the list for every request
+
+The heap is a min-heap: the item with the smallest priority tuple is the
+best one, so "older is better" is stored as -age.
+"""
+
+import random
+import time
+from itertools import count
+
+from pythonic_classes import Cat, Dog, HouseCat, Pet, Shelter
+
+
+class IndexedHeap:
+    """
+    A min-heap of items with changeable priorities.
+
+    Items are tracked by identity, so they do not need to be hashable or
+    comparable; priorities must be comparable with each other.
+    """
+
+    def __init__(self):
+        """Initialize an empty heap."""
+        self._priorities = []
+        self._items = []
+        self._positions = {}  # id(item) -> index in the heap
+
+    def __len__(self):
+        """Return the number of items."""
+        return len(self._items)
+
+    def __contains__(self, item):
+        """Check whether this exact item is in the heap."""
+        return id(item) in self._positions
+
+    def __iter__(self):
+        """Iterate over the items in heap order (not sorted)."""
+        return iter(self._items)
+
+    def priority(self, item):
+        """Return the current priority of an item."""
+        return self._priorities[self._positions[id(item)]]
+
+    def push(self, item, priority):
+        """
+        Add an item.
+
+        Args:
+            item: The item to add.
+            priority: Its priority (smaller comes out first).
+
+        Raises:
+            ValueError: If the item is already in the heap.
+        """
+        if id(item) in self._positions:
+            raise ValueError(f"{item!r} is already in the heap")
+        self._priorities.append(priority)
+        self._items.append(item)
+        self._positions[id(item)] = len(self._items) - 1
+        self._sift_up(len(self._items) - 1)
+
+    def peek(self):
+        """
+        Return the best (item, priority) without removing it.
+
+        Raises:
+            IndexError: If the heap is empty.
+        """
+        if not self._items:
+            raise IndexError("peek from an empty heap")
+        return self._items[0], self._priorities[0]
+
+    def pop_best(self):
+        """
+        Remove and return the best (item, priority).
+
+        Raises:
+            IndexError: If the heap is empty.
+        """
+        if not self._items:
+            raise IndexError("pop from an empty heap")
+        return self._take(0)
+
+    def update_priority(self, item, priority):
+        """
+        Change the priority of an item and restore the heap order.
+
+        Raises:
+            KeyError: If the item is not in the heap.
+        """
+        index = self._positions[id(item)]
+        old, self._priorities[index] = self._priorities[index], priority
+        if priority < old:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def remove(self, item):
+        """
+        Remove an item and return its priority.
+
+        Raises:
+            KeyError: If the item is not in the heap.
+        """
+        return self._take(self._positions[id(item)])[1]
+
+    def _take(self, index):
+        """Remove the entry at index by moving the last entry into its place."""
+        items, priorities = self._items, self._priorities
+        item, priority = items[index], priorities[index]
+        del self._positions[id(item)]
+        last_item, last_priority = items.pop(), priorities.pop()
+        if index < len(items):
+            items[index], priorities[index] = last_item, last_priority
+            self._positions[id(last_item)] = index
+            if index > 0 and last_priority < priorities[(index - 1) >> 1]:
+                self._sift_up(index)
+            else:
+                self._sift_down(index)
+        return item, priority
+
+    def _sift_up(self, index):
+        items, priorities, positions = self._items, self._priorities, self._positions
+        item, priority = items[index], priorities[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if not priority < priorities[parent]:
+                break
+            items[index], priorities[index] = items[parent], priorities[parent]
+            positions[id(items[index])] = index
+            index = parent
+        items[index], priorities[index] = item, priority
+        positions[id(item)] = index
+
+    def _sift_down(self, index):
+        items, priorities, positions = self._items, self._priorities, self._positions
+        size = len(items)
+        item, priority = items[index], priorities[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and priorities[child + 1] < priorities[child]:
+                child += 1
+            if not priorities[child] < priority:
+                break
+            items[index], priorities[index] = items[child], priorities[child]
+            positions[id(items[index])] = index
+            index = child
+        items[index], priorities[index] = item, priority
+        positions[id(item)] = index
+
+
+class AdoptionQueue(Shelter):
+    """
+    A Shelter that always knows which animal should be adopted next.
+
+    Priority: the earliest arrival (longest stay) first, then the oldest
+    animal, then animals that are Pets. Ties keep their arrival order.
+    """
+
+    def __init__(self, clock=time.time):
+        """
+        Initialize an empty queue.
+
+        Args:
+            clock (callable): Returns the arrival time of a new animal.
+                Anything comparable works, such as days since opening.
+        """
+        self.clock = clock
+        self._heap = IndexedHeap()
+        self._arrivals = {}  # id(animal) -> (arrival, tie-breaker)
+        self._counter = count()
+        super().__init__()
+
+    @property
+    def animals(self):
+        """A list of the animals, in no particular order."""
+        return list(self._heap)
+
+    @animals.setter
+    def animals(self, animals):
+        # Shelter.__init__ assigns an empty list; accept any iterable.
+        for animal in list(self._heap):
+            self.remove_animal(animal)
+        for animal in animals:
+            self.add_animal(animal)
+
+    def __len__(self):
+        """Return the number of animals waiting."""
+        return len(self._heap)
+
+    def __contains__(self, animal):
+        """Check whether this exact animal is waiting."""
+        return animal in self._heap
+
+    def _priority(self, animal):
+        arrival, order = self._arrivals[id(animal)]
+        return (arrival, -animal.age, 0 if isinstance(animal, Pet) else 1, order)
+
+    def add_animal(self, animal, arrival=None):
+        """
+        Add an animal to the shelter and the queue.
+
+        Args:
+            animal (Animal): The animal to add.
+            arrival (optional): Its arrival time (default: clock()).
+
+        Raises:
+            ValueError: If the animal is already in the shelter.
+        """
+        if animal in self._heap:
+            raise ValueError(f"{animal!r} is already in the shelter")
+        self._arrivals[id(animal)] = (self.clock() if arrival is None else arrival,
+                                      next(self._counter))
+        self._heap.push(animal, self._priority(animal))
+        animal.add_observer(self._on_change)
+
+    push = add_animal
+
+    def remove_animal(self, animal):
+        """
+        Remove an animal from the shelter and the queue.
+
+        Raises:
+            ValueError: If the animal is not in the shelter.
+        """
+        if animal not in self._heap:
+            raise ValueError(f"{animal!r} is not in the shelter")
+        self._heap.remove(animal)
+        del self._arrivals[id(animal)]
+        animal.remove_observer(self._on_change)
+
+    remove = remove_animal
+
+    def pop_best(self):
+        """
+        Remove and return the animal with the highest priority.
+
+        Raises:
+            IndexError: If the shelter is empty.
+        """
+        animal, _ = self._heap.peek()
+        self.remove_animal(animal)
+        return animal
+
+    adopt = pop_best
+
+    def peek_best(self):
+        """Return the animal with the highest priority without removing it."""
+        return self._heap.peek()[0]
+
+    def update_priority(self, animal, arrival):
+        """
+        Change when an animal is considered to have arrived.
+
+        Args:
+            animal (Animal): An animal in the shelter.
+            arrival: The new arrival time.
+        """
+        order = self._arrivals[id(animal)][1]
+        self._arrivals[id(animal)] = (arrival, order)
+        self._heap.update_priority(animal, self._priority(animal))
+
+    def _on_change(self, animal, attribute, old_value):
+        """Observer callback: an age change moves the animal in the heap."""
+        if attribute == "age":
+            self._heap.update_priority(animal, self._priority(animal))
+
+    def sorted_animals(self):
+        """Return every animal from best to worst (O(n log n), for display)."""
+        return sorted(self._heap, key=self._priority)
+
+
+def _intake(count, seed=1):
+    """Random animals with arrival days, many sharing a day."""
+    rng = random.Random(seed)
+    animals = []
+    for i in range(count):
+        kind = rng.random()
+        age = rng.randrange(20)
+        if kind < 0.5:
+            animal = Dog(f"dog-{i}", age, "Beagle")
+        elif kind < 0.8:
+            animal = Cat(f"cat-{i}", age)
+        else:
+            animal = HouseCat(f"housecat-{i}", age)
+        animals.append((animal, rng.randrange(365)))
+    return animals
+
+
+def benchmark_adoption_queue(sizes=(100_000, 1_000_000), requests=1000):
+    """Compare the heap with re-sorting the list for every adoption."""
+    for size in sizes:
+        intake = _intake(size)
+        start = time.perf_counter()
+        queue = AdoptionQueue()
+        for animal, day in intake:
+            queue.add_animal(animal, day)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(requests):
+            queue.pop_best()
+            queue.add_animal(Cat(f"new-{i}", i % 20), 365 + i)
+        heap_time = (time.perf_counter() - start) / requests
+
+        start = time.perf_counter()
+        for animal in queue.animals[:requests]:
+            animal.age += 1
+        update_time = (time.perf_counter() - start) / requests
+
+        arrival = {id(animal): day for animal, day in intake}
+        pool = [animal for animal, _ in intake]
+
+        def key(animal):
+            return (arrival[id(animal)], -animal.age, 0 if isinstance(animal, Pet) else 1)
+
+        resorts = 3
+        start = time.perf_counter()
+        for _ in range(resorts):
+            best = sorted(pool, key=key)[0]
+            pool.remove(best)
+        sort_time = (time.perf_counter() - start) / resorts
+
+        print(f"{size:,} animals: heap build {build:.2f} s")
+        print(f"  adopt + intake, heap:       {heap_time * 1e6:10.1f} us")
+        print(f"  age change (heap update):   {update_time * 1e6:10.1f} us")
+        print(f"  adopt by re-sorting a list: {sort_time * 1e6:10.1f} us "
+              f"({sort_time / heap_time:,.0f}x slower)")
+
+
+def demonstrate_adoption_queue():
+    """Show the adoption order and how it follows changes."""
+    queue = AdoptionQueue()
+    buddy = Dog("Buddy", 5, "Golden Retriever")
+    whiskers = Cat("Whiskers", 5)
+    smokey = HouseCat("Smokey", 5)
+    rex = Dog("Rex", 2, "Beagle")
+    queue.add_animal(rex, arrival=1)
+    queue.add_animal(buddy, arrival=2)
+    queue.add_animal(whiskers, arrival=2)
+    queue.add_animal(smokey, arrival=2)
+    print(f"Order: {[a.name for a in queue.sorted_animals()]}")
+
+    whiskers.age = 9  # older animals go first among equal stays
+    queue.update_priority(rex, 3)  # Rex was returned and re-admitted
+    print(f"After Whiskers ages and Rex is re-admitted: "
+          f"{[a.name for a in queue.sorted_animals()]}")
+    print(f"Adopted: {queue.adopt().name}, then {queue.adopt().name}")
+    print(f"Still waiting: {queue.list_animals()}")
+
+
+if __name__ == "__main__":
+    demonstrate_adoption_queue()
+    print()
+    benchmark_adoption_queue()
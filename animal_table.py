@@ -0,0 +1,456 @@
+"""
+animal_table.py: Storing millions of animals compactly
+
+Every Animal, Dog and Cat instance carries its own __dict__, and at millions
+of records those dictionaries dominate memory use. This module covers:
+1. Slotted versions of the classes in pythonic_classes.py (no __dict__)
+2. AnimalTable: a columnar container that keeps names, ages, species and
+   breeds in flat columns, with repeated strings stored once
+3. AnimalRow: a lightweight view that behaves like an Animal for one row
+4. Vectorized filters (such as is_adult) over the whole age column
+5. A memory and throughput benchmark comparing the three layouts
+
+The age column is an array.array; when NumPy is installed the filters view
+it through numpy.frombuffer without copying.
+"""
+
+import sys
+import time
+import tracemalloc
+from array import array
+from datetime import datetime
+
+from pythonic_classes import Animal, Cat, Dog, HouseCat, Pet
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, filters fall back to plain Python
+    np = None
+
+
+# 1. Slotted classes -----------------------------------------------------------
+
+def _slotted_copy(cls, bases, slots, **overrides):
+    """
+    Build a copy of cls that uses __slots__ instead of a __dict__.
+
+    The methods and properties are shared with the original class, so the
+    behaviour is identical; only the instance layout changes.
+    """
+    namespace = {key: value for key, value in vars(cls).items()
+                 if key not in ("__dict__", "__weakref__")}
+    namespace.update(overrides)
+    namespace["__slots__"] = slots
+    namespace["__qualname__"] = "Slotted" + cls.__name__
+    namespace["__module__"] = __name__  # so pickle finds the class here
+    return type("Slotted" + cls.__name__, bases, namespace)
+
+
+SlottedAnimal = _slotted_copy(Animal, (), ("_name", "_age", "_observers"))
+
+
+def _slotted_dog_init(self, name, age, breed):
+    """Initialize a SlottedDog (Dog.__init__ relies on super(), so it is not shared)."""
+    SlottedAnimal.__init__(self, name, age)
+    self._breed = breed
+
+
+SlottedDog = _slotted_copy(Dog, (SlottedAnimal,), ("_breed",), __init__=_slotted_dog_init)
+SlottedCat = _slotted_copy(Cat, (SlottedAnimal,), ())
+SlottedHouseCat = _slotted_copy(HouseCat, (SlottedCat,), ())
+# Pet has no __slots__, so inheriting from it would bring back the __dict__.
+# Registering keeps isinstance(animal, Pet) working without it.
+Pet.register(SlottedHouseCat)
+
+
+# 2. The columnar table ----------------------------------------------------------
+
+SPECIES = ("Animal", "Dog", "Cat", "HouseCat")
+_SPECIES_CODES = {name: code for code, name in enumerate(SPECIES)}
+_SPECIES_CLASSES = (Animal, Dog, Cat, HouseCat)
+NO_BREED = -1
+
+
+def _species_of(animal):
+    """Return the species code of an Animal (or slotted/row equivalent)."""
+    name = type(animal).__name__
+    if name.startswith("Slotted"):
+        name = name[len("Slotted"):]
+    elif isinstance(animal, AnimalRow):
+        name = animal.species
+    return _SPECIES_CODES.get(name, 0)
+
+
+class AnimalRow:
+    """
+    A view of one row of an AnimalTable that behaves like an Animal.
+
+    A row holds only a reference to the table and its index, so creating
+    one is cheap. Changing the age of a row changes the table.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    kingdom = Animal.kingdom
+    is_adult = staticmethod(Animal.is_adult)
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    @property
+    def name(self):
+        """The name of the animal."""
+        return self._table.names[self._index]
+
+    @property
+    def age(self):
+        """The age of the animal."""
+        return self._table.ages[self._index]
+
+    @age.setter
+    def age(self, value):
+        if value < 0:
+            raise ValueError("Age cannot be negative")
+        self._table.ages[self._index] = value
+
+    @property
+    def species(self):
+        """The class name of the animal, such as "Dog"."""
+        return SPECIES[self._table.species[self._index]]
+
+    @property
+    def breed(self):
+        """The breed of a dog, or None for other species."""
+        code = self._table.breeds[self._index]
+        return None if code == NO_BREED else self._table.breed_names[code]
+
+    def make_sound(self):
+        """Return the sound of the row's species."""
+        cls = _SPECIES_CLASSES[self._table.species[self._index]]
+        return cls.make_sound(self)
+
+    def play(self):
+        """Play, if the row is a house cat (like Pet.play)."""
+        if self.species != "HouseCat":
+            raise AttributeError(f"{self.species} objects cannot play")
+        return HouseCat.play(self)
+
+    def to_animal(self):
+        """Create a full Animal object (of the right class) from the row."""
+        cls = _SPECIES_CLASSES[self._table.species[self._index]]
+        if cls is Dog:
+            return Dog(self.name, self.age, self.breed)
+        return cls(self.name, self.age)
+
+    __str__ = Animal.__str__
+    __repr__ = Animal.__repr__
+
+
+class AnimalTable:
+    """
+    A column store for animal records.
+
+    Columns:
+        names: a list of interned strings
+        ages: an array("q") of 64-bit integers
+        species: an array("B") of codes into SPECIES
+        breeds: an array("l") of codes into breed_names, or NO_BREED
+    """
+
+    def __init__(self):
+        """Initialize an empty table."""
+        self.names = []
+        self.ages = array("q")
+        self.species = array("B")
+        self.breeds = array("l")
+        self.breed_names = []
+        self._breed_codes = {}
+
+    @classmethod
+    def from_animals(cls, animals):
+        """
+        Build a table from Animal objects (or anything with the same attributes).
+
+        Args:
+            animals (iterable): The animals to copy into the table.
+
+        Returns:
+            AnimalTable: The new table.
+        """
+        table = cls()
+        table.extend(animals)
+        return table
+
+    @classmethod
+    def from_birth_years(cls, names, birth_years, species="Animal", breeds=None,
+                         current_year=None):
+        """
+        Build a table straight from birth years, like Animal.from_birth_years.
+
+        The ages are computed for the whole column at once (with NumPy when it
+        is installed) and written into the age column without creating any
+        Animal objects.
+
+        Args:
+            names (sequence): The names of the animals.
+            birth_years (sequence): The birth years.
+            species (str or sequence): One species for every row, or one per row.
+            breeds (sequence, optional): One breed (or None) per row.
+            current_year (int, optional): The year to count from.
+
+        Returns:
+            AnimalTable: The new table.
+
+        Raises:
+            ValueError: If the lengths differ or any birth year is in the future.
+        """
+        if current_year is None:
+            current_year = datetime.now().year
+        count = len(names)
+        if len(birth_years) != count or (breeds is not None and len(breeds) != count):
+            raise ValueError("All columns must have the same length")
+
+        table = cls()
+        if np is not None:
+            ages = current_year - np.asarray(birth_years, dtype=np.int64)
+            invalid = np.flatnonzero(ages < 0)
+            table.ages.frombytes(ages.tobytes())
+        else:
+            table.ages = array("q", [current_year - year for year in birth_years])
+            invalid = [i for i, age in enumerate(table.ages) if age < 0]
+        if len(invalid):
+            shown = ", ".join(f"{names[i]!r} ({birth_years[i]})" for i in invalid[:10])
+            raise ValueError(f"Age cannot be negative for {len(invalid)} record(s): {shown}")
+
+        table.names = [sys.intern(name) for name in names]
+        if isinstance(species, str):
+            table.species = array("B", [_SPECIES_CODES[species]]) * count
+        else:
+            table.species = array("B", [_SPECIES_CODES[name] for name in species])
+        if breeds is None:
+            table.breeds = array("l", [NO_BREED]) * count
+        else:
+            table.breeds = array("l", [table._breed_code(breed) for breed in breeds])
+        return table
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.names)
+
+    def __getitem__(self, index):
+        """Return a row view (negative indexes count from the end)."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("AnimalTable index out of range")
+        return AnimalRow(self, index)
+
+    def __iter__(self):
+        """Yield a row view for every row."""
+        for index in range(len(self)):
+            yield AnimalRow(self, index)
+
+    def _breed_code(self, breed):
+        if breed is None:
+            return NO_BREED
+        code = self._breed_codes.get(breed)
+        if code is None:
+            code = self._breed_codes[breed] = len(self.breed_names)
+            self.breed_names.append(sys.intern(breed))
+        return code
+
+    def append_row(self, name, age, species="Animal", breed=None):
+        """
+        Add one record.
+
+        Args:
+            name (str): The name of the animal.
+            age (int): The age of the animal.
+            species (str): One of SPECIES.
+            breed (str, optional): The breed, for dogs.
+
+        Returns:
+            AnimalRow: A view of the new row.
+        """
+        if age < 0:
+            raise ValueError("Age cannot be negative")
+        self.names.append(sys.intern(name))
+        self.ages.append(age)
+        self.species.append(_SPECIES_CODES[species])
+        self.breeds.append(self._breed_code(breed))
+        return AnimalRow(self, len(self.names) - 1)
+
+    def append(self, animal):
+        """Add an Animal object as a new row."""
+        return self.append_row(animal.name, animal.age, SPECIES[_species_of(animal)],
+                               getattr(animal, "breed", None))
+
+    def extend(self, animals):
+        """Add many Animal objects."""
+        for animal in animals:
+            self.append(animal)
+
+    def _age_vector(self):
+        """Return the age column as a NumPy array sharing the same memory."""
+        return np.frombuffer(self.ages, dtype=np.int64)
+
+    def is_adult(self):
+        """
+        Apply Animal.is_adult to the whole age column at once.
+
+        Returns:
+            numpy.ndarray or list: A boolean per row.
+        """
+        if np is not None:
+            return self._age_vector() >= 18
+        return [age >= 18 for age in self.ages]
+
+    def select(self, species=None, min_age=None, max_age=None, breed=None):
+        """
+        Return the row indexes that match every given condition.
+
+        Args:
+            species (str, optional): One of SPECIES.
+            min_age (int, optional): The lowest age to include.
+            max_age (int, optional): The highest age to include.
+            breed (str, optional): Only dogs of this breed.
+
+        Returns:
+            list: The matching row indexes, in table order.
+        """
+        species_code = None if species is None else _SPECIES_CODES[species]
+        breed_code = None if breed is None else self._breed_codes.get(breed, -2)
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            ages = self._age_vector()
+            if min_age is not None:
+                mask &= ages >= min_age
+            if max_age is not None:
+                mask &= ages <= max_age
+            if species_code is not None:
+                mask &= np.frombuffer(self.species, dtype=np.uint8) == species_code
+            if breed_code is not None:
+                mask &= np.frombuffer(self.breeds, dtype=np.dtype(f"i{self.breeds.itemsize}")) == breed_code
+            return np.flatnonzero(mask).tolist()
+        return [i for i in range(len(self))
+                if (min_age is None or self.ages[i] >= min_age)
+                and (max_age is None or self.ages[i] <= max_age)
+                and (species_code is None or self.species[i] == species_code)
+                and (breed_code is None or self.breeds[i] == breed_code)]
+
+    def count_adults(self):
+        """Return how many rows are adults."""
+        if np is not None:
+            return int(np.count_nonzero(self.is_adult()))
+        return sum(self.is_adult())
+
+
+# 5. Benchmark -------------------------------------------------------------------
+
+def _records(count):
+    """Generate (name, age, species, breed) tuples."""
+    breeds = ("Labrador", "Beagle", "Poodle", "Husky")
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            yield f"rex-{i}", i % 25, "Dog", breeds[(i // 4) % len(breeds)]
+        elif kind == 1:
+            yield f"tom-{i}", i % 20, "Cat", None
+        else:
+            yield f"felix-{i}", i % 19, "HouseCat", None
+
+
+def _build_objects(count, dog, cat, house_cat):
+    animals = []
+    for name, age, species, breed in _records(count):
+        if species == "Dog":
+            animals.append(dog(name, age, breed))
+        elif species == "Cat":
+            animals.append(cat(name, age))
+        else:
+            animals.append(house_cat(name, age))
+    return animals
+
+
+def _build_table(count):
+    table = AnimalTable()
+    for record in _records(count):
+        table.append_row(*record)
+    return table
+
+
+def benchmark_animal_table(count=500_000):
+    """Compare dict objects, slotted objects and the columnar table."""
+    layouts = [
+        ("dict objects", lambda: _build_objects(count, Dog, Cat, HouseCat),
+         lambda animals: sum(1 for a in animals if Animal.is_adult(a.age))),
+        ("slotted objects", lambda: _build_objects(count, SlottedDog, SlottedCat, SlottedHouseCat),
+         lambda animals: sum(1 for a in animals if Animal.is_adult(a.age))),
+        ("AnimalTable", lambda: _build_table(count),
+         lambda table: table.count_adults()),
+    ]
+    print(f"{count:,} animals:")
+    print(f"  {'layout':<18} {'memory':>10} {'per row':>9} {'build':>9} {'count adults':>13}")
+    for label, build, count_adults in layouts:
+        start = time.perf_counter()
+        data = build()
+        build_time = time.perf_counter() - start
+        del data
+        tracemalloc.start()
+        data = build()
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        adults = count_adults(data)
+        query_time = time.perf_counter() - start
+        print(f"  {label:<18} {memory / 2 ** 20:8.1f}MB {memory / count:7.1f} B "
+              f"{build_time:8.2f}s {query_time * 1e3:10.2f} ms  ({adults:,} adults)")
+        del data
+
+
+def benchmark_from_birth_years(count=1_000_000):
+    """Compare bulk construction from birth years with a loop of from_birth_year."""
+    names = [f"cat-{i}" for i in range(count)]
+    years = [2000 + i % 25 for i in range(count)]
+    cases = [
+        ("loop of Cat.from_birth_year", lambda: [Cat.from_birth_year(n, y) for n, y in zip(names, years)]),
+        ("Cat.from_birth_years (list)", lambda: Cat.from_birth_years(names, years)),
+    ]
+    if np is not None:
+        year_array = np.array(years, dtype=np.int64)
+        cases.append(("Cat.from_birth_years (NumPy)", lambda: Cat.from_birth_years(names, year_array)))
+    cases.append(("AnimalTable.from_birth_years",
+                  lambda: AnimalTable.from_birth_years(names, years, species="Cat")))
+
+    print(f"{count:,} birth-year records:")
+    for label, build in cases:
+        start = time.perf_counter()
+        build()
+        print(f"  {label:<30} {time.perf_counter() - start:8.2f} s")
+
+
+def demonstrate_animal_table():
+    """Show slotted classes, row views and vectorized filters."""
+    rex = SlottedDog("Rex", 3, "Beagle")
+    print(f"SlottedDog: {rex}, says {rex.make_sound()}, has __dict__: {hasattr(rex, '__dict__')}")
+    smokey = SlottedHouseCat("Smokey", 20)
+    print(f"SlottedHouseCat is a Pet: {isinstance(smokey, Pet)}; {smokey.play()}")
+
+    table = AnimalTable.from_animals([
+        Dog("Buddy", 5, "Golden Retriever"), Cat("Whiskers", 19), rex, smokey])
+    print(f"\nTable with {len(table)} rows:")
+    for row in table:
+        print(f"  {row} ({row.species}, breed={row.breed}): {row.make_sound()}")
+    print(f"is_adult over the age column: {[bool(adult) for adult in table.is_adult()]}")
+    print(f"Cats aged 10+: {[str(table[i]) for i in table.select(species='Cat', min_age=10)]}")
+    table[0].age = 6
+    print(f"Row 0 after a birthday: {table[0]!r}")
+
+
+if __name__ == "__main__":
+    demonstrate_animal_table()
+    print()
+    benchmark_animal_table()
+    print()
+    benchmark_from_birth_years()
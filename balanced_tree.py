@@ -0,0 +1,417 @@
+"""
+balanced_tree.py: A self-balancing search tree built on TreeNode
+
+The TreeNode in recursivity.py is wired together by hand, so nothing stops
+a tree from degenerating into a linked list. This module covers:
+1. AVLNode: a TreeNode that also remembers its height and a data payload
+2. AVLTree: an ordered index with O(log n) insert, delete and lookup
+3. Building a tree in O(n) from sorted data
+4. range(lo, hi): streaming the keys in a range in order
+5. A benchmark against a sorted list with bisect
+
+An AVL tree keeps the heights of the two subtrees of every node within one
+of each other, which bounds the height at about 1.44 * log2(n). Insert and
+delete walk down with an explicit path and rebalance on the way back up.
+"""
+
+import bisect
+import random
+import time
+
+from recursivity import TreeNode
+
+
+class AVLNode(TreeNode):
+    """A TreeNode with the extra fields an AVL tree needs."""
+
+    def __init__(self, value, data=None):
+        """
+        Initialize a leaf node.
+
+        Args:
+            value: The key of the node (TreeNode calls it value).
+            data: Any payload to store with the key.
+        """
+        super().__init__(value)
+        self.data = data
+        self.height = 1
+
+
+def _height(node):
+    return node.height if node is not None else 0
+
+
+def _update(node):
+    """Recompute the height of node from its children."""
+    left, right = _height(node.left), _height(node.right)
+    node.height = (left if left > right else right) + 1
+
+
+def _rotate_right(node):
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rotate_left(node):
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rebalance(node):
+    """Restore the AVL property at node and return the new subtree root."""
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class AVLTree:
+    """
+    An ordered index of unique keys, each with an optional data payload.
+
+    Keys can be any mutually comparable values. Iterating over the tree
+    yields the keys in ascending order.
+    """
+
+    def __init__(self):
+        """Initialize an empty tree."""
+        self.root = None
+        self._size = 0
+
+    @classmethod
+    def from_sorted(cls, keys, data=None):
+        """
+        Build a perfectly balanced tree from sorted keys in O(n).
+
+        Args:
+            keys (sequence): Keys in strictly increasing order.
+            data (sequence, optional): Payloads matching keys one to one.
+
+        Returns:
+            AVLTree: The new tree.
+
+        Raises:
+            ValueError: If the keys are not strictly increasing.
+        """
+        size = len(keys)
+        if data is not None and len(data) != size:
+            raise ValueError("keys and data must have the same length")
+        for i in range(1, size):
+            if not keys[i - 1] < keys[i]:
+                raise ValueError("keys must be strictly increasing")
+
+        tree = cls()
+        tree._size = size
+        if size == 0:
+            return tree
+        tree.root = AVLNode(None)
+        # Each entry is (node to fill, low, high) for keys[low:high].
+        stack = [(tree.root, 0, size)]
+        while stack:
+            node, low, high = stack.pop()
+            middle = (low + high) // 2
+            node.value = keys[middle]
+            node.data = data[middle] if data is not None else None
+            # A balanced subtree over k keys has height k.bit_length().
+            node.height = (high - low).bit_length()
+            if low < middle:
+                node.left = AVLNode(None)
+                stack.append((node.left, low, middle))
+            if middle + 1 < high:
+                node.right = AVLNode(None)
+                stack.append((node.right, middle + 1, high))
+        return tree
+
+    def __len__(self):
+        """Return the number of keys."""
+        return self._size
+
+    def __contains__(self, key):
+        """Check whether key is in the tree."""
+        return self._find(key) is not None
+
+    def __iter__(self):
+        """Yield every key in ascending order."""
+        return self.range()
+
+    def __repr__(self):
+        return f"AVLTree(size={self._size}, height={_height(self.root)})"
+
+    @property
+    def height(self):
+        """The height of the tree (0 when empty)."""
+        return _height(self.root)
+
+    def _find(self, key):
+        node = self.root
+        while node is not None:
+            if key == node.value:
+                return node
+            node = node.left if key < node.value else node.right
+        return None
+
+    def get(self, key, default=None):
+        """
+        Return the data stored with key.
+
+        Args:
+            key: The key to look up.
+            default: What to return if key is missing.
+
+        Returns:
+            The payload of key, or default.
+        """
+        node = self._find(key)
+        return default if node is None else node.data
+
+    def _replace_child(self, parent, old, new):
+        """Point whichever link of parent referred to old at new instead."""
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def _rebalance_path(self, path, stop_when_unchanged):
+        """Rebalance every node on path, from the deepest one up to the root."""
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            subtree = _rebalance(node)
+            if subtree is not node:
+                self._replace_child(path[i - 1] if i else None, node, subtree)
+            elif stop_when_unchanged and node.height == old_height:
+                # Nothing above can change, so the walk can stop early.
+                return
+
+    def insert(self, key, data=None):
+        """
+        Add key to the tree, or replace its data if it is already there.
+
+        Args:
+            key: The key to add.
+            data: The payload to store with the key.
+        """
+        path = []
+        node = self.root
+        while node is not None:
+            if key == node.value:
+                node.data = data
+                return
+            path.append(node)
+            node = node.left if key < node.value else node.right
+
+        node = AVLNode(key, data)
+        self._size += 1
+        if not path:
+            self.root = node
+            return
+        parent = path[-1]
+        if key < parent.value:
+            parent.left = node
+        else:
+            parent.right = node
+        self._rebalance_path(path, stop_when_unchanged=True)
+
+    def delete(self, key):
+        """
+        Remove key from the tree.
+
+        Args:
+            key: The key to remove.
+
+        Raises:
+            KeyError: If key is not in the tree.
+        """
+        path = []
+        node = self.root
+        while node is not None and key != node.value:
+            path.append(node)
+            node = node.left if key < node.value else node.right
+        if node is None:
+            raise KeyError(key)
+
+        if node.left is not None and node.right is not None:
+            # Move the successor's key into node, then remove the successor.
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            node.value, node.data = successor.value, successor.data
+            node = successor
+
+        child = node.left if node.left is not None else node.right
+        self._replace_child(path[-1] if path else None, node, child)
+        self._size -= 1
+        self._rebalance_path(path, stop_when_unchanged=False)
+
+    def pop(self, key, *default):
+        """Remove key and return its data (or default if it is missing)."""
+        node = self._find(key)
+        if node is None:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        data = node.data
+        self.delete(key)
+        return data
+
+    def min(self):
+        """Return the smallest key."""
+        node = self.root
+        if node is None:
+            raise ValueError("min() of an empty tree")
+        while node.left is not None:
+            node = node.left
+        return node.value
+
+    def max(self):
+        """Return the largest key."""
+        node = self.root
+        if node is None:
+            raise ValueError("max() of an empty tree")
+        while node.right is not None:
+            node = node.right
+        return node.value
+
+    def _range_nodes(self, lo, hi):
+        """Yield the nodes with lo <= key < hi in order (None means unbounded)."""
+        stack = []
+        node = self.root
+        # Only push the nodes on the way down to lo; smaller keys are skipped.
+        while node is not None:
+            if lo is None or not node.value < lo:
+                stack.append(node)
+                node = node.left
+            else:
+                node = node.right
+        while stack:
+            node = stack.pop()
+            if hi is not None and not node.value < hi:
+                return
+            yield node
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+    def range(self, lo=None, hi=None):
+        """
+        Yield the keys with lo <= key < hi in ascending order.
+
+        The keys are produced lazily, so stopping early costs nothing and
+        memory use is O(log n) however large the range is.
+
+        Args:
+            lo: The lower bound (inclusive), or None for no bound.
+            hi: The upper bound (exclusive), or None for no bound.
+
+        Yields:
+            The matching keys.
+        """
+        for node in self._range_nodes(lo, hi):
+            yield node.value
+
+    def range_items(self, lo=None, hi=None):
+        """Yield (key, data) pairs with lo <= key < hi in ascending order."""
+        for node in self._range_nodes(lo, hi):
+            yield node.value, node.data
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def benchmark_avl(size=1_000_000, operations=100_000):
+    """
+    Compare AVLTree with a sorted list and bisect.
+
+    Args:
+        size (int): How many keys to start with (try 10 ** 7 on a big box).
+        operations (int): How many inserts, lookups and deletes to time.
+    """
+    rng = random.Random(7)
+    keys = list(range(0, 2 * size, 2))  # even numbers, so odd ones are free
+    new_keys = [2 * rng.randrange(size) + 1 for _ in range(operations)]
+    new_keys = list(dict.fromkeys(new_keys))
+    probes = [rng.randrange(2 * size) for _ in range(operations)]
+
+    print(f"{size:,} keys, {len(new_keys):,} inserts/deletes, {operations:,} lookups")
+    print(f"  {'operation':<24} {'AVLTree':>12} {'list+bisect':>12}")
+
+    def row(label, avl_time, list_time):
+        print(f"  {label:<24} {avl_time * 1e3:10.1f}ms {list_time * 1e3:10.1f}ms")
+
+    avl_build, tree = _timed(lambda: AVLTree.from_sorted(keys))
+    list_build, ordered = _timed(lambda: list(keys))
+    row("build from sorted", avl_build, list_build)
+
+    row("insert",
+        _timed(lambda: [tree.insert(k) for k in new_keys])[0],
+        _timed(lambda: [bisect.insort(ordered, k) for k in new_keys])[0])
+
+    def bisect_contains(key):
+        i = bisect.bisect_left(ordered, key)
+        return i < len(ordered) and ordered[i] == key
+
+    row("lookup",
+        _timed(lambda: [k in tree for k in probes])[0],
+        _timed(lambda: [bisect_contains(k) for k in probes])[0])
+
+    lo, hi = size // 2, size // 2 + 20_000
+    row("range of 10,000 keys",
+        _timed(lambda: list(tree.range(lo, hi)))[0],
+        _timed(lambda: ordered[bisect.bisect_left(ordered, lo):bisect.bisect_left(ordered, hi)])[0])
+
+    def list_delete(key):
+        del ordered[bisect.bisect_left(ordered, key)]
+
+    row("delete",
+        _timed(lambda: [tree.delete(k) for k in new_keys])[0],
+        _timed(lambda: [list_delete(k) for k in new_keys])[0])
+    print(f"  final tree height: {tree.height} for {len(tree):,} keys")
+
+
+def demonstrate_avl():
+    """Show that the tree stays balanced under sorted inserts."""
+    tree = AVLTree()
+    for key in range(1, 16):
+        tree.insert(key, f"record {key}")
+    print(f"Inserted 1..15 in order: {tree}")
+    print(f"Keys: {list(tree)}")
+    print(f"Root is {tree.root.value}, so the tree did not turn into a list")
+
+    print(f"\nrange(4, 9): {list(tree.range(4, 9))}")
+    print(f"get(7): {tree.get(7)!r}")
+
+    tree.delete(8)
+    print(f"\nAfter delete(8): {list(tree)} (root {tree.root.value})")
+
+    bulk = AVLTree.from_sorted(range(1_000_000))
+    print(f"\nBuilt from 10**6 sorted keys: {bulk}")
+    print(f"First keys from 999,990: {list(bulk.range(999_990))}")
+
+
+if __name__ == "__main__":
+    demonstrate_avl()
+    print()
+    benchmark_avl()
@@ -11,9 +11,12 @@ It covers the following topics:
 Each section includes examples of good and bad practices.
 """
 
+import math
 import time
 from typing import List, Dict
 
+from lock_manager import acquire_lock, release_lock
+
 
 # 1. Code Style (PEP 8)
 def demonstrate_code_style():
@@ -104,19 +107,52 @@ def demonstrate_error_handling():
 # Good: Group related functions and classes
 class Shape:
     """A base class for shapes."""
-    pass
+
+    def area(self) -> float:
+        """Return the area of the shape."""
+        raise NotImplementedError("Subclass must implement area")
+
+    def perimeter(self) -> float:
+        """Return the perimeter of the shape."""
+        raise NotImplementedError("Subclass must implement perimeter")
 
 class Circle(Shape):
     """A circle shape."""
-    pass
+
+    def __init__(self, radius: float):
+        if radius < 0:
+            raise ValueError("Radius cannot be negative")
+        self.radius = radius
+
+    def area(self) -> float:
+        return math.pi * self.radius * self.radius
+
+    def perimeter(self) -> float:
+        return 2 * math.pi * self.radius
+
+    def __repr__(self):
+        return f"Circle(radius={self.radius})"
 
 class Square(Shape):
     """A square shape."""
-    pass
+
+    def __init__(self, side: float):
+        if side < 0:
+            raise ValueError("Side cannot be negative")
+        self.side = side
+
+    def area(self) -> float:
+        return self.side * self.side
+
+    def perimeter(self) -> float:
+        return 4 * self.side
+
+    def __repr__(self):
+        return f"Square(side={self.side})"
 
 def calculate_area(shape: Shape) -> float:
     """Calculate the area of a shape."""
-    pass
+    return shape.area()
 
 # Bad: Mixing unrelated functions and classes
 def unrelated_function():
@@ -125,6 +161,19 @@ def unrelated_function():
 
 
 # 5. Performance Tips
+# Good: Use generator for large datasets
+def number_generator(n):
+    """Yield the numbers 0 .. n - 1, one at a time."""
+    for i in range(n):
+        yield i
+
+
+# Bad: Creating a large list in memory
+def number_list(n):
+    """Return the numbers 0 .. n - 1 as one list."""
+    return list(range(n))
+
+
 def demonstrate_performance_tips():
     """Demonstrate good and bad performance practices."""
     # Good: Use list comprehension for simple loops
@@ -146,13 +195,10 @@ def demonstrate_performance_tips():
     sentence_bad = sentence_bad.strip()
 
     # Good: Use generator for large datasets
-    def number_generator(n):
-        for i in range(n):
-            yield i
+    total = sum(number_generator(1000))
 
     # Bad: Creating a large list in memory
-    def number_list(n):
-        return list(range(n))
+    total_bad = sum(number_list(1000))
 
 
 def main():
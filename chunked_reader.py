@@ -0,0 +1,322 @@
+"""
+chunked_reader.py: Reading large files without loading them whole
+
+demonstrate_error_handling reads a file with file.read(), which needs as
+much memory as the file is large. This module covers:
+1. read_chunks: fixed-size chunks read into one reused buffer and handed
+   out as memoryview slices, so no bytes object is created per chunk
+2. read_lines: lines as memoryview slices, from the chunk buffer or from a
+   memory-mapped file
+3. An mmap mode, where the operating system pages the file in on demand
+4. parallel_scan: splits a file into line-aligned byte ranges and processes
+   them in a process pool
+5. A throughput benchmark in MB/s against plain read()
+
+Missing files raise FileNotFoundError and other read problems raise
+OSError (IOError), exactly like open() and read(), so the except clauses
+of demonstrate_error_handling work unchanged.
+
+A memoryview handed out by these generators is only valid until the next
+one is requested: the buffer it points into is reused (or unmapped). Copy
+it with bytes(view) to keep it.
+"""
+
+import mmap
+import os
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+@contextmanager
+def _mapped(file):
+    """Map a whole open file read-only; an empty file maps to b""."""
+    if os.fstat(file.fileno()).st_size == 0:
+        yield b""
+        return
+    mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapping
+    finally:
+        try:
+            mapping.close()
+        except BufferError:
+            pass  # a caller kept a view; the mapping is freed with it
+
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=False):
+    """
+    Yield the file as memoryview chunks of at most chunk_size bytes.
+
+    Args:
+        path (str): The file to read.
+        chunk_size (int): The chunk size in bytes.
+        use_mmap (bool): Slice a memory map instead of reading into a buffer.
+
+    Yields:
+        memoryview: The next chunk (valid until the next one is requested).
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        OSError: If the file cannot be read.
+    """
+    with open(path, "rb", buffering=0) as file:
+        if use_mmap:
+            with _mapped(file) as mapping:
+                view = memoryview(mapping)
+                try:
+                    for start in range(0, len(view), chunk_size):
+                        yield view[start:start + chunk_size]
+                finally:
+                    view.release()
+            return
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        try:
+            while True:
+                count = file.readinto(buffer)
+                if not count:
+                    return
+                yield view[:count]
+        finally:
+            view.release()
+
+
+def read_lines(path, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=False, keepends=False):
+    """
+    Yield the lines of a file as memoryview slices.
+
+    Lines end at b"\\n". In buffer mode a line that crosses a chunk
+    boundary is copied once into a small carry-over buffer; every other
+    line is a slice of the chunk buffer. Finding each line costs some
+    Python bytecode, so for short lines "for line in file" is faster; the
+    views pay off for long lines, or when lines are only inspected in part.
+
+    Args:
+        path (str): The file to read.
+        chunk_size (int): The read size in buffer mode.
+        use_mmap (bool): Slice a memory map instead.
+        keepends (bool): Include the b"\\n" at the end of each line.
+
+    Yields:
+        memoryview: The next line (valid until the next one is requested).
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        OSError: If the file cannot be read.
+    """
+    tail = 1 if not keepends else 0
+    if use_mmap:
+        with open(path, "rb", buffering=0) as file, _mapped(file) as mapping:
+            view = memoryview(mapping)
+            try:
+                start, size = 0, len(view)
+                while start < size:
+                    end = mapping.find(b"\n", start)
+                    if end < 0:
+                        yield view[start:]
+                        return
+                    yield view[start:end + 1 - tail]
+                    start = end + 1
+            finally:
+                view.release()
+        return
+
+    carry = bytearray()
+    for chunk in read_chunks(path, chunk_size):
+        buffer = chunk.obj
+        start, size = 0, len(chunk)
+        while True:
+            end = buffer.find(b"\n", start, size)
+            if end < 0:
+                carry += chunk[start:]
+                break
+            if carry:
+                carry += chunk[start:end + 1]
+                line = memoryview(carry)
+                yield line[:len(carry) - tail]
+                line.release()
+                carry = bytearray()
+            else:
+                yield chunk[start:end + 1 - tail]
+            start = end + 1
+    if carry:
+        yield memoryview(carry)
+
+
+# Parallel scans -----------------------------------------------------------------
+
+def line_ranges(path, parts):
+    """
+    Split a file into about parts byte ranges that start at line beginnings.
+
+    Returns:
+        list: (start, end) pairs covering the whole file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    bounds = [0]
+    with open(path, "rb") as file:
+        for i in range(1, parts):
+            file.seek(max(size * i // parts, bounds[-1]))
+            file.readline()  # move to the start of the next line
+            position = file.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _scan_range(task):
+    path, start, end, func, chunk_size = task
+    with open(path, "rb", buffering=0) as file, _mapped(file) as mapping:
+        view = memoryview(mapping)
+        try:
+            return func(view[start:end], chunk_size)
+        finally:
+            view.release()
+
+
+def parallel_scan(path, func, combine=sum, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Run func over line-aligned byte ranges of a file in a process pool.
+
+    Every worker maps the file itself, so no file data is sent between
+    processes; only the range bounds and the results are.
+
+    Args:
+        path (str): The file to scan.
+        func (callable): func(view, chunk_size) -> result for one range. It
+            must be a module-level function so it can be pickled.
+        combine (callable): Combines the list of per-range results.
+        workers (int, optional): Pool size (default: the CPU count).
+        chunk_size (int): Passed on to func.
+
+    Returns:
+        The combined result.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, start, end, func, chunk_size)
+             for start, end in line_ranges(path, workers * 4)]
+    if workers == 1:
+        return combine([_scan_range(task) for task in tasks])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return combine(list(pool.map(_scan_range, tasks)))
+
+
+def count_newlines(view, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Count b"\\n" in a buffer, copying at most chunk_size bytes at a time."""
+    return sum(bytes(view[i:i + chunk_size]).count(b"\n")
+               for i in range(0, len(view), chunk_size))
+
+
+def count_lines(path, use_mmap=False):
+    """Count the lines of a file without holding more than one chunk."""
+    count = 0
+    last = b"\n"
+    for chunk in read_chunks(path, use_mmap=use_mmap):
+        count += count_newlines(chunk)
+        last = chunk[-1:]
+    return count + (last != b"\n")
+
+
+def _write_sample(path, megabytes):
+    line = b"The quick brown fox jumps over the lazy dog, 0123456789\n"
+    block = line * (1 << 14)
+    with open(path, "wb") as file:
+        for _ in range(megabytes * (1 << 20) // len(block)):
+            file.write(block)
+
+
+def benchmark_reader(megabytes=256):
+    """Compare read(), chunked reading, mmap and a parallel scan in MB/s."""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "sample.txt")
+    try:
+        _write_sample(path, megabytes)
+        size = os.path.getsize(path) / 1e6
+
+        def timed(label, func):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<34} {size / elapsed:8,.0f} MB/s")
+            return result
+
+        print(f"{size:,.0f} MB file, CPU count {os.cpu_count()} (the file is in the page cache)")
+
+        def read_all():
+            with open(path, "rb") as file:
+                return zlib.crc32(file.read())
+
+        def checksum(**options):
+            crc = 0
+            for chunk in read_chunks(path, **options):
+                crc = zlib.crc32(chunk, crc)
+            return crc
+
+        expected = timed("read() + crc32", read_all)
+        assert timed("read_chunks + crc32", checksum) == expected
+        assert timed("read_chunks(use_mmap) + crc32", lambda: checksum(use_mmap=True)) == expected
+
+        def plain_lines():
+            with open(path, "rb") as file:
+                return sum(1 for _ in file)
+
+        lines = timed("for line in file (binary)", plain_lines)
+        assert timed("read_lines", lambda: sum(1 for _ in read_lines(path))) == lines
+        assert timed("read_lines(use_mmap)",
+                     lambda: sum(1 for _ in read_lines(path, use_mmap=True))) == lines
+        assert timed("count_lines", lambda: count_lines(path)) == lines
+        for workers in (1, 2, 4):
+            assert timed(f"parallel_scan, {workers} worker(s)",
+                         lambda: parallel_scan(path, count_newlines, workers=workers)) == lines
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rmdir(directory)
+
+
+def demonstrate_reader():
+    """Show the error handling and the line and chunk readers."""
+    try:
+        for chunk in read_chunks("nonexistent_file.txt"):
+            pass
+    except FileNotFoundError:
+        print("The file was not found.")
+    except IOError:
+        print("An error occurred while reading the file.")
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "animals.txt")
+    try:
+        with open(path, "wb") as file:
+            file.write(b"Buddy\nWhiskers\nSmokey\nRex")
+        print(f"Lines: {[bytes(line) for line in read_lines(path, chunk_size=8)]}")
+        print(f"Lines (mmap): {[bytes(line) for line in read_lines(path, use_mmap=True)]}")
+        print(f"Chunks of 10: {[bytes(chunk) for chunk in read_chunks(path, 10)]}")
+        print(f"Line-aligned ranges: {line_ranges(path, 3)}")
+        print(f"count_lines: {count_lines(path)}, "
+              f"parallel newline count: {parallel_scan(path, count_newlines, workers=2)}")
+    finally:
+        os.remove(path)
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    demonstrate_reader()
+    print()
+    benchmark_reader()
@@ -0,0 +1,401 @@
+"""
+compact_tree.py: Memory-efficient binary trees
+
+Every recursivity.TreeNode is a full Python object with its own __dict__,
+so a tree with tens of millions of nodes needs gigabytes of memory. This
+module covers two lighter alternatives:
+1. SlotTreeNode: the same node class with __slots__ instead of a __dict__
+2. ArrayTree: a struct-of-arrays tree that keeps the values and the left
+   and right child indexes in three flat columns (array.array or NumPy)
+3. A memory benchmark comparing all three
+
+A missing child is stored as index -1. ArrayTree provides the same
+traversals as tree_traversal.py, working directly on the index columns.
+"""
+
+import time
+import tracemalloc
+from array import array
+from collections import deque
+
+from recursivity import TreeNode
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the array module is the default
+    np = None
+
+NO_CHILD = -1
+
+
+class SlotTreeNode:
+    """A drop-in replacement for TreeNode that uses __slots__."""
+
+    __slots__ = ("value", "left", "right")
+
+    def __init__(self, value):
+        self.value = value
+        self.left = None
+        self.right = None
+
+
+class ArrayTree:
+    """
+    A binary tree stored as three parallel columns.
+
+    Node i has the value values[i] and children left[i] and right[i]
+    (NO_CHILD when missing). The root is node root_index.
+    """
+
+    def __init__(self, values, left, right, root_index=0):
+        """
+        Initialize a tree from existing columns.
+
+        Args:
+            values: The value column.
+            left: The left child index column.
+            right: The right child index column.
+            root_index (int): The index of the root node, or NO_CHILD if empty.
+        """
+        if not len(values) == len(left) == len(right):
+            raise ValueError("All columns must have the same length")
+        self.values = values
+        self.left = left
+        self.right = right
+        self.root_index = root_index if len(values) else NO_CHILD
+
+    def __len__(self):
+        """Return the number of nodes."""
+        return len(self.values)
+
+    def __repr__(self):
+        return f"ArrayTree(nodes={len(self)}, root_index={self.root_index})"
+
+    @staticmethod
+    def _child_columns(size, storage):
+        """Create left and right child columns with every entry NO_CHILD."""
+        if storage == "numpy":
+            if np is None:
+                raise ImportError("storage='numpy' requires NumPy")
+            return (np.full(size, NO_CHILD, dtype=np.int64),
+                    np.full(size, NO_CHILD, dtype=np.int64))
+        if storage != "array":
+            raise ValueError(f"Unknown storage: {storage!r}")
+        return array("q", [NO_CHILD]) * size, array("q", [NO_CHILD]) * size
+
+    @classmethod
+    def from_sorted(cls, values, typecode="q", storage="array"):
+        """
+        Build a balanced search tree from sorted values in one pass.
+
+        The node for values[i] is stored at index i, so the value column is
+        simply a copy of the input and only the child columns are computed.
+
+        Args:
+            values (sequence): Values in ascending order.
+            typecode (str): array/NumPy type code for the values ("q" for
+                64-bit integers, "d" for floats).
+            storage (str): "array" for array.array columns, "numpy" for NumPy.
+
+        Returns:
+            ArrayTree: The balanced tree.
+        """
+        size = len(values)
+        left, right = cls._child_columns(size, storage)
+        if storage == "numpy":
+            value_column = np.array(values, dtype=np.dtype(typecode))
+        else:
+            value_column = array(typecode, values)
+        if size == 0:
+            return cls(value_column, left, right, NO_CHILD)
+
+        # Each entry is a half-open range [low, high) and the index of the
+        # node whose child will be the middle of that range.
+        root = (size - 1) // 2
+        stack = [(0, root, root, True), (root + 1, size, root, False)]
+        while stack:
+            low, high, parent, is_left = stack.pop()
+            if low >= high:
+                continue
+            middle = (low + high - 1) // 2
+            if is_left:
+                left[parent] = middle
+            else:
+                right[parent] = middle
+            stack.append((low, middle, middle, True))
+            stack.append((middle + 1, high, middle, False))
+        return cls(value_column, left, right, root)
+
+    @classmethod
+    def from_treenode(cls, root, typecode="q", storage="array"):
+        """
+        Convert a tree of TreeNode (or SlotTreeNode) objects.
+
+        Nodes are numbered in preorder.
+
+        Args:
+            root (TreeNode): The root of the tree to convert.
+            typecode (str): Type code for the value column.
+            storage (str): "array" or "numpy".
+
+        Returns:
+            ArrayTree: The converted tree.
+        """
+        nodes = []
+        stack = [root] if root is not None else []
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+
+        index_of = {id(node): i for i, node in enumerate(nodes)}
+        left, right = cls._child_columns(len(nodes), storage)
+        if storage == "numpy":
+            values = np.array([node.value for node in nodes], dtype=np.dtype(typecode))
+        else:
+            values = array(typecode, [node.value for node in nodes])
+        for i, node in enumerate(nodes):
+            if node.left is not None:
+                left[i] = index_of[id(node.left)]
+            if node.right is not None:
+                right[i] = index_of[id(node.right)]
+        return cls(values, left, right, 0 if nodes else NO_CHILD)
+
+    def to_treenode(self, node_class=TreeNode):
+        """
+        Convert the tree back into linked node objects.
+
+        Args:
+            node_class (type): TreeNode, SlotTreeNode or a compatible class.
+
+        Returns:
+            TreeNode: The root of the new tree, or None if the tree is empty.
+        """
+        if self.root_index == NO_CHILD:
+            return None
+        nodes = [node_class(value) for value in self._python_values()]
+        left, right = self.left, self.right
+        for i, node in enumerate(nodes):
+            if left[i] != NO_CHILD:
+                node.left = nodes[left[i]]
+            if right[i] != NO_CHILD:
+                node.right = nodes[right[i]]
+        return nodes[self.root_index]
+
+    def __contains__(self, key):
+        """Check whether key is in the tree (which must be search-ordered)."""
+        return self.find(key) != NO_CHILD
+
+    def find(self, key):
+        """
+        Look up a key in a binary search tree.
+
+        Only the nodes on the path from the root are read, so this stays fast
+        when the columns are backed by a memory-mapped file.
+
+        Args:
+            key: The value to look for.
+
+        Returns:
+            int: The index of the node holding key, or NO_CHILD if missing.
+        """
+        values, left, right = self.values, self.left, self.right
+        node = self.root_index
+        while node != NO_CHILD:
+            value = values[node]
+            if key == value:
+                return node
+            node = left[node] if key < value else right[node]
+        return NO_CHILD
+
+    def _python_values(self):
+        """Return the value column with plain Python values."""
+        return self.values.tolist()
+
+    def _python_columns(self):
+        """Return columns that are cheap to index one element at a time."""
+        if np is not None and isinstance(self.values, np.ndarray):
+            # Indexing a NumPy array element by element boxes every value,
+            # so the traversals read plain Python lists instead.
+            return self.values.tolist(), self.left.tolist(), self.right.tolist()
+        return self.values, self.left, self.right
+
+    def iter_inorder(self):
+        """Yield the values in inorder using an explicit stack."""
+        values, left, right = self._python_columns()
+        stack = []
+        node = self.root_index
+        while stack or node != NO_CHILD:
+            while node != NO_CHILD:
+                stack.append(node)
+                node = left[node]
+            node = stack.pop()
+            yield values[node]
+            node = right[node]
+
+    def iter_preorder(self):
+        """Yield the values in preorder using an explicit stack."""
+        values, left, right = self._python_columns()
+        stack = [self.root_index] if self.root_index != NO_CHILD else []
+        while stack:
+            node = stack.pop()
+            yield values[node]
+            if right[node] != NO_CHILD:
+                stack.append(right[node])
+            if left[node] != NO_CHILD:
+                stack.append(left[node])
+
+    def iter_postorder(self):
+        """Yield the values in postorder using an explicit stack."""
+        values, left, right = self._python_columns()
+        stack = []
+        node = self.root_index
+        last_visited = NO_CHILD
+        while stack or node != NO_CHILD:
+            while node != NO_CHILD:
+                stack.append(node)
+                node = left[node]
+            top = stack[-1]
+            if right[top] != NO_CHILD and right[top] != last_visited:
+                node = right[top]
+            else:
+                yield values[top]
+                last_visited = stack.pop()
+
+    def iter_level_order(self):
+        """Yield the values level by level using a queue."""
+        values, left, right = self._python_columns()
+        queue = deque([self.root_index] if self.root_index != NO_CHILD else [])
+        while queue:
+            node = queue.popleft()
+            yield values[node]
+            if left[node] != NO_CHILD:
+                queue.append(left[node])
+            if right[node] != NO_CHILD:
+                queue.append(right[node])
+
+    def morris_inorder(self):
+        """
+        Yield the values in inorder with O(1) extra memory.
+
+        The threads are written into the right column and removed again, also
+        when the generator is closed early. With NumPy storage the columns are
+        copied to lists first, so the O(1) bound only holds for array storage.
+        """
+        values, left, right = self._python_columns()
+
+        def step(node):
+            # One Morris step: returns (next node, whether node was visited).
+            if left[node] == NO_CHILD:
+                return right[node], True
+            predecessor = left[node]
+            while right[predecessor] != NO_CHILD and right[predecessor] != node:
+                predecessor = right[predecessor]
+            if right[predecessor] == NO_CHILD:
+                right[predecessor] = node
+                return left[node], False
+            right[predecessor] = NO_CHILD
+            return right[node], True
+
+        node = self.root_index
+        try:
+            while node != NO_CHILD:
+                next_node, visited = step(node)
+                if visited:
+                    yield values[node]
+                node = next_node
+        finally:
+            while node != NO_CHILD:
+                node, _ = step(node)
+
+    def traverse(self, order="inorder"):
+        """
+        Yield the values in the requested order.
+
+        Args:
+            order (str): One of "inorder", "preorder", "postorder", "level"
+                or "morris", as in tree_traversal.traverse.
+
+        Returns:
+            generator: The values of the nodes.
+        """
+        methods = {
+            "inorder": self.iter_inorder,
+            "preorder": self.iter_preorder,
+            "postorder": self.iter_postorder,
+            "level": self.iter_level_order,
+            "morris": self.morris_inorder,
+        }
+        try:
+            return methods[order]()
+        except KeyError:
+            raise ValueError(f"Unknown traversal order: {order!r}") from None
+
+
+def benchmark_memory(size=1_000_000):
+    """Compare the memory used by the three tree representations."""
+    from tree_traversal import build_balanced_tree, iter_inorder
+
+    values = range(size)
+    builders = [
+        ("TreeNode", lambda: build_balanced_tree(values)),
+        ("SlotTreeNode", lambda: build_balanced_tree(values, node_class=SlotTreeNode)),
+        ("ArrayTree (array)", lambda: ArrayTree.from_sorted(values)),
+    ]
+    if np is not None:
+        builders.append(("ArrayTree (numpy)",
+                         lambda: ArrayTree.from_sorted(np.arange(size), storage="numpy")))
+
+    print(f"Balanced tree with {size:,} integer nodes:")
+    for label, build in builders:
+        start = time.perf_counter()
+        tree = build()
+        build_time = time.perf_counter() - start
+        del tree
+        # Tracing slows allocation down a lot, so memory is measured separately.
+        tracemalloc.start()
+        tree = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        if isinstance(tree, ArrayTree):
+            total = sum(tree.iter_inorder())
+        else:
+            total = sum(iter_inorder(tree))
+        walk_time = time.perf_counter() - start
+        assert total == size * (size - 1) // 2
+        print(f"  {label:<20} {current / 2 ** 20:8.1f} MiB  "
+              f"{current / size:6.1f} B/node  build {build_time * 1e3:7.1f} ms  "
+              f"inorder {walk_time * 1e3:7.1f} ms")
+        del tree
+
+
+def demonstrate_compact_tree():
+    """Show the conversions between the representations."""
+    root = TreeNode(1)
+    root.left = TreeNode(2)
+    root.right = TreeNode(3)
+    root.left.left = TreeNode(4)
+    root.left.right = TreeNode(5)
+
+    compact = ArrayTree.from_treenode(root)
+    print(f"{compact}")
+    print(f"values: {compact.values.tolist()}")
+    print(f"left:   {compact.left.tolist()}")
+    print(f"right:  {compact.right.tolist()}")
+    print(f"inorder: {list(compact.iter_inorder())}")
+
+    balanced = ArrayTree.from_sorted(range(10))
+    print(f"\nBalanced from sorted, level order: {list(balanced.iter_level_order())}")
+    back = balanced.to_treenode(SlotTreeNode)
+    print(f"Root of the SlotTreeNode copy: {back.value}")
+
+
+if __name__ == "__main__":
+    demonstrate_compact_tree()
+    print()
+    benchmark_memory()
@@ -0,0 +1,313 @@
+"""
+concurrent_shelter.py: Sharing a Shelter between threads and coroutines
+
+Shelter.animals is a bare list. If one thread removes an animal while another
+runs list_animals, the reader can skip animals or see a half-finished
+change, so the usual fix is one global lock around every access. This module
+covers:
+1. ConcurrentShelter: copy-on-write snapshots. Every write builds a new
+   immutable tuple and publishes it with a single attribute assignment, so
+   readers never take a lock and never block writers
+2. An asyncio API: await shelter.add(...), await shelter.remove(...) and
+   async for animal in shelter.stream()
+3. A contention benchmark against a Shelter guarded by one lock, with
+   threads and with coroutines
+
+Copy-on-write makes a write O(n), so it suits read-mostly workloads; use
+add_many/remove_many to pay the copy once for a whole batch.
+"""
+
+import asyncio
+import threading
+import time
+
+from pythonic_classes import Cat, Dog, Shelter
+
+
+# Changes: functions from the old snapshot to the new one.
+
+def _appending(new):
+    """Return a change that appends the tuple new."""
+    return lambda animals: animals + new
+
+
+def _removing(animal):
+    """Return a change that removes animal (ValueError if it is missing)."""
+    def change(animals):
+        index = animals.index(animal)
+        return animals[:index] + animals[index + 1:]
+
+    return change
+
+
+class ConcurrentShelter(Shelter):
+    """
+    A Shelter that is safe to use from many threads and coroutines.
+
+    Writers are serialized by a lock; readers only load the current
+    snapshot (one attribute read) and work on that.
+    """
+
+    def __init__(self, animals=()):
+        """
+        Initialize the shelter.
+
+        Args:
+            animals (iterable, optional): The animals to start with.
+        """
+        self._write_lock = threading.Lock()
+        self._snapshot = tuple(animals)
+        self.version = 0  # incremented on every published change
+
+    @property
+    def animals(self):
+        """A list copy of the current snapshot."""
+        return list(self._snapshot)
+
+    @animals.setter
+    def animals(self, animals):
+        self._publish(lambda _: tuple(animals))
+
+    def snapshot(self):
+        """
+        Return the current animals as an immutable tuple.
+
+        The tuple never changes, so it can be iterated at leisure while
+        other threads keep adding and removing animals.
+        """
+        return self._snapshot
+
+    def __len__(self):
+        """Return the number of animals in the current snapshot."""
+        return len(self._snapshot)
+
+    def __iter__(self):
+        """Iterate over a snapshot taken when iteration starts."""
+        return iter(self._snapshot)
+
+    def _publish(self, change):
+        """Apply change(old snapshot) -> new snapshot under the write lock."""
+        with self._write_lock:
+            self._publish_locked(change)
+
+    def _publish_locked(self, change):
+        """Apply a change; the caller must hold the write lock."""
+        self._snapshot = change(self._snapshot)
+        self.version += 1
+
+    def add_animal(self, animal):
+        """
+        Add an animal to the shelter.
+
+        Args:
+            animal (Animal): The animal to add.
+        """
+        self._publish(_appending((animal,)))
+
+    def add_many(self, animals):
+        """
+        Add several animals with a single copy.
+
+        Args:
+            animals (iterable): The animals to add.
+        """
+        self._publish(_appending(tuple(animals)))
+
+    def remove_animal(self, animal):
+        """
+        Remove an animal from the shelter.
+
+        Args:
+            animal (Animal): The animal to remove.
+
+        Raises:
+            ValueError: If the animal is not in the shelter.
+        """
+        self._publish(_removing(animal))
+
+    def remove_many(self, animals):
+        """
+        Remove several animals with a single copy.
+
+        Animals that are not in the shelter are ignored.
+
+        Args:
+            animals (iterable): The animals to remove.
+        """
+        doomed = {id(animal) for animal in animals}
+        self._publish(lambda animals: tuple(a for a in animals if id(a) not in doomed))
+
+    def list_animals(self):
+        """List all animals in the shelter."""
+        return [str(animal) for animal in self._snapshot]
+
+    # asyncio API ------------------------------------------------------------
+
+    async def _write(self, change):
+        # Writes are short, so normally the lock is free and the change is
+        # made right away, while holding the lock taken here. If a thread
+        # holds it, wait in a worker thread instead of blocking the event loop.
+        if self._write_lock.acquire(blocking=False):
+            try:
+                self._publish_locked(change)
+            finally:
+                self._write_lock.release()
+        else:
+            await asyncio.to_thread(self._publish, change)
+
+    async def add(self, animal):
+        """Add an animal from a coroutine."""
+        await self._write(_appending((animal,)))
+
+    async def add_all(self, animals):
+        """Add several animals from a coroutine with a single copy."""
+        await self._write(_appending(tuple(animals)))
+
+    async def remove(self, animal):
+        """
+        Remove an animal from a coroutine.
+
+        Raises:
+            ValueError: If the animal is not in the shelter.
+        """
+        await self._write(_removing(animal))
+
+    async def stream(self, batch_size=1000):
+        """
+        Asynchronously iterate over a snapshot of the animals.
+
+        Control goes back to the event loop every batch_size animals, so a
+        long iteration does not starve other coroutines.
+
+        Args:
+            batch_size (int): How many animals to yield between pauses.
+
+        Yields:
+            Animal: The animals of the snapshot taken when streaming starts.
+        """
+        animals = self._snapshot
+        for start in range(0, len(animals), batch_size):
+            for animal in animals[start:start + batch_size]:
+                yield animal
+            await asyncio.sleep(0)
+
+
+class LockedShelter(Shelter):
+    """The baseline: a Shelter where every read and write takes one lock."""
+
+    def __init__(self):
+        """Initialize an empty shelter and its lock."""
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def add_animal(self, animal):
+        """Add an animal while holding the lock."""
+        with self._lock:
+            super().add_animal(animal)
+
+    def remove_animal(self, animal):
+        """Remove an animal while holding the lock."""
+        with self._lock:
+            super().remove_animal(animal)
+
+    def list_animals(self):
+        """List all animals while holding the lock."""
+        with self._lock:
+            return super().list_animals()
+
+
+def _thread_contention(shelter, readers, duration):
+    """Run readers and one writer for duration seconds; return the operation counts."""
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+
+    def read(slot):
+        while not stop.is_set():
+            shelter.list_animals()
+            reads[slot] += 1
+
+    def write():
+        while not stop.is_set():
+            cat = Cat("Temp", 1)
+            shelter.add_animal(cat)
+            shelter.remove_animal(cat)
+            writes[0] += 1
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads), writes[0]
+
+
+async def _coroutine_contention(shelter, writers, streamers, operations):
+    """Run writer and streaming coroutines; return the elapsed time."""
+    async def write(index):
+        for i in range(operations):
+            cat = Cat(f"cat-{index}-{i}", i % 20)
+            await shelter.add(cat)
+            await shelter.remove(cat)
+
+    async def read():
+        for _ in range(operations // 100):
+            async for _ in shelter.stream(batch_size=100):
+                pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(write(i) for i in range(writers)),
+                         *(read() for _ in range(streamers)))
+    return time.perf_counter() - start
+
+
+def benchmark_contention(size=1000, duration=1.0):
+    """Compare a single lock with copy-on-write snapshots under contention."""
+    animals = [Dog(f"dog-{i}", i % 15, "Beagle") for i in range(size)]
+    print(f"Threads, {size:,} animals, 1 writer, {duration:.0f} s per run")
+    print(f"  {'shelter':<18} {'readers':>7} {'reads/s':>10} {'writes/s':>10}")
+    for readers in (1, 4, 8):
+        for label, factory in (("single lock", LockedShelter),
+                               ("copy-on-write", ConcurrentShelter)):
+            shelter = factory()
+            for animal in animals:
+                shelter.add_animal(animal)
+            reads, writes = _thread_contention(shelter, readers, duration)
+            print(f"  {label:<18} {readers:>7} {reads / duration:10,.0f} "
+                  f"{writes / duration:10,.0f}")
+
+    shelter = ConcurrentShelter(animals)
+    operations = 2000
+    for writers, streamers in ((10, 0), (10, 10), (100, 10)):
+        elapsed = asyncio.run(_coroutine_contention(shelter, writers, streamers, operations))
+        print(f"Coroutines: {writers} writers x {operations} add+remove, "
+              f"{streamers} streamers: {writers * operations / elapsed:,.0f} add+remove/s")
+
+
+def demonstrate_concurrent_shelter():
+    """Show snapshots staying stable and the asyncio API."""
+    shelter = ConcurrentShelter()
+    buddy = Dog("Buddy", 5, "Golden Retriever")
+    shelter.add_many([buddy, Cat("Whiskers", 8)])
+
+    snapshot = shelter.snapshot()
+    shelter.remove_animal(buddy)
+    print(f"Old snapshot still has {len(snapshot)} animals; the shelter has {len(shelter)}")
+
+    async def main():
+        await shelter.add(Dog("Rex", 2, "Beagle"))
+        await shelter.add_all([Cat("Tom", 3), Cat("Felix", 4)])
+        names = [animal.name async for animal in shelter.stream(batch_size=2)]
+        print(f"Streamed: {names}")
+
+    asyncio.run(main())
+    print(f"list_animals(): {shelter.list_animals()} (version {shelter.version})")
+
+
+if __name__ == "__main__":
+    demonstrate_concurrent_shelter()
+    print()
+    benchmark_contention()
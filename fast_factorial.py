@@ -0,0 +1,230 @@
+"""
+fast_factorial.py: A fast big-integer factorial engine
+
+The recursive versions in recursivity.py multiply one term per Python call,
+so they hit the recursion limit just under n=1000 and slow down badly on
+large numbers. This module covers:
+1. Binary-splitting product trees (balanced multiplication of big integers)
+2. The "split recursive" factorial (odd products plus a final shift)
+3. A checkpoint cache so nearby values of n are cheap to compute
+4. A benchmark against the recursive implementations
+
+The recursion used here only goes log2(n) levels deep, so n in the millions
+is no problem for the interpreter stack.
+"""
+
+import bisect
+import math
+import sys
+import timeit
+
+from recursivity import factorial, factorial_tail
+
+# Below this many factors a plain loop beats further splitting.
+_SPLIT_THRESHOLD = 16
+
+
+def range_product(low, high, step=1):
+    """
+    Multiply together low, low + step, ..., up to but not including high.
+
+    The range is split in half and the two halves are multiplied together,
+    so the big multiplications always happen between numbers of similar size.
+
+    Args:
+        low (int): The first factor.
+        high (int): The end of the range (exclusive).
+        step (int): The distance between factors (default is 1).
+
+    Returns:
+        int: The product of the range, or 1 if the range is empty.
+    """
+    count = len(range(low, high, step))
+    if count <= 0:
+        return 1
+    if count <= _SPLIT_THRESHOLD:
+        result = 1
+        for factor in range(low, high, step):
+            result *= factor
+        return result
+    middle = low + (count // 2) * step
+    return range_product(low, middle, step) * range_product(middle, high, step)
+
+
+def _odd_product(low, high):
+    """Multiply the odd numbers in the half-open interval (low, high]."""
+    first = low + 1 if low % 2 == 0 else low + 2
+    return range_product(first, high + 1, 2)
+
+
+def fast_factorial(n):
+    """
+    Calculate n! with the split recursive algorithm.
+
+    The odd part of n! is the product of OddProduct(n >> i) for every i,
+    where OddProduct(m) is the product of the odd numbers up to m. Those
+    products share most of their factors, so each one is built from the
+    previous one. The power of two is added at the end with one shift.
+
+    Args:
+        n (int): The number to calculate the factorial of.
+
+    Returns:
+        int: The factorial of n.
+
+    Raises:
+        ValueError: If n is negative.
+    """
+    if n < 0:
+        raise ValueError("Factorial is not defined for negative numbers")
+    if n < 2:
+        return 1
+
+    odd_part = 1
+    running = 1  # product of the odd numbers up to `previous`
+    previous = 1
+    for shift in range(n.bit_length() - 1, -1, -1):
+        current = n >> shift
+        running *= _odd_product(previous, current)
+        previous = current
+        odd_part *= running
+
+    # The exponent of 2 in n! is n minus the number of one bits in n.
+    return odd_part << (n - bin(n).count("1"))
+
+
+class FactorialCache:
+    """
+    A factorial engine that remembers previously computed results.
+
+    Every computed value is kept as a checkpoint. A later request for n
+    starts from the largest checkpoint k <= n and only multiplies the
+    range (k, n], which is cheap when n is close to k.
+    """
+
+    def __init__(self, max_checkpoints=64):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_checkpoints (int): How many results to keep. When the cache is
+                full the checkpoint closest to another one is dropped.
+        """
+        self.max_checkpoints = max_checkpoints
+        self._keys = [0]
+        self._values = {0: 1}
+
+    def __len__(self):
+        """Return the number of stored checkpoints."""
+        return len(self._keys)
+
+    def __contains__(self, n):
+        """Check whether n! is stored as a checkpoint."""
+        return n in self._values
+
+    def factorial(self, n):
+        """
+        Calculate n!, reusing the nearest smaller checkpoint.
+
+        Args:
+            n (int): The number to calculate the factorial of.
+
+        Returns:
+            int: The factorial of n.
+        """
+        if n < 0:
+            raise ValueError("Factorial is not defined for negative numbers")
+        if n in self._values:
+            return self._values[n]
+
+        base = self._keys[bisect.bisect_right(self._keys, n) - 1]
+        # Starting from scratch is faster when the gap is most of the range.
+        if n - base > n // 2:
+            result = fast_factorial(n)
+        else:
+            result = self._values[base] * range_product(base + 1, n + 1)
+        self._store(n, result)
+        return result
+
+    __call__ = factorial
+
+    def clear(self):
+        """Drop every checkpoint except 0! = 1."""
+        self._keys = [0]
+        self._values = {0: 1}
+
+    def _store(self, n, value):
+        """Save a checkpoint, evicting one if the cache is full."""
+        if self.max_checkpoints <= 1:
+            return
+        bisect.insort(self._keys, n)
+        self._values[n] = value
+        if len(self._keys) > self.max_checkpoints:
+            # The checkpoint with the smallest gap to its predecessor adds
+            # the least coverage, so it is the one to drop.
+            gaps = [(self._keys[i] - self._keys[i - 1], i)
+                    for i in range(1, len(self._keys))]
+            _, index = min(gaps)
+            del self._values[self._keys.pop(index)]
+
+
+def _best_time(statement, number=1, repeat=3):
+    """Return the best time in seconds for one run of a statement."""
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number
+
+
+def benchmark_factorial():
+    """Compare the factorial implementations at several sizes."""
+    print("Small n (the recursive versions still fit on the stack):")
+    n = min(900, sys.getrecursionlimit() - 50)
+    implementations = [
+        ("factorial (recursive)", lambda: factorial(n)),
+        ("factorial_tail", lambda: factorial_tail(n)),
+        ("fast_factorial", lambda: fast_factorial(n)),
+        ("math.factorial", lambda: math.factorial(n)),
+    ]
+    for label, func in implementations:
+        print(f"  n={n:<8} {label:<24} {_best_time(func, number=50) * 1e6:10.1f} us")
+
+    print("\nLarge n (the recursive versions raise RecursionError):")
+    for n in (10_000, 100_000, 1_000_000):
+        for label, func in [("fast_factorial", lambda: fast_factorial(n)),
+                            ("math.factorial", lambda: math.factorial(n))]:
+            print(f"  n={n:<8} {label:<24} {_best_time(func, repeat=1) * 1e3:10.1f} ms")
+
+    print("\nCheckpoint cache (a sweep over neighbouring values of n):")
+    sweep = range(100_001, 100_051)
+    cold = _best_time(lambda: [fast_factorial(n) for n in sweep], repeat=1)
+    cache = FactorialCache()
+    cache(100_000)
+    warm = _best_time(lambda: [cache(n) for n in sweep], repeat=1)
+    print(f"  fast_factorial per call:  {cold / len(sweep) * 1e3:10.3f} ms")
+    print(f"  FactorialCache per call:  {warm / len(sweep) * 1e3:10.3f} ms")
+
+
+def demonstrate_fast_factorial():
+    """Show that the fast engine agrees with the recursive definitions."""
+    print("1. Binary-splitting product of 1..10:")
+    print(f"range_product(1, 11) = {range_product(1, 11)}")
+
+    print("\n2. Split recursive factorial:")
+    for n in (0, 1, 5, 20):
+        print(f"fast_factorial({n}) = {fast_factorial(n)} "
+              f"(recursive: {factorial(n)})")
+
+    print("\n3. Far beyond the recursion limit:")
+    bits = fast_factorial(5000).bit_length()
+    print(f"5000! is {bits} bits long, equal to math.factorial: "
+          f"{fast_factorial(5000) == math.factorial(5000)}")
+
+    print("\n4. Checkpoint cache:")
+    cache = FactorialCache()
+    cache(1000)
+    print(f"1001! reuses 1000!: {cache(1001) == math.factorial(1001)}")
+    print(f"Checkpoints stored: {len(cache)}")
+
+
+if __name__ == "__main__":
+    demonstrate_fast_factorial()
+    print()
+    benchmark_factorial()
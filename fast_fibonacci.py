@@ -0,0 +1,277 @@
+"""
+fast_fibonacci.py: Logarithmic-time Fibonacci numbers
+
+recursivity.fibonacci recomputes the same subproblems over and over, so its
+running time grows exponentially with n. This module covers:
+1. Fast doubling (exact big integers and modulo m)
+2. Matrix exponentiation (the classic alternative)
+3. A batch API that shares doubling steps between many (n, m) queries
+4. A NumPy path that answers a whole array of n values modulo m at once
+
+The fast doubling identities used throughout are:
+    F(2k)     = F(k) * (2 * F(k + 1) - F(k))
+    F(2k + 1) = F(k) ** 2 + F(k + 1) ** 2
+
+recursivity.fibonacci stays the reference implementation for small n.
+"""
+
+import random
+import timeit
+from collections import defaultdict
+
+from recursivity import fibonacci
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only fibonacci_mod_array needs it
+    np = None
+
+
+def _fib_pair(n, modulus=None):
+    """
+    Return the pair (F(n), F(n + 1)) using fast doubling.
+
+    The bits of n are read from the most significant one down, so the loop
+    runs n.bit_length() times and uses no recursion.
+    """
+    a, b = 0, 1  # F(0), F(1)
+    for bit in range(n.bit_length() - 1, -1, -1):
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if modulus is not None:
+            c %= modulus
+            d %= modulus
+        if (n >> bit) & 1:
+            a, b = d, c + d
+            if modulus is not None:
+                b %= modulus
+        else:
+            a, b = c, d
+    return a, b
+
+
+def fibonacci_fast(n):
+    """
+    Calculate the nth Fibonacci number exactly with fast doubling.
+
+    Args:
+        n (int): The position in the Fibonacci sequence.
+
+    Returns:
+        int: The nth Fibonacci number.
+
+    Raises:
+        ValueError: If n is negative.
+    """
+    if n < 0:
+        raise ValueError("n must be a non-negative integer")
+    return _fib_pair(n)[0]
+
+
+def fibonacci_mod(n, modulus):
+    """
+    Calculate the nth Fibonacci number modulo m with fast doubling.
+
+    Every intermediate value is reduced, so the numbers stay below
+    modulus ** 2 no matter how large n is.
+
+    Args:
+        n (int): The position in the Fibonacci sequence.
+        modulus (int): The modulus m (at least 1).
+
+    Returns:
+        int: F(n) mod m.
+    """
+    if n < 0:
+        raise ValueError("n must be a non-negative integer")
+    if modulus < 1:
+        raise ValueError("modulus must be a positive integer")
+    return _fib_pair(n, modulus)[0] % modulus
+
+
+def fibonacci_matrix(n, modulus=None):
+    """
+    Calculate the nth Fibonacci number by raising [[1, 1], [1, 0]] to the nth power.
+
+    Args:
+        n (int): The position in the Fibonacci sequence.
+        modulus (int, optional): Reduce every entry modulo this value.
+
+    Returns:
+        int: The nth Fibonacci number (mod m if a modulus is given).
+    """
+    if n < 0:
+        raise ValueError("n must be a non-negative integer")
+
+    def multiply(x, y):
+        result = (x[0] * y[0] + x[1] * y[2], x[0] * y[1] + x[1] * y[3],
+                  x[2] * y[0] + x[3] * y[2], x[2] * y[1] + x[3] * y[3])
+        if modulus is not None:
+            result = tuple(value % modulus for value in result)
+        return result
+
+    # Matrices are stored row by row as (top-left, top-right, bottom-left, bottom-right).
+    result = (1, 0, 0, 1)
+    base = (1, 1, 1, 0)
+    while n:
+        if n & 1:
+            result = multiply(result, base)
+        base = multiply(base, base)
+        n >>= 1
+    return result[1] if modulus is None else result[1] % modulus
+
+
+def fibonacci_batch(queries):
+    """
+    Answer many (n, m) queries in one call.
+
+    Queries are grouped by modulus and sorted by n. The doubling steps for n
+    depend only on the leading bits of n, and neighbours in sorted order share
+    their longest common prefix, so each query only redoes the steps after the
+    point where it differs from the previous one. Use None as the modulus for
+    exact big-integer results.
+
+    Args:
+        queries (iterable): Pairs of (n, m).
+
+    Returns:
+        list: F(n) mod m for each query, in the order given.
+    """
+    queries = list(queries)
+    groups = defaultdict(list)
+    for index, (n, modulus) in enumerate(queries):
+        if n < 0:
+            raise ValueError("n must be a non-negative integer")
+        if modulus is not None and modulus < 1:
+            raise ValueError("modulus must be a positive integer")
+        groups[modulus].append(index)
+
+    results = [0] * len(queries)
+    for modulus, indices in groups.items():
+        indices.sort(key=lambda i: queries[i][0])
+        width = queries[indices[-1]][0].bit_length()
+        # states[i] holds (F(p), F(p + 1)) for p = the top i bits of n.
+        # Leading zero bits are harmless because doubling (0, 1) gives (0, 1).
+        states = [(0, 1)] * (width + 1)
+        previous = None
+        for index in indices:
+            n = queries[index][0]
+            if previous is None:
+                shared = 0
+            else:
+                shared = width - (previous ^ n).bit_length()
+            a, b = states[shared]
+            for depth in range(shared + 1, width + 1):
+                c = a * (2 * b - a)
+                d = a * a + b * b
+                if (n >> (width - depth)) & 1:
+                    a, b = d, c + d
+                else:
+                    a, b = c, d
+                if modulus is not None:
+                    a %= modulus
+                    b %= modulus
+                states[depth] = (a, b)
+            previous = n
+            results[index] = a if modulus is None else a % modulus
+    return results
+
+
+def fibonacci_mod_array(ns, modulus):
+    """
+    Calculate F(n) mod m for a whole array of n values with NumPy.
+
+    All values are doubled together, one bit position at a time, using
+    fixed-width 64-bit integers. The modulus must be below 2 ** 31 so that
+    products of two residues cannot overflow.
+
+    Args:
+        ns (array-like): Non-negative positions in the Fibonacci sequence.
+        modulus (int): The modulus m, with 1 <= m < 2 ** 31.
+
+    Returns:
+        numpy.ndarray: An int64 array with F(n) mod m for each n.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+    """
+    if np is None:
+        raise ImportError("fibonacci_mod_array requires NumPy")
+    if not 1 <= modulus < 2 ** 31:
+        raise ValueError("modulus must be between 1 and 2 ** 31 - 1")
+    ns = np.asarray(ns, dtype=np.int64)
+    if ns.size and ns.min() < 0:
+        raise ValueError("n must be a non-negative integer")
+
+    a = np.zeros(ns.shape, dtype=np.int64)
+    b = np.ones(ns.shape, dtype=np.int64)
+    top_bit = int(ns.max()).bit_length() if ns.size else 0
+    for bit in range(top_bit - 1, -1, -1):
+        c = a * ((2 * b - a) % modulus) % modulus
+        d = (a * a + b * b) % modulus
+        odd = ((ns >> bit) & 1).astype(bool)
+        a = np.where(odd, d, c)
+        b = np.where(odd, (c + d) % modulus, d)
+    return a % modulus
+
+
+def benchmark_fibonacci():
+    """Compare the Fibonacci implementations."""
+    print("Single values:")
+    cases = [
+        ("fibonacci (recursive)", 25, lambda n: fibonacci(n)),
+        ("fibonacci_fast", 25, fibonacci_fast),
+        ("fibonacci_fast", 1_000_000, fibonacci_fast),
+        ("fibonacci_matrix", 1_000_000, fibonacci_matrix),
+        ("fibonacci_mod", 10 ** 18, lambda n: fibonacci_mod(n, 10 ** 9 + 7)),
+    ]
+    for label, n, func in cases:
+        elapsed = min(timeit.repeat(lambda: func(n), number=1, repeat=3))
+        print(f"  {label:<24} n={n:<20} {elapsed * 1e3:10.3f} ms")
+
+    rng = random.Random(42)
+    modulus = 10 ** 9 + 7
+    workloads = [
+        ("random", [rng.randrange(10 ** 12) for _ in range(10_000)]),
+        ("clustered", [10 ** 12 + rng.randrange(10 ** 6) for _ in range(10_000)]),
+    ]
+    for workload, ns in workloads:
+        print(f"\n10,000 {workload} queries modulo 10**9 + 7:")
+        timings = [
+            ("fibonacci_mod loop", lambda: [fibonacci_mod(n, modulus) for n in ns]),
+            ("fibonacci_batch", lambda: fibonacci_batch((n, modulus) for n in ns)),
+        ]
+        if np is not None:
+            array = np.array(ns, dtype=np.int64)
+            timings.append(("fibonacci_mod_array",
+                            lambda: fibonacci_mod_array(array, modulus)))
+        for label, func in timings:
+            elapsed = min(timeit.repeat(func, number=1, repeat=3))
+            print(f"  {label:<24} {elapsed * 1e3:10.1f} ms")
+
+
+def demonstrate_fast_fibonacci():
+    """Show that the fast implementations agree with the recursive reference."""
+    print("1. Fast doubling against the recursive reference:")
+    same = all(fibonacci_fast(n) == fibonacci(n) for n in range(20))
+    print(f"F(0)..F(19) match: {same}")
+    print(f"F(100) = {fibonacci_fast(100)}")
+
+    print("\n2. Matrix exponentiation:")
+    print(f"F(100) = {fibonacci_matrix(100)}")
+
+    print("\n3. Modular results for huge n:")
+    print(f"F(10**18) mod 1_000_000_007 = {fibonacci_mod(10 ** 18, 1_000_000_007)}")
+
+    print("\n4. Batched queries:")
+    print(fibonacci_batch([(10, None), (10, 7), (1000, 1_000_000_007), (1001, 1_000_000_007)]))
+
+    if np is not None:
+        print("\n5. NumPy vectorized queries:")
+        print(fibonacci_mod_array([10, 20, 30, 40], 1000))
+
+
+if __name__ == "__main__":
+    demonstrate_fast_fibonacci()
+    print()
+    benchmark_fibonacci()
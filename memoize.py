@@ -0,0 +1,358 @@
+"""
+memoize.py: A bounded, observable memoization layer
+
+recursivity.fibonacci shows how much work a recursive function can repeat,
+and functools.lru_cache fixes that but offers no per-entry expiry, no
+statistics beyond hits and misses, and nothing that survives a restart.
+This module covers:
+1. memoize: a caching decorator with LRU or FIFO eviction, bounded by
+   entry count and/or approximate memory use
+2. Per-entry time-to-live (TTL) expiry
+3. Hit, miss, eviction and expiry counters
+4. An optional thread-safe mode
+5. An optional on-disk store (shelve) so results survive restarts
+6. Cached versions of the course's pure functions and a benchmark
+"""
+
+import functools
+import os
+import shelve
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from collections import OrderedDict, namedtuple
+from contextlib import nullcontext
+
+from fast_factorial import fast_factorial
+from functions_and_modules import calculate_rectangle_area, greet
+from recursivity import factorial, fibonacci
+from trampoline import rebind_self
+
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "expirations", "size", "bytes"])
+
+POLICIES = ("lru", "fifo")
+
+
+class _KwargsMark:
+    """
+    Separates positional from keyword arguments in a cache key.
+
+    The disk store keys on repr(key), so the marker needs a repr that is the
+    same in every process (object() would show its memory address).
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<kwargs>"
+
+
+_KWARGS_MARK = _KwargsMark()
+MISSING = object()  # returned by MemoCache.lookup on a miss
+
+
+def _make_key(args, kwargs):
+    """Build a hashable key from call arguments."""
+    if not kwargs:
+        return args
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+
+class MemoCache:
+    """
+    The storage behind a memoized function.
+
+    Entries live in an OrderedDict. With the "lru" policy a hit moves the
+    entry to the end, so the front always holds the least recently used
+    entry; with "fifo" hits leave the order alone. Evictions always take
+    the front entry.
+    """
+
+    def __init__(self, maxsize=128, maxbytes=None, ttl=None, policy="lru",
+                 thread_safe=False, store_path=None, sizeof=sys.getsizeof):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int, optional): The most entries to keep (None for no limit).
+            maxbytes (int, optional): The most value bytes to keep, measured
+                with sizeof (None for no limit).
+            ttl (float or callable, optional): Seconds before an entry expires,
+                or a function taking the result and returning the seconds.
+            policy (str): "lru" or "fifo".
+            thread_safe (bool): Guard every cache operation with a lock.
+            store_path (str, optional): A shelve file to read from on a miss
+                and write every new result to.
+            sizeof (callable): Estimates the size of a value in bytes.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.policy = policy
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, expires_at, nbytes)
+        self._bytes = 0
+        self._hits = self._misses = self._evictions = self._expirations = 0
+        self._lock = threading.RLock() if thread_safe else None
+        self._store = shelve.open(store_path) if store_path else None
+
+    def lookup(self, key):
+        """
+        Return the cached value for key, or MISSING on a miss.
+
+        Args:
+            key: The cache key.
+        """
+        # Entering even a dummy context manager would double the cost of a
+        # hit, so the lock is only touched in thread-safe mode.
+        if self._lock is None:
+            return self._lookup(key)
+        with self._lock:
+            return self._lookup(key)
+
+    def _lookup(self, key):
+        """Look up key without locking (see lookup)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at, _ = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._hits += 1
+                if self.policy == "lru":
+                    self._entries.move_to_end(key)
+                return value
+            self._expirations += 1
+            self._discard(key)
+        if self._store is not None:
+            value = self._load(key)
+            if value is not MISSING:
+                self._hits += 1
+                self._insert(key, value)
+                return value
+        self._misses += 1
+        return MISSING
+
+    def _guard(self):
+        """Return the lock, or a do-nothing context manager without one."""
+        return self._lock if self._lock is not None else nullcontext()
+
+    def store(self, key, value):
+        """
+        Save a freshly computed value.
+
+        Args:
+            key: The cache key.
+            value: The result to remember.
+        """
+        with self._guard():
+            self._insert(key, value)
+            if self._store is not None:
+                self._store[repr(key)] = (value, self._expiry(value, wall_clock=True))
+
+    def _expiry(self, value, wall_clock=False):
+        """Return when an entry for value expires, or None if it never does."""
+        if self.ttl is None:
+            return None
+        seconds = self.ttl(value) if callable(self.ttl) else self.ttl
+        # The disk store needs wall-clock time because it outlives the process.
+        return (time.time() if wall_clock else time.monotonic()) + seconds
+
+    def _load(self, key):
+        """Read an entry from the disk store, dropping it if it has expired."""
+        try:
+            value, expires_at = self._store[repr(key)]
+        except KeyError:
+            return MISSING
+        if expires_at is not None and expires_at <= time.time():
+            self._expirations += 1
+            del self._store[repr(key)]
+            return MISSING
+        return value
+
+    def _insert(self, key, value):
+        if key in self._entries:
+            self._discard(key)
+        nbytes = self.sizeof(value) if self.maxbytes is not None else 0
+        if self.maxbytes is not None and nbytes > self.maxbytes:
+            return  # would evict everything and still not fit
+        self._entries[key] = (value, self._expiry(value), nbytes)
+        self._bytes += nbytes
+        while ((self.maxsize is not None and len(self._entries) > self.maxsize)
+               or (self.maxbytes is not None and self._bytes > self.maxbytes)):
+            _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+            self._bytes -= evicted_bytes
+            self._evictions += 1
+
+    def _discard(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    def info(self):
+        """Return a CacheInfo snapshot of the counters."""
+        with self._guard():
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self._expirations, len(self._entries), self._bytes)
+
+    def hit_rate(self):
+        """Return the fraction of lookups that were hits (0.0 if none yet)."""
+        info = self.info()
+        total = info.hits + info.misses
+        return info.hits / total if total else 0.0
+
+    def clear(self, disk=False):
+        """
+        Drop every in-memory entry and reset the counters.
+
+        Args:
+            disk (bool): Also empty the disk store.
+        """
+        with self._guard():
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = self._expirations = 0
+            if disk and self._store is not None:
+                self._store.clear()
+
+    def close(self):
+        """Flush and close the disk store, if there is one."""
+        with self._guard():
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+
+def memoize(func=None, *, maxsize=128, maxbytes=None, ttl=None, policy="lru",
+            thread_safe=False, store_path=None):
+    """
+    Cache the results of a pure function.
+
+    Can be used as @memoize or @memoize(maxsize=..., ...). When applied to a
+    recursive function defined elsewhere (such as recursivity.fibonacci), the
+    recursive calls are routed through the cache too.
+
+    The wrapper has cache_info(), cache_clear(), hit_rate() and cache_close()
+    methods, and the MemoCache itself as the cache attribute.
+
+    Args:
+        func (callable): The function to cache.
+        maxsize, maxbytes, ttl, policy, thread_safe, store_path:
+            See MemoCache.
+
+    Returns:
+        callable: The caching wrapper.
+    """
+    if func is None:
+        return functools.partial(memoize, maxsize=maxsize, maxbytes=maxbytes, ttl=ttl,
+                                 policy=policy, thread_safe=thread_safe,
+                                 store_path=store_path)
+
+    cache = MemoCache(maxsize, maxbytes, ttl, policy, thread_safe, store_path)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = _make_key(args, kwargs)
+        value = cache.lookup(key)
+        if value is not MISSING:
+            return value
+        # The lock is not held here, so recursive calls cannot deadlock.
+        value = body(*args, **kwargs)
+        cache.store(key, value)
+        return value
+
+    body = rebind_self(func, wrapper)
+    wrapper.cache = cache
+    wrapper.cache_info = cache.info
+    wrapper.cache_clear = cache.clear
+    wrapper.cache_close = cache.close
+    wrapper.hit_rate = cache.hit_rate
+    return wrapper
+
+
+# Cached versions of the pure functions from the course modules.
+cached_fibonacci = memoize(fibonacci, maxsize=None)
+cached_factorial = memoize(factorial, maxsize=None)
+cached_fast_factorial = memoize(fast_factorial, maxsize=64, maxbytes=64 * 2 ** 20)
+cached_rectangle_area = memoize(calculate_rectangle_area, maxsize=1024)
+cached_greet = memoize(greet, maxsize=1024)
+
+
+def benchmark_memoize():
+    """Compare the memoization layer with no cache and functools.lru_cache."""
+    def best(func, number):
+        return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+    print("fibonacci(25), cold cache each time:")
+    # lru_cache only wraps the outer call; the recursion inside still uses
+    # the uncached global fibonacci.
+    lru_fibonacci = functools.lru_cache(maxsize=None)(fibonacci)
+    cases = [
+        ("no cache", lambda: fibonacci(25)),
+        ("functools.lru_cache", lambda: (lru_fibonacci.cache_clear(), lru_fibonacci(25))),
+        ("memoize", lambda: (cached_fibonacci.cache_clear(), cached_fibonacci(25))),
+    ]
+    for label, func in cases:
+        print(f"  {label:<28} {best(func, 3) * 1e3:10.3f} ms")
+
+    print("\nCost of one cache hit:")
+    functools_greet = functools.lru_cache(maxsize=1024)(greet)
+    functools_greet("Alice")
+    cached_greet("Alice")
+    safe_greet = memoize(greet, thread_safe=True)
+    safe_greet("Alice")
+    for label, func in [("functools.lru_cache", lambda: functools_greet("Alice")),
+                        ("memoize", lambda: cached_greet("Alice")),
+                        ("memoize(thread_safe=True)", lambda: safe_greet("Alice")),
+                        ("uncached greet", lambda: greet("Alice"))]:
+        print(f"  {label:<28} {best(func, 100_000) * 1e9:10.1f} ns")
+
+    print("\nDisk store, 200 factorials of ~20,000:")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "factorials")
+        values = range(20_000, 20_200)
+        first = memoize(fast_factorial, store_path=path)
+        start = time.perf_counter()
+        for n in values:
+            first(n)
+        cold = time.perf_counter() - start
+        first.cache_close()
+
+        restarted = memoize(fast_factorial, store_path=path)  # a new process would do this
+        start = time.perf_counter()
+        for n in values:
+            restarted(n)
+        warm = time.perf_counter() - start
+        print(f"  first run (computed)       {cold * 1e3:10.1f} ms")
+        print(f"  after restart (from disk)  {warm * 1e3:10.1f} ms  {restarted.cache_info()}")
+        restarted.cache_close()
+
+
+def demonstrate_memoize():
+    """Show the counters, eviction and expiry in action."""
+    print("1. Recursive calls go through the cache:")
+    cached_fibonacci.cache_clear()
+    print(f"fibonacci(80) = {cached_fibonacci(80)}")
+    print(cached_fibonacci.cache_info())
+    print(f"Hit rate: {cached_fibonacci.hit_rate():.0%}")
+
+    print("\n2. LRU eviction with maxsize=2:")
+    area = memoize(calculate_rectangle_area, maxsize=2)
+    for sides in [(1, 2), (3, 4), (1, 2), (5, 6), (3, 4)]:
+        area(*sides)
+    print(area.cache_info())
+
+    print("\n3. Per-entry TTL:")
+    short_lived = memoize(greet, ttl=0.05)
+    short_lived("Bob")
+    time.sleep(0.1)
+    short_lived("Bob")
+    print(short_lived.cache_info())
+
+
+if __name__ == "__main__":
+    demonstrate_memoize()
+    print()
+    benchmark_memoize()
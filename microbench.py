@@ -0,0 +1,387 @@
+"""
+microbench.py: Measuring the performance tips instead of asserting them
+
+best_practices.demonstrate_performance_tips says comprehensions beat loops,
+join beats += and generators beat lists, but it never measures anything.
+This module covers:
+1. A registry of benchmark cases: the good/bad pairs from the performance
+   tips, cases from the other course modules, and anything registered with
+   the register decorator
+2. Careful timing: warmup runs, a loop count calibrated to the timer, and
+   repeated samples summarized by median and interquartile range (IQR),
+   which are barely affected by the odd slow sample
+3. Peak memory of one call, measured separately with tracemalloc
+4. JSON results, and a compare mode that flags regressions between two
+   result files beyond a threshold
+
+Usage:
+    python microbench.py run [-k PATTERN] [-o results.json]
+    python microbench.py compare baseline.json results.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from best_practices import number_generator, number_list
+
+CASES = {}
+
+
+class Case:
+    """One benchmark: a function called with no arguments."""
+
+    __slots__ = ("name", "func", "group", "setup")
+
+    def __init__(self, name, func, group=None, setup=None):
+        """
+        Describe a benchmark case.
+
+        Args:
+            name (str): A unique name, such as "tips.squares.comprehension".
+            func (callable): The code to time. If setup is given, func is
+                called with setup's return value.
+            group (str, optional): Cases in the same group are compared with
+                each other in the report (the good and bad variant of a tip).
+            setup (callable, optional): Builds the input once, untimed.
+        """
+        self.name = name
+        self.func = func
+        self.group = group
+        self.setup = setup
+
+    def callable(self):
+        """Return a zero-argument function that runs the case once."""
+        if self.setup is None:
+            return self.func
+        data = self.setup()
+        func = self.func
+        return lambda: func(data)
+
+
+def register(name=None, group=None, setup=None):
+    """
+    Decorator that adds a function to the benchmark registry.
+
+    Example:
+        >>> @register("tips.join", group="tips.join")
+        ... def join_words():
+        ...     return " ".join(WORDS)
+    """
+    def decorator(func):
+        case_name = name or f"{func.__module__}.{func.__qualname__}"
+        if case_name in CASES:
+            raise ValueError(f"Benchmark case {case_name!r} is already registered")
+        CASES[case_name] = Case(case_name, func, group, setup)
+        return func
+
+    return decorator
+
+
+# 1. The performance tips from best_practices.py ----------------------------------
+
+N = 10_000
+WORDS = ["Hello", "world", "!"] * 1000
+
+
+@register("tips.squares.comprehension", group="squares")
+def squares_comprehension():
+    return [x**2 for x in range(N)]
+
+
+@register("tips.squares.loop", group="squares")
+def squares_loop():
+    squares = []
+    for x in range(N):
+        squares.append(x**2)
+    return squares
+
+
+@register("tips.sentence.join", group="sentence")
+def sentence_join():
+    return " ".join(WORDS)
+
+
+@register("tips.sentence.concatenation", group="sentence")
+def sentence_concatenation():
+    sentence = ""
+    for word in WORDS:
+        sentence += word + " "
+    return sentence.strip()
+
+
+@register("tips.sum.generator", group="sum")
+def sum_generator():
+    return sum(number_generator(N * 10))
+
+
+@register("tips.sum.list", group="sum")
+def sum_list():
+    return sum(number_list(N * 10))
+
+
+# 2. Cases from the other course modules -------------------------------------------
+
+_course_cases_loaded = False
+
+
+def load_course_cases():
+    """
+    Register cases from the other course modules.
+
+    The modules are only imported here, so importing microbench stays cheap.
+    """
+    global _course_cases_loaded
+    if _course_cases_loaded:
+        return
+    _course_cases_loaded = True
+
+    import math
+
+    import fast_factorial
+    import fast_fibonacci
+    import memoize
+    import recursivity
+    from best_practices import Circle, Square, calculate_area
+    from shape_engine import ShapeBatch
+    from tree_traversal import build_balanced_tree, iter_inorder
+
+    register("fibonacci.recursive", group="fibonacci(20)")(lambda: recursivity.fibonacci(20))
+    register("fibonacci.memoized_cold", group="fibonacci(20)")(
+        lambda: (memoize.cached_fibonacci.cache_clear(), memoize.cached_fibonacci(20)))
+    register("fibonacci.fast_doubling", group="fibonacci(20)")(
+        lambda: fast_fibonacci.fibonacci_fast(20))
+
+    register("factorial.math", group="factorial(5000)")(lambda: math.factorial(5000))
+    register("factorial.fast", group="factorial(5000)")(
+        lambda: fast_factorial.fast_factorial(5000))
+    register("factorial.loop", group="factorial(5000)")(
+        lambda: fast_factorial.range_product(1, 5001))
+
+    register("traversal.recursive", group="inorder(10k)",
+             setup=lambda: build_balanced_tree(range(10_000)))(recursivity.inorder_traversal)
+    register("traversal.iterative", group="inorder(10k)",
+             setup=lambda: build_balanced_tree(range(10_000)))(
+        lambda root: list(iter_inorder(root)))
+
+    def shapes():
+        return [Circle(i / 100) if i % 2 else Square(i / 100) for i in range(10_000)]
+
+    register("areas.per_object", group="areas(10k)", setup=shapes)(
+        lambda items: [calculate_area(shape) for shape in items])
+    register("areas.batch", group="areas(10k)",
+             setup=lambda: ShapeBatch.from_shapes(shapes()))(lambda batch: batch.areas())
+
+
+# 3. Measuring ------------------------------------------------------------------
+
+def _quartiles(samples):
+    if len(samples) < 2:
+        return samples[0], samples[0], samples[0]
+    q1, median, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+    return q1, median, q3
+
+
+def measure(case, repeat=7, warmup=1, min_time=0.05):
+    """
+    Time one case.
+
+    The loop count is doubled until one sample takes at least min_time, so
+    short functions are not dominated by timer resolution.
+
+    Args:
+        case (Case): The case to run.
+        repeat (int): How many samples to take.
+        warmup (int): Untimed calls before measuring.
+        min_time (float): The target duration of one sample, in seconds.
+
+    Returns:
+        dict: median, q1, q3, iqr, min and mean (seconds per call), loops,
+        repeat and peak_bytes.
+    """
+    func = case.callable()
+    for _ in range(warmup):
+        func()
+
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+
+    # tracemalloc slows every allocation down, so memory gets its own call.
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    q1, median, q3 = _quartiles(samples)
+    return {"median": median, "q1": q1, "q3": q3, "iqr": q3 - q1,
+            "min": min(samples), "mean": statistics.fmean(samples),
+            "loops": loops, "repeat": repeat, "group": case.group, "peak_bytes": peak}
+
+
+def run(pattern=None, repeat=7, warmup=1, min_time=0.05, course=True, progress=None):
+    """
+    Run every registered case whose name contains pattern.
+
+    Args:
+        pattern (str, optional): Only run cases whose name contains it.
+        repeat, warmup, min_time: Passed to measure().
+        course (bool): Also run the cases from the other course modules.
+        progress (callable, optional): Called with each case name before it runs.
+
+    Returns:
+        dict: A JSON-serializable document with metadata and results.
+    """
+    if course:
+        load_course_cases()
+    results = {}
+    for name, case in CASES.items():
+        if pattern and pattern not in name:
+            continue
+        if progress:
+            progress(name)
+        results[name] = measure(case, repeat, warmup, min_time)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:7.2f} {unit}"
+    return f"{seconds / 1e-9:7.1f} ns"
+
+
+def report(document):
+    """Return a table of results, grouped, with each case relative to its group's best."""
+    results = document["results"]
+    groups = {}
+    for name, result in results.items():
+        groups.setdefault(result.get("group") or name, []).append(name)
+    lines = [f"{'case':<32} {'median':>10} {'IQR':>10} {'peak memory':>12} {'vs best':>8}"]
+    for names in groups.values():
+        best = min(results[name]["median"] for name in names)
+        for name in sorted(names, key=lambda n: results[n]["median"]):
+            result = results[name]
+            lines.append(f"{name:<32} {_format_time(result['median']):>10} "
+                         f"{_format_time(result['iqr']):>10} "
+                         f"{result['peak_bytes'] / 1024:9.1f} KB "
+                         f"{result['median'] / best:7.2f}x")
+    return "\n".join(lines)
+
+
+def compare(baseline, current, threshold=0.10):
+    """
+    Compare two result documents.
+
+    A case regressed if its median grew by more than threshold (a fraction)
+    and the two interquartile ranges do not overlap, so ordinary noise is
+    not reported.
+
+    Args:
+        baseline (dict): The older results.
+        current (dict): The newer results.
+        threshold (float): The allowed relative slowdown, such as 0.10.
+
+    Returns:
+        list: (name, old median, new median, ratio, status) tuples, where
+        status is "regression", "improvement", "unchanged", "new" or "removed".
+        A case whose old median is zero has no ratio; it is "unchanged" if
+        the new median is zero too, and "new" otherwise.
+    """
+    old, new = baseline["results"], current["results"]
+    rows = []
+    for name in sorted(old.keys() | new.keys()):
+        if name not in new:
+            rows.append((name, old[name]["median"], None, None, "removed"))
+            continue
+        if name not in old:
+            rows.append((name, None, new[name]["median"], None, "new"))
+            continue
+        before, after = old[name], new[name]
+        if before["median"] <= 0:
+            # Below the timer resolution: there is nothing to compare against.
+            status = "unchanged" if after["median"] <= 0 else "new"
+            rows.append((name, before["median"], after["median"], None, status))
+            continue
+        ratio = after["median"] / before["median"]
+        if ratio > 1 + threshold and after["q1"] > before["q3"]:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold) and after["q3"] < before["q1"]:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        rows.append((name, before["median"], after["median"], ratio, status))
+    return rows
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command")
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-k", dest="pattern", help="only cases whose name contains this")
+    run_parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    run_parser.add_argument("--repeat", type=int, default=7)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument("--min-time", type=float, default=0.05)
+    run_parser.add_argument("--tips-only", action="store_true",
+                            help="skip the cases from the other course modules")
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.current) as file:
+            current = json.load(file)
+        rows = compare(baseline, current, args.threshold)
+        for name, before, after, ratio, status in rows:
+            change = f"{ratio:6.2f}x" if ratio is not None else "      "
+            print(f"{status:<12} {change} {name}")
+        regressions = sum(1 for row in rows if row[4] == "regression")
+        print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    document = run(getattr(args, "pattern", None), getattr(args, "repeat", 7),
+                   getattr(args, "warmup", 1), getattr(args, "min_time", 0.05),
+                   course=not getattr(args, "tips_only", False),
+                   progress=lambda name: print(f"running {name}...", file=sys.stderr))
+    print(report(document))
+    output = getattr(args, "output", None)
+    if output:
+        with open(output, "w") as file:
+            json.dump(document, file, indent=2)
+        print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,252 @@
+"""
+output_sink.py: Buffered output for the lesson demos
+
+The lesson modules (control_structures, variables_and_data_types,
+functions_and_modules, recursivity, pythonic_classes) print line by line.
+On a terminal, or with python -u, every line is a separate write system
+call, and when the lessons run in bulk those calls dominate. This module
+covers:
+1. OutputSink: a text stream that collects output in memory and writes it
+   to its target in one call, when asked or when a size limit is reached
+2. buffered_output: a context manager that sends print() to a sink
+3. run_lessons: runs every lesson entry point with one flush per demo, to
+   standard output, a file, or nowhere (for benchmarking)
+4. A wall-time comparison of line-by-line and buffered output
+
+Usage:
+    python output_sink.py                    # all lessons, buffered
+    python output_sink.py --output out.txt   # into a file
+    python output_sink.py --discard          # run them, print nothing
+    python output_sink.py --benchmark        # compare the output modes
+"""
+
+import argparse
+import importlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+
+# (module, entry point) of every lesson, in course order.
+LESSONS = [
+    ("variables_and_data_types", "main"),
+    ("control_structures", "main"),
+    ("functions_and_modules", "main"),
+    ("recursivity", "demonstrate_recursion"),
+    ("pythonic_classes", "main"),
+]
+
+DEFAULT_LIMIT = 64 * 1024  # characters held before an automatic flush
+
+
+class OutputSink(io.StringIO):
+    """
+    An in-memory text buffer in front of another stream.
+
+    Writes go into the StringIO; flush() writes its contents to the target
+    with a single call and empties it. With target=None everything is
+    discarded, which measures the cost of the demos without any output.
+    """
+
+    def __init__(self, target=None, limit=DEFAULT_LIMIT):
+        """
+        Create a sink.
+
+        Args:
+            target (file-like, optional): Where flushed text goes. None
+                discards it.
+            limit (int): Flush automatically once this many characters are
+                buffered. 0 only flushes on request.
+        """
+        super().__init__()
+        self.target = target
+        self.limit = limit
+        self.flushes = 0
+        self._size = 0
+        # Without a size check, print() can call the C write directly; the
+        # Python method below costs about as much per line as a write to
+        # the page cache, which eats most of the saving.
+        if target is None:
+            self.write = len
+        elif not limit:
+            self.write = super().write
+
+    def write(self, text):
+        """Buffer text; flush if the size limit is reached."""
+        self._size += len(text)
+        if self._size >= self.limit:
+            super().write(text)
+            self.flush()
+            return len(text)
+        return super().write(text)
+
+    def flush(self):
+        """Write everything buffered to the target in one call."""
+        if self.target is not None and self.tell():
+            self.target.write(self.getvalue())
+            self.target.flush()
+            self.seek(0)
+            self.truncate()
+            self._size = 0
+            self.flushes += 1
+
+
+@contextmanager
+def buffered_output(target=None, limit=DEFAULT_LIMIT, sink=None):
+    """
+    Send print() output to an OutputSink for the duration of the block.
+
+    The sink is flushed when the block ends, even if it raises, so no
+    output is lost.
+
+    Args:
+        target (file-like, optional): Where the output goes (default:
+            the current sys.stdout). Pass sink=discard() to drop it.
+        limit (int): See OutputSink.
+        sink (OutputSink, optional): Reuse an existing sink instead.
+
+    Example:
+        >>> with buffered_output():
+        ...     control_structures.main()
+    """
+    if sink is None:
+        sink = OutputSink(sys.stdout if target is None else target, limit)
+    try:
+        with redirect_stdout(sink):
+            yield sink
+    finally:
+        sink.flush()
+
+
+def discard():
+    """Return a sink that drops everything (for benchmarking)."""
+    return OutputSink(None)
+
+
+def lesson_entry_points():
+    """Import the lessons and return (name, function) pairs."""
+    return [(f"{module}.{function}", getattr(importlib.import_module(module), function))
+            for module, function in LESSONS]
+
+
+def run_lessons(target=None, limit=0, buffered=True):
+    """
+    Run every lesson, flushing once per lesson.
+
+    Each lesson prints about 1 KB, so by default the size limit is off and
+    the only flush is the one at the end of each lesson.
+
+    Args:
+        target (file-like, optional): Where the output goes (default:
+            sys.stdout).
+        limit (int): See OutputSink.
+        buffered (bool): False prints straight to the target, for comparison.
+
+    Returns:
+        int: The number of writes to the target when buffered.
+    """
+    target = sys.stdout if target is None else target
+    flushes = 0
+    for _, entry_point in lesson_entry_points():
+        if not buffered:
+            with redirect_stdout(target):
+                entry_point()
+            continue
+        with buffered_output(target, limit) as sink:
+            entry_point()
+        flushes += sink.flushes
+    return flushes
+
+
+def discard_lessons():
+    """Run every lesson with all output dropped."""
+    for _, entry_point in lesson_entry_points():
+        with buffered_output(sink=discard()):
+            entry_point()
+
+
+def benchmark_output(runs=300, repeat=5):
+    """
+    Time the whole lesson suite with each output mode.
+
+    The output goes to a temporary file opened line-buffered, which is how
+    Python writes to a terminal or under python -u: one write call per line.
+    """
+    lesson_entry_points()  # import everything before timing
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "lessons.txt")
+
+    def line_by_line(file):
+        run_lessons(file, buffered=False)
+
+    modes = [
+        ("print, one write per line", 1, line_by_line),
+        ("print, block-buffered file", -1, line_by_line),
+        (f"OutputSink, limit={DEFAULT_LIMIT}", 1, lambda file: run_lessons(file, DEFAULT_LIMIT)),
+        ("OutputSink, flush per demo only", 1, run_lessons),
+        ("discarded", 1, lambda file: discard_lessons()),
+    ]
+    try:
+        print(f"Full lesson suite, median of {repeat} x {runs} runs")
+        baseline = None
+        for label, buffering, func in modes:
+            samples = []
+            with open(path, "w", buffering=buffering) as file:
+                for _ in range(repeat):
+                    file.seek(0)
+                    start = time.perf_counter()
+                    for _ in range(runs):
+                        func(file)
+                    samples.append((time.perf_counter() - start) / runs)
+            elapsed = statistics.median(samples)
+            baseline = baseline or elapsed
+            print(f"  {label:<34} {elapsed * 1e3:7.3f} ms "
+                  f"({(1 - elapsed / baseline) * 100:5.1f}% less wall time)")
+    finally:
+        os.remove(path)
+        os.rmdir(directory)
+
+
+def demonstrate_output_sink():
+    """Show automatic flushing at the size limit and flushing per demo."""
+    with buffered_output(limit=40) as sink:
+        for word in ("Buddy", "Whiskers", "Smokey", "Rex", "Max", "Bella", "Charlie"):
+            print(f"Adopted {word}")
+    print(f"7 lines, limit of 40 characters: {sink.flushes} writes instead of 7")
+
+    captured = io.StringIO()
+    writes = run_lessons(captured)
+    lines = captured.getvalue().count("\n")
+    print(f"All {len(LESSONS)} lessons: {lines} lines in {writes} writes")
+
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Run every lesson with buffered output.")
+    parser.add_argument("-o", "--output", help="write the output to this file")
+    parser.add_argument("--discard", action="store_true", help="drop all output")
+    parser.add_argument("--unbuffered", action="store_true",
+                        help="print line by line (the old behavior)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="compare the output modes instead")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        demonstrate_output_sink()
+        print()
+        benchmark_output()
+        return 0
+    if args.discard:
+        discard_lessons()
+        return 0
+    if args.output:
+        with open(args.output, "w") as file:
+            run_lessons(file, buffered=not args.unbuffered)
+        return 0
+    run_lessons(buffered=not args.unbuffered)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,254 @@
+"""
+paged_shelter.py: Lazy, paginated and cached rendering of a Shelter
+
+Shelter.list_animals formats every animal into a new list on every call,
+even when the caller only shows the first twenty. This module covers:
+1. RenderCache: remembers each animal's str() and forgets it as soon as the
+   animal's name or age changes (via Animal observers)
+2. PagedShelter: rows are formatted on demand, through iter_rendered(),
+   page(offset, limit) and cursor-based page_after(cursor, limit)
+3. A benchmark showing the first page staying flat as the shelter grows
+
+Offsets are simple but shift when animals before them are removed. A
+cursor is the sequence number of the last animal on the previous page, so
+the next page starts in the right place whatever happened in between.
+"""
+
+import time
+from bisect import bisect_right
+from itertools import islice
+
+from pythonic_classes import Cat, Dog, Shelter
+
+
+class RenderCache:
+    """
+    A cache of str(animal), invalidated when the animal changes.
+
+    Entries keep a reference to their animal, so an id() can never be reused
+    by a different animal while its entry exists; call discard() when an
+    animal leaves the collection.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._entries = {}  # id(animal) -> (animal, text or None)
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, animal):
+        """
+        Return str(animal), formatting it only if it is not cached.
+
+        Args:
+            animal (Animal): The animal to render.
+
+        Returns:
+            str: The rendered animal.
+        """
+        entry = self._entries.get(id(animal))
+        if entry is not None and entry[1] is not None:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        if entry is None:
+            animal.add_observer(self._invalidate)
+        text = str(animal)
+        self._entries[id(animal)] = (animal, text)
+        return text
+
+    def _invalidate(self, animal, attribute, old_value):
+        """Observer callback: the cached text is out of date."""
+        self._entries[id(animal)] = (animal, None)
+
+    def discard(self, animal):
+        """Forget an animal and stop observing it."""
+        if self._entries.pop(id(animal), None) is not None:
+            animal.remove_observer(self._invalidate)
+
+    def clear(self):
+        """Forget every animal."""
+        for animal, _ in list(self._entries.values()):
+            self.discard(animal)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PagedShelter(Shelter):
+    """
+    A Shelter that renders its animals lazily, one page at a time.
+
+    Every animal gets an increasing sequence number when it is added; the
+    numbers are kept in a list parallel to the animals, so a cursor is
+    found with a binary search.
+    """
+
+    def __init__(self):
+        """Initialize an empty shelter and its render cache."""
+        self._animals = []
+        self._sequence = []  # sequence number of each animal, ascending
+        self._next_sequence = 0
+        self.cache = RenderCache()
+        super().__init__()
+
+    @property
+    def animals(self):
+        """A list of the animals in the order they were added."""
+        return list(self._animals)
+
+    @animals.setter
+    def animals(self, animals):
+        # Shelter.__init__ assigns an empty list; accept any iterable.
+        self.cache.clear()
+        self._animals = []
+        self._sequence = []
+        for animal in animals:
+            self.add_animal(animal)
+
+    def __len__(self):
+        """Return the number of animals."""
+        return len(self._animals)
+
+    def add_animal(self, animal):
+        """
+        Add an animal to the shelter.
+
+        Args:
+            animal (Animal): The animal to add.
+        """
+        self._animals.append(animal)
+        self._sequence.append(self._next_sequence)
+        self._next_sequence += 1
+
+    def remove_animal(self, animal):
+        """
+        Remove an animal from the shelter.
+
+        Args:
+            animal (Animal): The animal to remove.
+
+        Raises:
+            ValueError: If the animal is not in the shelter.
+        """
+        index = self._animals.index(animal)
+        del self._animals[index]
+        del self._sequence[index]
+        if not any(other is animal for other in self._animals):
+            self.cache.discard(animal)
+
+    def iter_rendered(self, offset=0, limit=None):
+        """
+        Yield rendered animals, formatting each one only when it is reached.
+
+        Args:
+            offset (int): How many animals to skip.
+            limit (int, optional): The most rows to yield (default: all).
+
+        Yields:
+            str: The rendered animals.
+        """
+        stop = None if limit is None else offset + limit
+        render = self.cache.render
+        for animal in islice(self._animals, offset, stop):
+            yield render(animal)
+
+    def page(self, offset=0, limit=20):
+        """
+        Return one page of rendered animals.
+
+        Args:
+            offset (int): The position of the first row.
+            limit (int): The page size.
+
+        Returns:
+            list: At most limit rendered animals.
+        """
+        render = self.cache.render
+        return [render(animal) for animal in self._animals[offset:offset + limit]]
+
+    def page_after(self, cursor=None, limit=20):
+        """
+        Return the page that follows a cursor.
+
+        Args:
+            cursor (int, optional): The cursor returned with the previous
+                page, or None for the first page.
+            limit (int): The page size.
+
+        Returns:
+            tuple: (rows, next_cursor). next_cursor is None after the last page.
+        """
+        start = 0 if cursor is None else bisect_right(self._sequence, cursor)
+        end = start + limit
+        rows = self.page(start, limit)
+        next_cursor = self._sequence[end - 1] if end < len(self._animals) else None
+        return rows, next_cursor
+
+    def list_animals(self):
+        """List all animals in the shelter, reusing cached renderings."""
+        return list(self.iter_rendered())
+
+
+def benchmark_paging(sizes=(1_000, 10_000, 100_000, 1_000_000), page_size=20):
+    """Measure first-page latency and repeated full listings."""
+    print(f"  {'animals':>9} {'list_animals()[:20]':>20} {'page(0, 20)':>12} "
+          f"{'page_after':>11}")
+    for size in sizes:
+        plain = Shelter()
+        paged = PagedShelter()
+        for i in range(size):
+            animal = Cat(f"cat-{i}", i % 20)
+            plain.add_animal(animal)
+            paged.add_animal(animal)
+
+        start = time.perf_counter()
+        plain.list_animals()[:page_size]
+        eager = time.perf_counter() - start
+        start = time.perf_counter()
+        paged.page(0, page_size)
+        lazy = time.perf_counter() - start
+        start = time.perf_counter()
+        _, cursor = paged.page_after(None, page_size)
+        paged.page_after(cursor, page_size)
+        cursor_time = (time.perf_counter() - start) / 2
+        print(f"  {size:>9,} {eager * 1e3:17.3f} ms {lazy * 1e3:9.3f} ms "
+              f"{cursor_time * 1e3:8.3f} ms")
+
+    size = 100_000
+    plain = Shelter()
+    paged = PagedShelter()
+    for i in range(size):
+        animal = Dog(f"dog-{i}", i % 20, "Beagle")
+        plain.add_animal(animal)
+        paged.add_animal(animal)
+    paged.list_animals()
+    for label, shelter in (("Shelter", plain), ("PagedShelter (warm cache)", paged)):
+        start = time.perf_counter()
+        shelter.list_animals()
+        print(f"Full list_animals() of {size:,}, {label}: "
+              f"{(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+def demonstrate_paging():
+    """Walk a shelter page by page and show the cache following changes."""
+    shelter = PagedShelter()
+    animals = [Cat(f"Cat {i}", i) for i in range(7)]
+    for animal in animals:
+        shelter.add_animal(animal)
+
+    rows, cursor = shelter.page_after(limit=3)
+    print(f"Page 1: {rows}")
+    shelter.remove_animal(animals[0])  # would shift an offset-based page 2
+    rows, cursor = shelter.page_after(cursor, limit=3)
+    print(f"Page 2 (after removing Cat 0): {rows}")
+
+    animals[4].age = 40
+    print(f"After Cat 4 ages: {shelter.page(2, 2)}")
+    print(f"Cache: {shelter.cache.hits} hits, {shelter.cache.misses} misses")
+
+
+if __name__ == "__main__":
+    demonstrate_paging()
+    print()
+    benchmark_paging()
@@ -0,0 +1,282 @@
+"""
+parallel_recursion.py: Running divide-and-conquer recursion on several cores
+
+The recursive functions in recursivity.py run on a single core, even when
+their subproblems are independent. This module covers:
+1. divide_and_conquer: a runner that splits a problem in the parent process
+   while it is above a size threshold, solves the small pieces serially in a
+   ProcessPoolExecutor, and combines the results
+2. parallel_factorial: big factorials as a parallel product tree
+3. parallel_tree_sum: adding up the values of a TreeNode tree by subtree
+4. A speedup benchmark for 1, 2, 4, ... workers
+
+The threshold is a plain argument, so it can be tuned per call: a larger
+threshold means fewer, bigger tasks and less overhead; a smaller one means
+better load balancing.
+"""
+
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fast_factorial import fast_factorial, range_product
+from tree_traversal import build_balanced_tree, iter_preorder
+
+
+def divide_and_conquer(problem, *, size, split, solve, combine, threshold,
+                       max_workers=None, initializer=None, initargs=(), mp_context=None):
+    """
+    Solve a problem by splitting it until the pieces are small enough.
+
+    Splitting and combining happen in the calling process. Every piece whose
+    size is at most threshold becomes one task for the process pool, where
+    solve runs serially. If the whole problem is already small enough, it is
+    solved directly without starting a pool.
+
+    Args:
+        problem: The problem to solve.
+        size (callable): Returns the size of a problem.
+        split (callable): Returns the list of subproblems of a problem.
+        solve (callable): Solves a small problem. It must be picklable
+            (a module-level function), because it runs in another process.
+        combine (callable): combine(problem, results) merges the results of
+            the subproblems of problem.
+        threshold (int): Problems of at most this size are solved serially.
+        max_workers (int, optional): Pool size (default: the CPU count).
+        initializer, initargs, mp_context: Passed to ProcessPoolExecutor.
+
+    Returns:
+        The solution of problem.
+
+    Raises:
+        ValueError: If split returns a subproblem that is not smaller than
+            its parent (the expansion would never end).
+    """
+    if size(problem) <= threshold:
+        if initializer is not None:
+            initializer(*initargs)
+        return solve(problem)
+
+    # Expand the problem tree breadth first. Internal nodes remember which
+    # slots of `results` hold the solutions of their children.
+    nodes = [(problem, None)]  # (problem, child indexes or None for a leaf)
+    leaves = []
+    index = 0
+    while index < len(nodes):
+        current, _ = nodes[index]
+        if size(current) <= threshold:
+            leaves.append(index)
+        else:
+            children = split(current)
+            parent_size = size(current)
+            if any(size(child) >= parent_size for child in children):
+                raise ValueError(f"split({current!r}) did not make the problem smaller; "
+                                 f"is the threshold ({threshold}) too small?")
+            start = len(nodes)
+            nodes.extend((child, None) for child in children)
+            nodes[index] = (current, range(start, len(nodes)))
+        index += 1
+
+    results = [None] * len(nodes)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                             initializer=initializer, initargs=initargs) as pool:
+        leaf_problems = [nodes[i][0] for i in leaves]
+        for i, result in zip(leaves, pool.map(solve, leaf_problems)):
+            results[i] = result
+
+    # Children always come after their parent, so a backwards pass sees
+    # every child's result before it combines the parent.
+    for i in range(len(nodes) - 1, -1, -1):
+        current, children = nodes[i]
+        if children is not None:
+            results[i] = combine(current, [results[c] for c in children])
+    return results[0]
+
+
+# Factorials -----------------------------------------------------------------
+
+def _range_size(bounds):
+    low, high = bounds
+    return high - low
+
+
+def _split_range(bounds):
+    low, high = bounds
+    middle = (low + high) // 2
+    return [(low, middle), (middle, high)]
+
+
+def _solve_range(bounds):
+    return range_product(*bounds)
+
+
+def _multiply(_, results):
+    return math.prod(results)
+
+
+def parallel_range_product(low, high, threshold=50_000, max_workers=None):
+    """
+    Multiply low..high - 1 with a product tree spread over a process pool.
+
+    Args:
+        low (int): The first factor.
+        high (int): The end of the range (exclusive).
+        threshold (int): Ranges of at most this many factors run serially.
+        max_workers (int, optional): Pool size (default: the CPU count).
+
+    Returns:
+        int: The product of the range.
+
+    Raises:
+        ValueError: If threshold is less than 1 (a single factor cannot be split).
+    """
+    if threshold < 1:
+        raise ValueError("threshold must be at least 1")
+    return divide_and_conquer((low, high), size=_range_size, split=_split_range,
+                              solve=_solve_range, combine=_multiply,
+                              threshold=threshold, max_workers=max_workers)
+
+
+def parallel_factorial(n, threshold=50_000, max_workers=None):
+    """
+    Calculate n! with a parallel product tree.
+
+    Note that the last few multiplications (of the biggest numbers) happen
+    in the parent process, so the speedup flattens out for very many workers.
+
+    Args:
+        n (int): The number to calculate the factorial of.
+        threshold (int): Ranges of at most this many factors run serially.
+        max_workers (int, optional): Pool size (default: the CPU count).
+
+    Returns:
+        int: The factorial of n.
+
+    Raises:
+        ValueError: If n is negative or threshold is less than 1.
+    """
+    if n < 0:
+        raise ValueError("Factorial is not defined for negative numbers")
+    return parallel_range_product(1, n + 1, threshold, max_workers)
+
+
+# Tree reductions --------------------------------------------------------------
+
+_shared_root = None
+
+
+def _share_tree(root):
+    """Pool initializer: make the tree available to the worker."""
+    global _shared_root
+    _shared_root = root
+
+
+def _resolve(path):
+    """Follow a path of "L"/"R" steps from the shared root."""
+    node = _shared_root
+    for step in path:
+        node = node.left if step == "L" else node.right
+    return node
+
+
+def _subtree_sum(problem):
+    path, _ = problem
+    return sum(iter_preorder(_resolve(path)))
+
+
+def _split_subtree(problem):
+    path, levels = problem
+    node = _resolve(path)
+    children = []
+    if node.left is not None:
+        children.append((path + "L", levels - 1))
+    if node.right is not None:
+        children.append((path + "R", levels - 1))
+    return children
+
+
+def _add_node(problem, results):
+    return _resolve(problem[0]).value + sum(results)
+
+
+def _levels_left(problem):
+    return problem[1]
+
+
+def parallel_tree_sum(root, split_depth=None, max_workers=None):
+    """
+    Add up the values of a TreeNode tree, one subtree per task.
+
+    The top split_depth levels are handled in the parent process; every
+    subtree below them is summed in a worker. On platforms that support
+    "fork" the workers inherit the tree for free, otherwise it is pickled
+    once per worker.
+
+    Args:
+        root (TreeNode): The root of the tree.
+        split_depth (int, optional): How many levels to split before handing
+            subtrees to the pool (default: enough for ~4 tasks per worker).
+            0 sums the whole tree serially.
+        max_workers (int, optional): Pool size (default: the CPU count).
+
+    Returns:
+        The sum of every value in the tree.
+    """
+    if root is None:
+        return 0
+    workers = max_workers or os.cpu_count() or 1
+    if split_depth is None:
+        split_depth = max(1, math.ceil(math.log2(workers * 4)))
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    _share_tree(root)
+    return divide_and_conquer(("", split_depth), size=_levels_left,
+                              split=_split_subtree, solve=_subtree_sum,
+                              combine=_add_node, threshold=0,
+                              max_workers=max_workers, initializer=_share_tree,
+                              initargs=(root,), mp_context=context)
+
+
+def benchmark_parallel(factorial_n=300_000, tree_size=2_000_000):
+    """Measure the speedup for a growing number of workers."""
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cpus})
+    print(f"CPU count: {cpus}")
+
+    def timed(func):
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+
+    serial, expected = timed(lambda: fast_factorial(factorial_n))
+    print(f"\n{factorial_n:,}! serially (fast_factorial): {serial:8.2f} s")
+    for workers in counts:
+        elapsed, result = timed(lambda: parallel_factorial(
+            factorial_n, threshold=factorial_n // (4 * workers), max_workers=workers))
+        assert result == expected
+        print(f"  {workers} worker(s): {elapsed:8.2f} s  speedup {serial / elapsed:5.2f}x")
+
+    tree = build_balanced_tree(range(tree_size))
+    serial, expected = timed(lambda: sum(iter_preorder(tree)))
+    print(f"\nSum of a {tree_size:,}-node tree serially: {serial:8.2f} s")
+    for workers in counts:
+        elapsed, result = timed(lambda: parallel_tree_sum(tree, max_workers=workers))
+        assert result == expected
+        print(f"  {workers} worker(s): {elapsed:8.2f} s  speedup {serial / elapsed:5.2f}x")
+
+
+def demonstrate_parallel():
+    """Show that the parallel versions agree with the serial ones."""
+    print(f"parallel_factorial(20) = {parallel_factorial(20, threshold=4, max_workers=2)}")
+    print(f"parallel_factorial(5000) == math.factorial(5000): "
+          f"{parallel_factorial(5000, threshold=500, max_workers=2) == math.factorial(5000)}")
+    tree = build_balanced_tree(range(1000))
+    print(f"parallel_tree_sum of 0..999 = {parallel_tree_sum(tree, split_depth=3, max_workers=2)}")
+
+
+if __name__ == "__main__":
+    demonstrate_parallel()
+    print()
+    benchmark_parallel()
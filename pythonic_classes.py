@@ -10,11 +10,15 @@ It covers:
 - Magic methods
 - Inheritance
 - Composition
+- Observers (callbacks on attribute changes)
 
 Each concept is explained with comments and demonstrated with code examples.
 """
 
+import copy
+import weakref
 from abc import ABC, abstractmethod
+from datetime import datetime
 
 
 class Animal:
@@ -36,7 +40,8 @@ class Animal:
             name (str): The name of the animal.
             age (int): The age of the animal.
         """
-        self.name = name  # Instance attribute
+        self._observers = []  # References to callbacks notified on name, age or breed changes
+        self._name = name  # Protected instance attribute
         self._age = age  # Protected instance attribute
 
     def make_sound(self):
@@ -55,10 +60,57 @@ class Animal:
         Returns:
             Animal: An instance of the Animal class.
         """
-        from datetime import datetime
         age = datetime.now().year - birth_year
         return cls(name, age)
 
+    @classmethod
+    def from_birth_years(cls, names, birth_years, current_year=None, **columns):
+        """
+        A class method to create many instances from birth years at once.
+
+        The clock is read a single time and all ages are computed in one pass.
+        If birth_years is a NumPy array the subtraction is vectorized. Every
+        record is validated before any instance is created, and all invalid
+        records are reported together.
+
+        Args:
+            names (sequence): The names of the animals.
+            birth_years (sequence or numpy.ndarray): The birth years.
+            current_year (int, optional): The year to count from (default is
+                the current year).
+            **columns (sequence): Extra per-record constructor arguments,
+                such as breed=[...] for Dog.
+
+        Returns:
+            list: The new instances, in input order.
+
+        Raises:
+            ValueError: If the lengths differ or any birth year is in the future.
+        """
+        if current_year is None:
+            current_year = datetime.now().year
+        count = len(names)
+        if len(birth_years) != count or any(len(v) != count for v in columns.values()):
+            raise ValueError("All columns must have the same length")
+
+        if hasattr(birth_years, "dtype"):  # NumPy array: vectorized arithmetic
+            ages = current_year - birth_years
+            invalid = (ages < 0).nonzero()[0].tolist()
+            ages = ages.tolist()
+        else:
+            ages = [current_year - year for year in birth_years]
+            invalid = [i for i, age in enumerate(ages) if age < 0]
+        if invalid:
+            shown = ", ".join(f"{names[i]!r} ({current_year - ages[i]})" for i in invalid[:10])
+            more = f" and {len(invalid) - 10} more" if len(invalid) > 10 else ""
+            raise ValueError(f"Age cannot be negative for {len(invalid)} record(s): {shown}{more}")
+
+        if not columns:
+            return [cls(name, age) for name, age in zip(names, ages)]
+        keys = list(columns)
+        return [cls(name, age, **dict(zip(keys, values)))
+                for name, age, *values in zip(names, ages, *columns.values())]
+
     @staticmethod
     def is_adult(age):
         """
@@ -72,6 +124,17 @@ class Animal:
         """
         return age >= 18
 
+    @property
+    def name(self):
+        """Property to get the name of the animal."""
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        """Setter for the name property that notifies observers."""
+        old_value, self._name = self._name, value
+        self._notify("name", old_value)
+
     @property
     def age(self):
         """Property to get the age of the animal."""
@@ -82,7 +145,87 @@ class Animal:
         """Setter for the age property with validation."""
         if value < 0:
             raise ValueError("Age cannot be negative")
-        self._age = value
+        old_value, self._age = self._age, value
+        self._notify("age", old_value)
+
+    def add_observer(self, callback):
+        """
+        Register a callback to be called after the name, age or breed changes.
+
+        This is the observer pattern: containers such as an indexed shelter
+        can keep their lookups up to date without polling every animal.
+
+        Bound methods are held through a weak reference, so an animal does
+        not keep the container that watches it alive; once the container is
+        garbage collected its callback is dropped. Plain functions are held
+        normally.
+
+        Args:
+            callback (callable): Called as callback(animal, attribute, old_value).
+        """
+        if hasattr(callback, "__self__") and hasattr(callback, "__func__"):
+            self._observers.append(weakref.WeakMethod(callback))
+        else:
+            self._observers.append(lambda: callback)
+
+    def remove_observer(self, callback):
+        """
+        Stop notifying a callback registered with add_observer.
+
+        Args:
+            callback (callable): The callback to remove.
+
+        Raises:
+            ValueError: If the callback is not registered.
+        """
+        for index, reference in enumerate(self._observers):
+            if reference() == callback:
+                del self._observers[index]
+                return
+        raise ValueError("The callback is not an observer of this animal")
+
+    def _notify(self, attribute, old_value):
+        """Tell every live observer that an attribute changed."""
+        for reference in tuple(self._observers):
+            callback = reference()
+            if callback is None:
+                self._observers.remove(reference)
+            else:
+                callback(self, attribute, old_value)
+
+    def __getstate__(self):
+        """
+        Return the state used by pickle and copy, without the observers.
+
+        Observers belong to the containers watching this animal, so a copy
+        or an unpickled animal starts with none. Works for the slotted
+        classes of animal_table as well.
+        """
+        state = dict(getattr(self, "__dict__", {}))
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if not slot.startswith("__") and hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        state["_observers"] = []
+        return state
+
+    def __setstate__(self, state):
+        """Restore the state returned by __getstate__."""
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    def __copy__(self):
+        """Return a shallow copy with no observers."""
+        clone = type(self).__new__(type(self))
+        clone.__setstate__(self.__getstate__())
+        return clone
+
+    def __deepcopy__(self, memo):
+        """Return a deep copy with no observers."""
+        clone = type(self).__new__(type(self))
+        memo[id(self)] = clone
+        clone.__setstate__(copy.deepcopy(self.__getstate__(), memo))
+        return clone
 
     def __str__(self):
         """Magic method for string representation of the object."""
@@ -110,7 +253,18 @@ class Dog(Animal):
             breed (str): The breed of the dog.
         """
         super().__init__(name, age)
-        self.breed = breed
+        self._breed = breed
+
+    @property
+    def breed(self):
+        """Property to get the breed of the dog."""
+        return self._breed
+
+    @breed.setter
+    def breed(self, value):
+        """Setter for the breed property that notifies observers."""
+        old_value, self._breed = self._breed, value
+        self._notify("breed", old_value)
 
     def make_sound(self):
         """Override the make_sound method from the parent class."""
@@ -175,6 +329,18 @@ class Shelter:
         """
         self.animals.append(animal)
 
+    def remove_animal(self, animal):
+        """
+        Remove an animal from the shelter.
+
+        Args:
+            animal (Animal): The animal to remove.
+
+        Raises:
+            ValueError: If the animal is not in the shelter.
+        """
+        self.animals.remove(animal)
+
     def list_animals(self):
         """List all animals in the shelter."""
         return [str(animal) for animal in self.animals]
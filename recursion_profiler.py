@@ -0,0 +1,319 @@
+"""
+recursion_profiler.py: Measuring what recursive code actually does
+
+demonstrate_recursion lists the pitfalls of recursion (deep stacks, call
+overhead, repeated work) but gives no way to measure them. This module
+covers:
+1. RecursionProfiler: records call counts, maximum depth, time per frame and
+   repeated arguments for the functions it watches
+2. Two ways to watch a function: the profile decorator, and patch(), which
+   swaps a module's function for a traced one only while it is active
+3. Exporting the call tree as collapsed stacks ("a;b;c 42" lines), the input
+   format of flamegraph.pl, speedscope and similar tools
+
+With patch() nothing is installed while profiling is off, so the overhead
+when disabled is exactly zero. The decorator gets close: a function decorated
+while its profiler is disabled is returned unchanged, and switching the
+profiler on or off rebinds module-level decorated functions between the plain
+and the traced version. Only a traced function the profiler cannot rebind
+(a nested function, or a reference kept elsewhere) still costs a Python
+wrapper call per call while disabled.
+"""
+
+import functools
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import recursivity
+from tree_traversal import build_balanced_tree
+
+
+class FunctionStats:
+    """The numbers collected for one function."""
+
+    __slots__ = ("name", "calls", "total_time", "self_time", "max_depth", "arguments")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total_time = 0.0  # inclusive, counted once per outermost call
+        self.self_time = 0.0  # exclusive of the functions it called
+        self.max_depth = 0  # deepest recursion of this function alone
+        self.arguments = Counter()
+
+    def repeated_arguments(self, top=5):
+        """Return the most common argument tuples that were seen more than once."""
+        return [(args, count) for args, count in self.arguments.most_common(top) if count > 1]
+
+    def __repr__(self):
+        return (f"FunctionStats({self.name!r}, calls={self.calls}, "
+                f"max_depth={self.max_depth}, total_time={self.total_time:.6f})")
+
+
+class RecursionProfiler:
+    """
+    Collects statistics and a call tree for the functions it watches.
+
+    Frames are tracked per thread; the shared statistics are updated under
+    a lock. The call tree is stored as a trie of (parent path id, function
+    name) pairs, so each call costs O(1) no matter how deep the recursion is.
+    """
+
+    def __init__(self, enabled=True, record_arguments=True):
+        """
+        Initialize an empty profiler.
+
+        Args:
+            enabled (bool): Whether decorated functions are traced. It can
+                be changed later through the enabled attribute.
+            record_arguments (bool): Count argument tuples to find repeated
+                subproblems (needs hashable or repr-able arguments).
+        """
+        self._enabled = enabled
+        self._profiled = []  # (original, traced) pairs from profile()
+        self.record_arguments = record_arguments
+        self.stats = {}
+        self.max_stack_depth = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._path_ids = {}  # (parent id, name) -> path id
+        self._path_parents = [(None, None)]  # path id -> (parent id, name); 0 is the root
+        self._path_self_time = defaultdict(float)
+
+    @property
+    def enabled(self):
+        """Whether decorated functions are traced."""
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        self._enabled = bool(value)
+        # Point module-level names at the plain or the traced version, so a
+        # disabled profiler adds no call at all (recursive calls included).
+        for original, traced in self._profiled:
+            namespace, name = original.__globals__, original.__name__
+            if namespace.get(name) in (original, traced):
+                namespace[name] = traced if self._enabled else original
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.stats = {}
+            self.max_stack_depth = 0
+            self._path_ids = {}
+            self._path_parents = [(None, None)]
+            self._path_self_time = defaultdict(float)
+
+    def _frames(self):
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+            self._local.depths = Counter()
+        return frames
+
+    def _path_id(self, parent_id, name):
+        """Return the id of a call path; the caller holds the lock."""
+        key = (parent_id, name)
+        path_id = self._path_ids.get(key)
+        if path_id is None:
+            path_id = self._path_ids[key] = len(self._path_parents)
+            self._path_parents.append(key)
+        return path_id
+
+    def _call(self, func, name, args, kwargs):
+        """Run func while recording one frame."""
+        frames = self._frames()
+        depths = self._local.depths
+        depths[name] += 1
+        depth = depths[name]
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = FunctionStats(name)
+            path_id = self._path_id(frames[-1][0] if frames else 0, name)
+            stats.calls += 1
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+            if len(frames) + 1 > self.max_stack_depth:
+                self.max_stack_depth = len(frames) + 1
+            if self.record_arguments:
+                key = args if not kwargs else args + tuple(sorted(kwargs.items()))
+                try:
+                    stats.arguments[key] += 1
+                except TypeError:  # unhashable arguments
+                    stats.arguments[repr(key)] += 1
+
+        frame = [path_id, 0.0]  # path id, time spent in callees
+        frames.append(frame)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            frames.pop()
+            depths[name] -= 1
+            own = elapsed - frame[1]
+            if frames:
+                frames[-1][1] += elapsed
+            with self._lock:
+                stats.self_time += own
+                self._path_self_time[path_id] += own
+                if depths[name] == 0:
+                    stats.total_time += elapsed
+
+    def profile(self, func):
+        """
+        Decorator that traces every call of func while the profiler is enabled.
+
+        If the profiler is disabled, func itself is returned, so it runs at
+        full speed. For a module-level function, changing enabled later
+        swaps the module's name between func and the traced version. A
+        traced version that cannot be swapped (a nested function) checks
+        enabled on every call instead.
+
+        Args:
+            func (callable): The function to trace.
+
+        Returns:
+            callable: The traced function, or func if the profiler is disabled.
+        """
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self._enabled:
+                return func(*args, **kwargs)
+            return self._call(func, name, args, kwargs)
+
+        self._profiled.append((func, wrapper))
+        return wrapper if self._enabled else func
+
+    @contextmanager
+    def patch(self, namespace, *names):
+        """
+        Trace functions looked up by name, such as a module's recursive function.
+
+        While the block runs, each namespace.<name> is replaced with a traced
+        version, so recursive calls (which look the name up again) are traced
+        too. The originals are put back afterwards.
+
+        Args:
+            namespace: A module or object holding the functions.
+            *names (str): The attribute names to trace.
+
+        Example:
+            >>> with profiler.patch(recursivity, "fibonacci"):
+            ...     recursivity.fibonacci(10)
+        """
+        originals = {name: getattr(namespace, name) for name in names}
+        try:
+            for name, func in originals.items():
+                qualname = getattr(func, "__qualname__", name)
+                traced = functools.wraps(func)(
+                    lambda *args, _func=func, _name=qualname, **kwargs:
+                    self._call(_func, _name, args, kwargs))
+                setattr(namespace, name, traced)
+            yield self
+        finally:
+            for name, func in originals.items():
+                setattr(namespace, name, func)
+
+    def collapsed_stacks(self, unit=1e-6):
+        """
+        Return the call tree as collapsed stack lines.
+
+        Args:
+            unit (float): The time unit of the counts (default microseconds).
+
+        Returns:
+            list: Lines like "fibonacci;fibonacci;fibonacci 12", sorted.
+        """
+        lines = []
+        for path_id, seconds in self._path_self_time.items():
+            names = []
+            while path_id:
+                path_id, name = self._path_parents[path_id]
+                names.append(name)
+            count = round(seconds / unit)
+            if count > 0:
+                lines.append(f"{';'.join(reversed(names))} {count}")
+        return sorted(lines)
+
+    def write_collapsed(self, path, unit=1e-6):
+        """Write collapsed_stacks() to a file, one stack per line."""
+        with open(path, "w") as file:
+            for line in self.collapsed_stacks(unit):
+                file.write(line + "\n")
+
+    def report(self, top_arguments=3):
+        """Return a readable summary of every traced function."""
+        lines = [f"Maximum stack depth: {self.max_stack_depth}"]
+        for stats in sorted(self.stats.values(), key=lambda s: -s.total_time):
+            lines.append(f"{stats.name}: {stats.calls} calls, max depth {stats.max_depth}, "
+                         f"total {stats.total_time * 1e3:.3f} ms, "
+                         f"self {stats.self_time * 1e3:.3f} ms, "
+                         f"{stats.self_time / stats.calls * 1e6:.2f} us per frame")
+            repeated = stats.repeated_arguments(top_arguments)
+            if repeated:
+                hotspots = ", ".join(f"{args!r} x{count}" for args, count in repeated)
+                lines.append(f"  repeated arguments: {hotspots}")
+        return "\n".join(lines)
+
+
+def benchmark_profiler_overhead():
+    """Measure the cost of tracing fibonacci(20) and of disabled hooks."""
+    def best(func, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1e3
+
+    plain = best(lambda: recursivity.fibonacci(20))
+    print(f"fibonacci(20) untraced:                 {plain:8.2f} ms")
+
+    profiler = RecursionProfiler()
+
+    def traced():
+        with profiler.patch(recursivity, "fibonacci"):
+            recursivity.fibonacci(20)
+
+    print(f"fibonacci(20) with patch():             {best(traced):8.2f} ms")
+    print(f"fibonacci(20) after patch() is removed: "
+          f"{best(lambda: recursivity.fibonacci(20)):8.2f} ms")
+
+    def fib(n):
+        return n if n <= 1 else fib(n - 1) + fib(n - 2)
+
+    print(f"fib(20) undecorated:                    {best(lambda: fib(20)):8.2f} ms")
+
+    disabled = RecursionProfiler(enabled=False)
+    fib = disabled.profile(fib)
+    print(f"fib(20) decorated, profiler disabled:   {best(lambda: fib(20)):8.2f} ms")
+
+    switched_off = RecursionProfiler()
+    fib = switched_off.profile(fib)
+    switched_off.enabled = False
+    print(f"fib(20) nested, disabled after tracing: {best(lambda: fib(20)):8.2f} ms "
+          f"(wrapper cannot be swapped out)")
+
+
+def demonstrate_profiler():
+    """Profile the recursive functions from recursivity.py."""
+    profiler = RecursionProfiler()
+    with profiler.patch(recursivity, "fibonacci", "inorder_traversal"):
+        recursivity.fibonacci(15)
+        recursivity.inorder_traversal(build_balanced_tree(range(1000)))
+    print(profiler.report())
+    print("\nCollapsed stacks (first 3 lines):")
+    for line in profiler.collapsed_stacks()[:3]:
+        print(f"  {line}")
+
+
+if __name__ == "__main__":
+    demonstrate_profiler()
+    print()
+    benchmark_profiler_overhead()
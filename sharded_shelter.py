@@ -0,0 +1,372 @@
+"""
+sharded_shelter.py: Spreading a Shelter over several processes
+
+One Shelter lives in one interpreter, so its queries share one GIL no matter
+how many cores the machine has. This module covers:
+1. ShardedShelter: animals are hash-partitioned by name across worker
+   processes, each holding its part in an animal_table.AnimalTable
+2. Scatter-gather queries: count, filter_by_age and list_species are sent to
+   every shard at once and run in parallel
+3. Streaming merges: results come back in chunks over pipes; age filters are
+   merged in age order with heapq.merge, species listings are passed on in
+   whatever order the shards finish their chunks
+4. A throughput benchmark for 1, 2, 4 and 8 shards
+
+Animals cross process boundaries as (species, name, age, breed) tuples, and
+writes are buffered and sent to each shard in batches.
+"""
+
+import heapq
+import multiprocessing
+import os
+import random
+import time
+import zlib
+from multiprocessing.connection import wait
+
+from animal_table import SPECIES, AnimalTable, _species_of
+from pythonic_classes import Animal, Cat, Dog, HouseCat
+
+_CLASSES = {"Animal": Animal, "Dog": Dog, "Cat": Cat, "HouseCat": HouseCat}
+
+
+def record_of(animal):
+    """Return the (species, name, age, breed) tuple for an Animal object."""
+    return (SPECIES[_species_of(animal)], animal.name, animal.age,
+            getattr(animal, "breed", None))
+
+
+def animal_of(record):
+    """Rebuild an Animal object (of the right class) from a record tuple."""
+    species, name, age, breed = record
+    cls = _CLASSES[species]
+    return cls(name, age, breed) if cls is Dog else cls(name, age)
+
+
+# The worker side --------------------------------------------------------------
+
+def _send_rows(conn, table, indexes, chunk_size):
+    """Stream the records of some rows in chunks, then an empty chunk."""
+    names, ages, species, breeds = table.names, table.ages, table.species, table.breeds
+    breed_names = table.breed_names
+    for start in range(0, len(indexes), chunk_size):
+        conn.send([(SPECIES[species[i]], names[i], ages[i],
+                    None if breeds[i] < 0 else breed_names[breeds[i]])
+                   for i in indexes[start:start + chunk_size]])
+    conn.send([])
+
+
+def _shard_worker(conn):
+    """Serve requests for one shard until told to stop."""
+    table = AnimalTable()
+    while True:
+        request = conn.recv()
+        command = request[0]
+        if command == "add":
+            for species, name, age, breed in request[1]:
+                table.append_row(name, age, species, breed)
+        elif command == "count":
+            _, species, min_age, max_age = request
+            if species is None and min_age is None and max_age is None:
+                conn.send(len(table))
+            else:
+                conn.send(len(table.select(species, min_age, max_age)))
+        elif command == "age":
+            _, min_age, max_age, chunk_size = request
+            indexes = table.select(None, min_age, max_age)
+            ages = table.ages
+            indexes.sort(key=ages.__getitem__)  # stable: table order within an age
+            _send_rows(conn, table, indexes, chunk_size)
+        elif command == "species":
+            _, species, chunk_size = request
+            _send_rows(conn, table, table.select(species), chunk_size)
+        elif command == "stop":
+            conn.close()
+            return
+
+
+# The parent side ---------------------------------------------------------------
+
+class ShardedShelter:
+    """
+    A shelter whose animals live in several worker processes.
+
+    Use it as a context manager (or call close()) so the workers exit.
+    Queries see every write made before them: pending batches are sent
+    first. A streaming query may be abandoned part way; what the shards
+    still send for it is read and dropped before the next query, or before
+    a batch of writes is sent while it is still open.
+    """
+
+    def __init__(self, shards=None, batch_size=10_000, chunk_size=5_000):
+        """
+        Start the shard processes.
+
+        Args:
+            shards (int, optional): How many processes (default: the CPU count).
+            batch_size (int): Buffered writes per shard before they are sent.
+            chunk_size (int): Records per message when results stream back.
+        """
+        self.shards = shards or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self._connections = []
+        self._processes = []
+        for _ in range(self.shards):
+            parent_end, child_end = context.Pipe()
+            process = context.Process(target=_shard_worker, args=(child_end,), daemon=True)
+            process.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+        self._pending = [[] for _ in range(self.shards)]
+        self._query = 0  # incremented by every query sent to the shards
+        self._streaming = []  # connections still streaming the current query
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes."""
+        try:
+            self._drain()  # a worker blocked on a full pipe would never stop
+        except (EOFError, OSError):
+            pass
+        for conn, process in zip(self._connections, self._processes):
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def shard_of(self, name):
+        """Return the shard that holds animals with this name."""
+        return zlib.crc32(name.encode("utf-8")) % self.shards
+
+    # Writes -------------------------------------------------------------------
+
+    def add_record(self, species, name, age, breed=None):
+        """
+        Add an animal given as plain values.
+
+        Args:
+            species (str): One of animal_table.SPECIES.
+            name (str): The name of the animal.
+            age (int): The age of the animal.
+            breed (str, optional): The breed, for dogs.
+        """
+        if age < 0:
+            raise ValueError("Age cannot be negative")
+        shard = self.shard_of(name)
+        pending = self._pending[shard]
+        pending.append((species, name, age, breed))
+        if len(pending) >= self.batch_size:
+            self._drain()  # a shard blocked on a full pipe would never read the batch
+            self._connections[shard].send(("add", pending))
+            self._pending[shard] = []
+
+    def add_animal(self, animal):
+        """Add an Animal object (it is copied into its shard)."""
+        self.add_record(*record_of(animal))
+
+    def flush(self):
+        """Send every buffered write to its shard."""
+        if any(self._pending):
+            self._drain()
+        for shard, pending in enumerate(self._pending):
+            if pending:
+                self._connections[shard].send(("add", pending))
+                self._pending[shard] = []
+
+    # Queries ------------------------------------------------------------------
+
+    def _scatter(self, request):
+        """Send a request to every shard and return its query number."""
+        self._drain()
+        self.flush()
+        for conn in self._connections:
+            conn.send(request)
+        self._query += 1
+        return self._query
+
+    def _stream(self, request):
+        """Send a request whose results every shard streams back in chunks."""
+        query = self._scatter(request)
+        self._streaming = list(self._connections)
+        return query
+
+    def _drain(self):
+        """Read and drop the rest of an abandoned streaming query."""
+        if not self._streaming:
+            return
+        for conn in self._streaming:
+            while conn.recv():
+                pass
+        self._streaming = []
+        self._query += 1  # its iterator must not read what comes next
+
+    def _check(self, query):
+        if query != self._query:
+            raise RuntimeError("A newer query or batch of writes was sent before "
+                               "this query was consumed")
+
+    def _end_stream(self, query):
+        """Finally clause of the result generators: drain if closed early."""
+        if query == self._query:
+            self._drain()
+
+    def count(self, species=None, min_age=None, max_age=None):
+        """
+        Count the animals matching every given condition.
+
+        Args:
+            species (str, optional): One of animal_table.SPECIES. Species
+                match exactly: "Cat" does not include house cats.
+            min_age (int, optional): The lowest age to include.
+            max_age (int, optional): The highest age to include.
+
+        Returns:
+            int: The number of matching animals across all shards.
+        """
+        self._scatter(("count", species, min_age, max_age))
+        return sum(conn.recv() for conn in self._connections)
+
+    def __len__(self):
+        """Return the number of animals."""
+        return self.count()
+
+    def _chunks(self, conn, query):
+        """Yield the records one shard streams back."""
+        while True:
+            self._check(query)
+            chunk = conn.recv()
+            if not chunk:
+                self._streaming.remove(conn)
+                return
+            yield from chunk
+
+    def filter_by_age(self, min_age=None, max_age=None):
+        """
+        Yield the records with min_age <= age <= max_age, youngest first.
+
+        Each shard sorts its own matches; the parent only merges the sorted
+        streams, reading more chunks as it needs them. The query is sent
+        right away, so it sees every write made before the call. Iterating
+        the result after a newer query, or a batch of writes, has been sent
+        raises RuntimeError.
+
+        Returns:
+            iterator: (species, name, age, breed) records.
+        """
+        query = self._stream(("age", min_age, max_age, self.chunk_size))
+        return self._merge_by_age(query)
+
+    def _merge_by_age(self, query):
+        try:
+            yield from heapq.merge(*(self._chunks(conn, query) for conn in self._connections),
+                                   key=lambda record: record[2])
+        finally:
+            self._end_stream(query)
+
+    def list_species(self, species):
+        """
+        Yield the records of one species, in the order the shards deliver them.
+
+        Like filter_by_age, the query is sent right away.
+
+        Args:
+            species (str): One of animal_table.SPECIES.
+
+        Returns:
+            iterator: (species, name, age, breed) records.
+        """
+        query = self._stream(("species", species, self.chunk_size))
+        return self._gather(query)
+
+    def _gather(self, query):
+        try:
+            while True:
+                self._check(query)
+                if not self._streaming:
+                    return
+                for conn in wait(self._streaming):
+                    chunk = conn.recv()
+                    if chunk:
+                        yield from chunk
+                        self._check(query)
+                    else:
+                        self._streaming.remove(conn)
+        finally:
+            self._end_stream(query)
+
+
+def _fill(shelter, count, seed=1):
+    rng = random.Random(seed)
+    breeds = ["Labrador", "Beagle", "Poodle", "Husky", "Boxer", "Pug"]
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            shelter.add_record("Dog", f"dog-{i}", rng.randrange(20), rng.choice(breeds))
+        elif kind < 0.8:
+            shelter.add_record("Cat", f"cat-{i}", rng.randrange(20))
+        else:
+            shelter.add_record("HouseCat", f"housecat-{i}", rng.randrange(20))
+    shelter.flush()
+
+
+def benchmark_sharding(count=1_000_000, queries=50):
+    """Measure query throughput for 1, 2, 4 and 8 shards."""
+    print(f"CPU count: {os.cpu_count()}, {count:,} animals")
+    print(f"  {'shards':>6} {'load':>8} {'count q/s':>10} {'age filter q/s':>15} "
+          f"{'species rows/s':>15}")
+    for shards in (1, 2, 4, 8):
+        with ShardedShelter(shards) as shelter:
+            start = time.perf_counter()
+            _fill(shelter, count)
+            shelter.count()
+            load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i in range(queries):
+                shelter.count("Dog", i % 10, i % 10 + 5)
+            count_rate = queries / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for i in range(queries):
+                for _ in shelter.filter_by_age(i % 20, i % 20):
+                    pass
+            age_rate = queries / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            rows = sum(1 for _ in shelter.list_species("Cat"))
+            species_rate = rows / (time.perf_counter() - start)
+            print(f"  {shards:>6} {load:7.2f}s {count_rate:10.1f} {age_rate:15.1f} "
+                  f"{species_rate:15,.0f}")
+
+
+def demonstrate_sharding():
+    """Spread a few animals over three shards and query them."""
+    with ShardedShelter(shards=3) as shelter:
+        shelter.add_animal(Dog("Buddy", 5, "Golden Retriever"))
+        shelter.add_animal(Dog("Rex", 2, "Beagle"))
+        shelter.add_animal(Cat("Whiskers", 8))
+        shelter.add_animal(HouseCat("Smokey", 3))
+        shelter.add_animal(Cat("Tom", 4))
+        print(f"Shards: {[shelter.shard_of(n) for n in ('Buddy', 'Rex', 'Whiskers', 'Smokey', 'Tom')]}")
+        print(f"count() = {shelter.count()}, count('Cat') = {shelter.count('Cat')}")
+        print(f"Ages 3 to 5: {[str(animal_of(r)) for r in shelter.filter_by_age(3, 5)]}")
+        print(f"Dogs: {sorted(name for _, name, _, _ in shelter.list_species('Dog'))}")
+
+
+if __name__ == "__main__":
+    demonstrate_sharding()
+    print()
+    benchmark_sharding()
@@ -0,0 +1,280 @@
+"""
+shelter_index.py: A Shelter with secondary indexes
+
+pythonic_classes.Shelter keeps a flat list, so every question ("is there a
+dog called Rex?", "which animals are between 3 and 5?") scans all of it.
+This module covers:
+1. IndexedShelter: a Shelter that maintains lookups by name, by class, by
+   breed (for dogs) and a sorted age index for range queries
+2. Keeping the indexes correct through add_animal, remove_animal and
+   changes to an animal's name or age (via Animal observers)
+3. A benchmark of indexed queries against list scans
+
+Name, class and breed lookups are dictionary hits (O(1)); age ranges use
+balanced_tree.AVLTree, so updates are O(log n) and a range query costs
+O(log n + k) for k matching animals.
+"""
+
+import random
+import time
+from collections import defaultdict
+
+from balanced_tree import AVLTree
+from pythonic_classes import Animal, Cat, Dog, HouseCat, Shelter
+
+
+class IndexedShelter(Shelter):
+    """
+    A Shelter that answers lookups without scanning every animal.
+
+    Animals are kept in an insertion-ordered dict keyed by identity, so
+    removal is O(1) and the animals attribute still lists them in the
+    order they arrived.
+    """
+
+    def __init__(self):
+        """Initialize an empty shelter and its indexes."""
+        self._members = {}  # id(animal) -> animal
+        self._by_name = defaultdict(dict)
+        self._by_class = defaultdict(dict)
+        self._by_breed = defaultdict(dict)
+        self._by_age = AVLTree()  # (age, id(animal)) -> animal
+        super().__init__()
+
+    @property
+    def animals(self):
+        """A list of the animals in the order they were added."""
+        return list(self._members.values())
+
+    @animals.setter
+    def animals(self, animals):
+        # Shelter.__init__ assigns an empty list; accept any iterable.
+        for animal in list(self._members.values()):
+            self.remove_animal(animal)
+        for animal in animals:
+            self.add_animal(animal)
+
+    def __len__(self):
+        """Return the number of animals."""
+        return len(self._members)
+
+    def __contains__(self, animal):
+        """Check whether this exact animal is in the shelter."""
+        return id(animal) in self._members
+
+    def __iter__(self):
+        """Iterate over the animals without copying them into a list."""
+        return iter(self._members.values())
+
+    def add_animal(self, animal):
+        """
+        Add an animal to the shelter and every index.
+
+        Args:
+            animal (Animal): The animal to add. Adding the same animal twice
+                has no effect.
+        """
+        key = id(animal)
+        if key in self._members:
+            return
+        self._members[key] = animal
+        self._by_name[animal.name][key] = animal
+        self._by_class[type(animal)][key] = animal
+        if isinstance(animal, Dog):
+            self._by_breed[animal.breed][key] = animal
+        self._by_age.insert((animal.age, key), animal)
+        animal.add_observer(self._on_change)
+
+    def remove_animal(self, animal):
+        """
+        Remove an animal from the shelter and every index.
+
+        Args:
+            animal (Animal): The animal to remove.
+
+        Raises:
+            ValueError: If the animal is not in the shelter.
+        """
+        key = id(animal)
+        if key not in self._members:
+            raise ValueError(f"{animal!r} is not in the shelter")
+        animal.remove_observer(self._on_change)
+        del self._members[key]
+        self._discard(self._by_name, animal.name, key)
+        self._discard(self._by_class, type(animal), key)
+        if isinstance(animal, Dog):
+            self._discard(self._by_breed, animal.breed, key)
+        self._by_age.delete((animal.age, key))
+
+    @staticmethod
+    def _discard(index, value, key):
+        """Remove key from index[value], dropping the bucket when it empties."""
+        bucket = index[value]
+        del bucket[key]
+        if not bucket:
+            del index[value]
+
+    def _on_change(self, animal, attribute, old_value):
+        """Observer callback: move the animal to its new index entries."""
+        key = id(animal)
+        if attribute == "name":
+            self._discard(self._by_name, old_value, key)
+            self._by_name[animal.name][key] = animal
+        elif attribute == "age":
+            self._by_age.delete((old_value, key))
+            self._by_age.insert((animal.age, key), animal)
+        elif attribute == "breed":
+            self._discard(self._by_breed, old_value, key)
+            self._by_breed[animal.breed][key] = animal
+
+    def find_by_name(self, name):
+        """
+        Return the animals with a given name.
+
+        Args:
+            name (str): The name to look for.
+
+        Returns:
+            list: The matching animals (empty if none).
+        """
+        bucket = self._by_name.get(name)
+        return list(bucket.values()) if bucket else []
+
+    def find_by_class(self, cls):
+        """
+        Return the animals that are instances of cls (including subclasses).
+
+        Args:
+            cls (type): For example Dog, Cat or Animal.
+
+        Returns:
+            list: The matching animals.
+        """
+        found = []
+        for animal_class, bucket in self._by_class.items():
+            if issubclass(animal_class, cls):
+                found.extend(bucket.values())
+        return found
+
+    def find_by_breed(self, breed):
+        """
+        Return the dogs of a given breed.
+
+        Args:
+            breed (str): The breed to look for.
+
+        Returns:
+            list: The matching dogs.
+        """
+        bucket = self._by_breed.get(breed)
+        return list(bucket.values()) if bucket else []
+
+    def find_by_age(self, min_age=None, max_age=None):
+        """
+        Yield the animals with min_age <= age <= max_age, youngest first.
+
+        Args:
+            min_age (int, optional): The lowest age to include.
+            max_age (int, optional): The highest age to include.
+
+        Yields:
+            Animal: The matching animals.
+        """
+        # Keys are (age, id) pairs; ids are non-negative, so (age, -1) sorts
+        # before every animal of that age.
+        lo = None if min_age is None else (min_age, -1)
+        hi = None if max_age is None else (max_age + 1, -1)
+        for _, animal in self._by_age.range_items(lo, hi):
+            yield animal
+
+
+def _populate(shelter, count, seed=1):
+    """Fill a shelter with random dogs and cats."""
+    rng = random.Random(seed)
+    breeds = ["Labrador", "Beagle", "Poodle", "Husky", "Boxer", "Pug"]
+    for i in range(count):
+        kind = rng.random()
+        age = rng.randrange(20)
+        if kind < 0.5:
+            animal = Dog(f"dog-{i}", age, rng.choice(breeds))
+        elif kind < 0.8:
+            animal = Cat(f"cat-{i}", age)
+        else:
+            animal = HouseCat(f"housecat-{i}", age)
+        shelter.add_animal(animal)
+    return shelter
+
+
+def benchmark_shelter_index(count=200_000, queries=200):
+    """Compare indexed lookups with scanning the plain list."""
+    start = time.perf_counter()
+    plain = _populate(Shelter(), count)
+    plain_build = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = _populate(IndexedShelter(), count)
+    indexed_build = time.perf_counter() - start
+    print(f"{count:,} animals; building: list {plain_build:.2f} s, "
+          f"indexed {indexed_build:.2f} s")
+
+    rng = random.Random(2)
+    names = [f"dog-{rng.randrange(count)}" for _ in range(queries)]
+
+    def timed(func):
+        start = time.perf_counter()
+        func()
+        return (time.perf_counter() - start) / queries * 1e3
+
+    rows = [
+        ("find by name",
+         lambda: [[a for a in plain.animals if a.name == n] for n in names],
+         lambda: [indexed.find_by_name(n) for n in names]),
+        ("find by breed",
+         lambda: [[a for a in plain.animals if isinstance(a, Dog) and a.breed == "Pug"]
+                  for _ in names],
+         lambda: [indexed.find_by_breed("Pug") for _ in names]),
+        ("ages 3..4",
+         lambda: [[a for a in plain.animals if 3 <= a.age <= 4] for _ in names],
+         lambda: [list(indexed.find_by_age(3, 4)) for _ in names]),
+        ("first 10 aged >= 18",
+         lambda: [[a for a in plain.animals if a.age >= 18][:10] for _ in names],
+         lambda: [[a for _, a in zip(range(10), indexed.find_by_age(18))] for _ in names]),
+    ]
+    print(f"  {'query (ms each)':<24} {'list scan':>10} {'indexed':>10}")
+    for label, scan, lookup in rows:
+        print(f"  {label:<24} {timed(scan):10.3f} {timed(lookup):10.3f}")
+
+    animal = indexed.find_by_name("dog-7")[0]
+    updates = 1000
+    start = time.perf_counter()
+    for age in range(updates):
+        animal.age = age % 20
+    elapsed = time.perf_counter() - start
+    print(f"  age update with reindex: {elapsed / updates * 1e6:.1f} us each")
+
+
+def demonstrate_shelter_index():
+    """Show the indexes following adds, removals and age changes."""
+    shelter = IndexedShelter()
+    buddy = Dog("Buddy", 5, "Golden Retriever")
+    rex = Dog("Rex", 2, "Beagle")
+    whiskers = Cat("Whiskers", 8)
+    smokey = HouseCat("Smokey", 3)
+    for animal in (buddy, rex, whiskers, smokey):
+        shelter.add_animal(animal)
+
+    print(f"find_by_name('Rex'): {shelter.find_by_name('Rex')}")
+    print(f"find_by_class(Cat): {shelter.find_by_class(Cat)}")
+    print(f"find_by_breed('Beagle'): {shelter.find_by_breed('Beagle')}")
+    print(f"Ages 3 to 6: {list(shelter.find_by_age(3, 6))}")
+
+    rex.age = 4
+    print(f"\nAfter Rex turns 4, ages 3 to 6: {list(shelter.find_by_age(3, 6))}")
+    shelter.remove_animal(buddy)
+    print(f"After Buddy is adopted: {shelter.list_animals()}")
+    print(f"find_by_class(Animal) count: {len(shelter.find_by_class(Animal))}")
+
+
+if __name__ == "__main__":
+    demonstrate_shelter_index()
+    print()
+    benchmark_shelter_index()
@@ -0,0 +1,80 @@
+"""
+Equivalence tests for fast_fibonacci, with recursivity.fibonacci as the reference.
+
+Run with: python -m pytest test_fast_fibonacci.py
+"""
+
+import random
+
+import pytest
+
+from fast_fibonacci import (fibonacci_batch, fibonacci_fast, fibonacci_matrix,
+                            fibonacci_mod, fibonacci_mod_array)
+from recursivity import fibonacci
+
+SMALL = range(25)
+MODULI = [1, 2, 10, 97, 1_000_000_007, 2 ** 31 - 1]
+
+
+def test_small_n_match_recursive_reference():
+    expected = [fibonacci(n) for n in SMALL]
+    assert [fibonacci_fast(n) for n in SMALL] == expected
+    assert [fibonacci_matrix(n) for n in SMALL] == expected
+    assert fibonacci_batch((n, None) for n in SMALL) == expected
+
+
+@pytest.mark.parametrize("modulus", MODULI)
+def test_small_n_modular_match_recursive_reference(modulus):
+    expected = [fibonacci(n) % modulus for n in SMALL]
+    assert [fibonacci_mod(n, modulus) for n in SMALL] == expected
+    assert [fibonacci_matrix(n, modulus) for n in SMALL] == expected
+    assert fibonacci_batch((n, modulus) for n in SMALL) == expected
+
+
+def test_large_n_exact_methods_agree():
+    rng = random.Random(2)
+    ns = [1000, 4096, 10_000, 65_535] + [rng.randrange(20_000) for _ in range(20)]
+    fast = [fibonacci_fast(n) for n in ns]
+    assert [fibonacci_matrix(n) for n in ns] == fast
+    assert fibonacci_batch((n, None) for n in ns) == fast
+    # F(n + 1) = F(n) + F(n - 1) holds for the big values too.
+    assert fibonacci_fast(10_001) == fibonacci_fast(10_000) + fibonacci_fast(9_999)
+
+
+@pytest.mark.parametrize("modulus", MODULI)
+def test_large_n_modular_methods_agree(modulus):
+    rng = random.Random(modulus)
+    ns = [0, 1, 2, 10**6, 10**12, 2**62 - 1] + [rng.randrange(10**15) for _ in range(30)]
+    expected = [fibonacci_mod(n, modulus) for n in ns]
+    assert [fibonacci_matrix(n, modulus) for n in ns] == expected
+    assert fibonacci_batch((n, modulus) for n in ns) == expected
+    # The first four are small enough to check against the exact value.
+    assert expected[:4] == [fibonacci_fast(n) % modulus for n in ns[:4]]
+
+
+def test_batch_keeps_query_order_and_mixed_moduli():
+    queries = [(30, None), (5, 7), (1000, 97), (0, None), (30, 1000), (5, None)]
+    expected = [fibonacci_fast(n) if m is None else fibonacci_mod(n, m) for n, m in queries]
+    assert fibonacci_batch(queries) == expected
+    assert fibonacci_batch([]) == []
+
+
+@pytest.mark.parametrize("modulus", MODULI)
+def test_numpy_matches_scalar(modulus):
+    np = pytest.importorskip("numpy")
+    rng = random.Random(modulus + 1)
+    ns = list(SMALL) + [rng.randrange(2**62) for _ in range(50)]
+    result = fibonacci_mod_array(np.array(ns, dtype=np.int64), modulus)
+    assert result.tolist() == [fibonacci_mod(n, modulus) for n in ns]
+    assert fibonacci_mod_array([], modulus).tolist() == []
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        fibonacci_fast(-1)
+    with pytest.raises(ValueError):
+        fibonacci_mod(5, 0)
+    with pytest.raises(ValueError):
+        fibonacci_matrix(-1)
+    with pytest.raises(ValueError):
+        fibonacci_batch([(3, None), (-2, None)])
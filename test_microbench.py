@@ -0,0 +1,46 @@
+"""
+Tests for microbench.compare and the performance-tip cases.
+
+Run with: python -m pytest test_microbench.py
+"""
+
+import best_practices
+import microbench
+from microbench import compare
+
+
+def result(median, spread=0.0):
+    return {"median": median, "q1": median - spread, "q3": median + spread}
+
+
+def document(**cases):
+    return {"results": cases}
+
+
+def statuses(baseline, current):
+    return {name: (ratio, status) for name, _, _, ratio, status in compare(baseline, current)}
+
+
+def test_regressions_and_improvements():
+    baseline = document(slower=result(1.0, 0.01), faster=result(1.0, 0.01),
+                        noisy=result(1.0, 0.5), gone=result(1.0))
+    current = document(slower=result(2.0, 0.01), faster=result(0.5, 0.01),
+                       noisy=result(1.5, 0.5), added=result(1.0))
+    assert statuses(baseline, current) == {
+        "slower": (2.0, "regression"), "faster": (0.5, "improvement"),
+        "noisy": (1.5, "unchanged"), "gone": (None, "removed"), "added": (None, "new"),
+    }
+
+
+def test_zero_baseline_median():
+    baseline = document(still_zero=result(0.0), now_measurable=result(0.0))
+    current = document(still_zero=result(0.0), now_measurable=result(1e-6))
+    assert statuses(baseline, current) == {
+        "still_zero": (None, "unchanged"), "now_measurable": (None, "new"),
+    }
+
+
+def test_sum_cases_use_the_best_practices_helpers():
+    assert microbench.number_generator is best_practices.number_generator
+    assert microbench.number_list is best_practices.number_list
+    assert microbench.sum_generator() == microbench.sum_list() == sum(range(microbench.N * 10))
@@ -0,0 +1,43 @@
+"""
+Tests for pipeline stages and parallel_map.
+
+Run with: python -m pytest test_pipeline.py
+"""
+
+import time
+
+import pytest
+
+from pipeline import Pipeline, parallel_map
+
+
+def slow_first(item):
+    if item == 0:
+        time.sleep(1.0)
+    return item * 10
+
+
+def test_pipeline_stages():
+    result = Pipeline(range(10)).map(lambda x: x * x).filter(lambda x: x % 2).batch(2).collect()
+    assert result == [(1, 9), (25, 49), (81,)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3])
+@pytest.mark.parametrize("max_pending", [None, 2])
+def test_ordered_keeps_input_order(chunk_size, max_pending):
+    results = parallel_map(slow_first, range(12), workers=4, chunk_size=chunk_size,
+                           max_pending=max_pending)
+    assert list(results) == [item * 10 for item in range(12)]
+
+
+@pytest.mark.parametrize("max_pending", [None, 2])
+def test_unordered_yields_finished_chunks_first(max_pending):
+    results = list(parallel_map(slow_first, range(8), workers=4, max_pending=max_pending,
+                                ordered=False))
+    assert sorted(results) == [item * 10 for item in range(8)]
+    assert results[-1] == 0  # the slow chunk does not hold back the others
+
+
+def test_process_pool():
+    assert sorted(parallel_map(abs, range(-20, 0), workers=2, kind="process", chunk_size=4,
+                               ordered=False)) == list(range(1, 21))
@@ -0,0 +1,84 @@
+"""
+Tests for the observer support of pythonic_classes.Animal.
+
+Run with: python -m pytest test_pythonic_classes.py
+"""
+
+import copy
+import gc
+import pickle
+import weakref
+
+import pytest
+
+from adoption_queue import AdoptionQueue
+from animal_table import SlottedDog
+from paged_shelter import PagedShelter
+from pythonic_classes import Cat, Dog, HouseCat
+from shelter_index import IndexedShelter
+from shelter_journal import JournaledShelter
+
+
+def fields(animal):
+    return (type(animal), animal.name, animal.age, getattr(animal, "breed", None))
+
+
+@pytest.fixture(params=["indexed", "queue", "paged", "journaled"])
+def shelter(request, tmp_path):
+    if request.param == "journaled":
+        with JournaledShelter(str(tmp_path)) as journaled:
+            yield journaled
+        return
+    yield {"indexed": IndexedShelter, "queue": AdoptionQueue, "paged": PagedShelter}[
+        request.param]()
+
+
+@pytest.mark.parametrize("make", [lambda: Dog("Rex", 2, "Beagle"), lambda: Cat("Tom", 3),
+                                  lambda: HouseCat("Smokey", 4)])
+def test_observed_animals_can_be_pickled_and_copied(shelter, make):
+    animal = make()
+    shelter.add_animal(animal)
+    shelter.list_animals()  # PagedShelter observes animals once it renders them
+    for clone in (pickle.loads(pickle.dumps(animal)), copy.copy(animal),
+                  copy.deepcopy(animal)):
+        assert fields(clone) == fields(animal)
+        assert clone._observers == []
+    assert len(animal._observers) == 1
+
+
+def test_slotted_dog_can_be_pickled_and_copied():
+    dog = SlottedDog("Rex", 2, "Beagle")
+    IndexedShelter().add_animal(dog)
+    for clone in (pickle.loads(pickle.dumps(dog)), copy.copy(dog), copy.deepcopy(dog)):
+        assert (clone.name, clone.age, clone.breed, clone._observers) == ("Rex", 2, "Beagle", [])
+
+
+def test_deepcopy_keeps_shared_references():
+    dog = Dog("Rex", 2, "Beagle")
+    pair = copy.deepcopy([dog, dog])
+    assert pair[0] is pair[1] and pair[0] is not dog
+
+
+def test_breed_change_updates_the_index():
+    shelter = IndexedShelter()
+    dog = Dog("Rex", 2, "Beagle")
+    shelter.add_animal(dog)
+    seen = []
+    dog.add_observer(lambda animal, attribute, old_value: seen.append((attribute, old_value)))
+    dog.breed = "Pug"
+    assert seen == [("breed", "Beagle")]
+    assert shelter.find_by_breed("Beagle") == []
+    assert shelter.find_by_breed("Pug") == [dog]
+
+
+def test_observers_do_not_keep_containers_alive():
+    dog = Dog("Rex", 2, "Beagle")
+    for cls in (IndexedShelter, AdoptionQueue):
+        shelter = cls()
+        shelter.add_animal(dog)
+        reference = weakref.ref(shelter)
+        del shelter
+        gc.collect()
+        assert reference() is None
+    dog.age = 3  # drops the dead references
+    assert dog._observers == []
@@ -0,0 +1,85 @@
+"""
+Query and write tests for sharded_shelter.ShardedShelter.
+
+Run with: python -m pytest test_sharded_shelter.py
+"""
+
+import threading
+
+import pytest
+
+from pythonic_classes import Cat, Dog
+from sharded_shelter import ShardedShelter, _fill
+
+
+def run_with_timeout(function, seconds=30):
+    """Run function in a daemon thread and fail the test if it hangs."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = function()
+        except BaseException as error:  # re-raised in the test thread
+            outcome["error"] = error
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert not thread.is_alive(), "deadlocked"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+@pytest.fixture
+def shelter():
+    with ShardedShelter(shards=2, batch_size=5_000, chunk_size=100) as sharded:
+        yield sharded
+
+
+def test_queries_see_every_write(shelter):
+    shelter.add_animal(Dog("Rex", 2, "Beagle"))
+    shelter.add_animal(Cat("Tom", 4))
+    assert shelter.count() == 2
+    assert list(shelter.filter_by_age(0, 3)) == [("Dog", "Rex", 2, "Beagle")]
+    assert list(shelter.list_species("Cat")) == [("Cat", "Tom", 4, None)]
+
+
+def test_age_filter_is_sorted_and_complete(shelter):
+    _fill(shelter, 3_000)
+    ages = [record[2] for record in shelter.filter_by_age(5, 9)]
+    assert ages == sorted(ages)
+    assert len(ages) == shelter.count(min_age=5, max_age=9)
+
+
+def test_abandoned_stream_is_drained_by_the_next_query(shelter):
+    _fill(shelter, 20_000)
+    records = shelter.filter_by_age(0, 19)
+    next(records)
+    assert run_with_timeout(shelter.count) == 20_000
+    with pytest.raises(RuntimeError):
+        list(records)  # raises once the buffered chunk is used up
+
+
+@pytest.mark.parametrize("query", ["filter_by_age", "list_species"])
+def test_writes_during_an_open_stream(query):
+    # Both the result stream and the batches are far larger than the pipe
+    # buffers, so a shard blocked on sending results never reads a batch.
+    shelter = ShardedShelter(shards=2, batch_size=50_000, chunk_size=1_000)
+    try:
+        _fill(shelter, 200_000)
+        records = shelter.filter_by_age(0, 19) if query == "filter_by_age" else \
+            shelter.list_species("Dog")
+        next(records)
+
+        def write_more():
+            for i in range(4 * shelter.batch_size):  # full batches for both shards
+                shelter.add_record("Cat", f"late-{i}", 1)
+            shelter.flush()
+            return shelter.count()
+
+        assert run_with_timeout(write_more) == 200_000 + 4 * shelter.batch_size
+        with pytest.raises(RuntimeError):
+            list(records)  # raises once the buffered chunk is used up
+    finally:
+        run_with_timeout(shelter.close)
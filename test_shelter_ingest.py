@@ -0,0 +1,62 @@
+"""
+Bad-row tests for shelter_ingest.ingest, for CSV and NDJSON files.
+
+Run with: python -m pytest test_shelter_ingest.py
+"""
+
+import json
+
+import pytest
+
+from shelter_ingest import ingest
+
+GOOD = [("dog", "Buddy", 5, "Golden Retriever"), ("cat", "Whiskers", 8, None),
+        ("housecat", "Smokey", 3, None)]
+
+
+def write_csv(path, bad_line):
+    lines = [b"type,name,age,breed"]
+    lines += [f"{kind},{name},{age},{breed or ''}".encode("utf-8")
+              for kind, name, age, breed in GOOD]
+    lines.insert(2, bad_line)
+    path.write_bytes(b"\n".join(lines) + b"\n")
+
+
+def write_ndjson(path, bad_line):
+    lines = [json.dumps({"type": kind, "name": name, "age": age, "breed": breed}).encode("utf-8")
+             for kind, name, age, breed in GOOD]
+    lines.insert(1, bad_line)
+    path.write_bytes(b"\n".join(lines) + b"\n")
+
+
+def loaded(shelter):
+    return sorted((type(animal).__name__.lower(), animal.name, animal.age,
+                   getattr(animal, "breed", None)) for animal in shelter.animals)
+
+
+CASES = [
+    ("csv", write_csv, b"dog,Rex\xff\xfe,2,Beagle"),
+    ("csv", write_csv, b"dog,Rex,two,Beagle"),
+    ("csv", write_csv, b"bird,Tweety,1,"),
+    ("ndjson", write_ndjson, b'{"type": "dog", "name": "Rex\xff\xfe", "age": 2}'),
+    ("ndjson", write_ndjson, b'{"type": "dog", "name": "Rex", "age": "two"}'),
+    ("ndjson", write_ndjson, b'{"type": "dog", "name": '),
+]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+@pytest.mark.parametrize("suffix, write, bad_line", CASES)
+def test_bad_rows_are_skipped(tmp_path, workers, suffix, write, bad_line):
+    path = tmp_path / f"animals.{suffix}"
+    write(path, bad_line)
+    shelter, stats = ingest(str(path), workers=workers, chunk_bytes=16, skip_errors=True)
+    assert (stats.rows, stats.skipped) == (3, 1)
+    assert loaded(shelter) == sorted(GOOD)
+
+
+@pytest.mark.parametrize("suffix, write, bad_line", CASES)
+def test_bad_rows_raise_without_skip_errors(tmp_path, suffix, write, bad_line):
+    path = tmp_path / f"animals.{suffix}"
+    write(path, bad_line)
+    with pytest.raises(ValueError):
+        ingest(str(path), workers=0)
@@ -0,0 +1,157 @@
+"""
+Crash-recovery tests for shelter_journal.JournaledShelter.
+
+Run with: python -m pytest test_shelter_journal.py
+"""
+
+import os
+import shutil
+
+import pytest
+
+from pythonic_classes import Cat, Dog, HouseCat
+from shelter_journal import JournaledShelter, _encode_add, _frame
+
+
+def state(shelter):
+    """Return the shelter contents as comparable tuples."""
+    return [(type(animal).__name__, animal.name, animal.age, getattr(animal, "breed", None))
+            for animal in shelter.animals]
+
+
+def fill(shelter):
+    """Add a few animals and change some of them."""
+    shelter.add_animal(Dog("Buddy", 5, "Golden Retriever"))
+    shelter.add_animal(Dog("Rex", 2, None))
+    whiskers = Cat("Whiskers", 8)
+    shelter.add_animal(whiskers)
+    shelter.add_animal(HouseCat("Smokey", 3))
+    whiskers.age = 9
+    whiskers.name = "Sir Whiskers"
+
+
+EXPECTED = [
+    ("Dog", "Buddy", 5, "Golden Retriever"),
+    ("Dog", "Rex", 2, None),
+    ("Cat", "Sir Whiskers", 9, None),
+    ("HouseCat", "Smokey", 3, None),
+]
+
+
+def test_clean_reopen(tmp_path):
+    with JournaledShelter(str(tmp_path)) as shelter:
+        fill(shelter)
+    with JournaledShelter(str(tmp_path)) as shelter:
+        assert state(shelter) == EXPECTED
+        assert shelter.recovered_records == 6
+
+
+def test_dog_without_breed_keeps_none(tmp_path):
+    with JournaledShelter(str(tmp_path)) as shelter:
+        shelter.add_animal(Dog("Rex", 2, None))
+        shelter.add_animal(Dog("Blank", 4, ""))
+        shelter.snapshot()
+        shelter.add_animal(Dog("Late", 1, None))
+    with JournaledShelter(str(tmp_path)) as shelter:
+        assert [animal.breed for animal in shelter.animals] == [None, "", None]
+
+
+def test_snapshot_then_journal(tmp_path):
+    with JournaledShelter(str(tmp_path)) as shelter:
+        fill(shelter)
+        shelter.snapshot()
+        shelter.remove_animal(shelter.animals[0])
+        shelter.animals[0].age = 3
+    with JournaledShelter(str(tmp_path)) as shelter:
+        assert state(shelter) == [("Dog", "Rex", 3, None)] + EXPECTED[2:]
+        assert shelter.recovered_records == 2
+    assert sorted(os.listdir(tmp_path)) == ["journal-1.bin", "snapshot.bin"]
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    shelter = JournaledShelter(str(tmp_path), sync_every=1)
+    fill(shelter)
+    shelter._journal.write(_frame(_encode_add(99, Cat("Ghost", 1)))[:-5])
+    shelter._journal.flush()
+    path = shelter._journal_path(0)
+    torn_size = os.path.getsize(path)
+    # The process "dies" here without calling close().
+
+    with JournaledShelter(str(tmp_path)) as shelter:
+        assert state(shelter) == EXPECTED
+        assert os.path.getsize(path) < torn_size
+        shelter.add_animal(Cat("Tom", 2))
+    with JournaledShelter(str(tmp_path)) as shelter:
+        assert state(shelter) == EXPECTED + [("Cat", "Tom", 2, None)]
+
+
+def test_unsynced_records_are_lost_but_state_is_consistent(tmp_path):
+    with JournaledShelter(str(tmp_path)) as shelter:
+        fill(shelter)
+    shelter = JournaledShelter(str(tmp_path), sync_every=0)
+    shelter.add_animal(Cat("Unsynced", 1))
+    # Crash before the buffered record was written.
+    with JournaledShelter(str(tmp_path)) as reopened:
+        assert state(reopened) == EXPECTED
+
+
+def test_crash_between_snapshot_rename_and_journal_removal(tmp_path):
+    directory = str(tmp_path)
+    with JournaledShelter(directory) as shelter:
+        fill(shelter)
+    old_journal = os.path.join(directory, "journal-0.bin")
+    saved = str(tmp_path / "saved-journal")
+    shutil.copyfile(old_journal, saved)
+
+    with JournaledShelter(directory, sync_every=1) as shelter:
+        shelter.snapshot()
+        shelter.add_animal(Cat("Tom", 2))
+    # Put the old journal back, as if snapshot() died right after the rename.
+    shutil.move(saved, old_journal)
+
+    with JournaledShelter(directory) as shelter:
+        assert state(shelter) == EXPECTED + [("Cat", "Tom", 2, None)]
+        assert shelter.recovered_records == 1
+    assert not os.path.exists(old_journal)
+
+
+def test_crash_before_snapshot_rename(tmp_path):
+    directory = str(tmp_path)
+    with JournaledShelter(directory) as shelter:
+        fill(shelter)
+    # A half-written snapshot and the new, empty journal of the next generation.
+    with open(os.path.join(directory, "snapshot.bin.tmp"), "wb") as file:
+        file.write(b"SHELTER2 partial")
+    open(os.path.join(directory, "journal-1.bin"), "wb").close()
+
+    with JournaledShelter(directory) as shelter:
+        assert state(shelter) == EXPECTED
+    assert sorted(os.listdir(directory)) == ["journal-0.bin"]
+
+
+def test_breed_changes_are_journaled(tmp_path):
+    with JournaledShelter(str(tmp_path)) as shelter:
+        fill(shelter)
+        buddy, rex = shelter.animals[:2]
+        buddy.breed = "Pug"
+        rex.breed = "Beagle"
+    with JournaledShelter(str(tmp_path)) as shelter:
+        assert [animal.breed for animal in shelter.animals[:2]] == ["Pug", "Beagle"]
+        shelter.animals[0].breed = None
+    with JournaledShelter(str(tmp_path)) as shelter:
+        assert [animal.breed for animal in shelter.animals[:2]] == [None, "Beagle"]
+
+
+def test_close_stops_watching_the_animals(tmp_path):
+    shelter = JournaledShelter(str(tmp_path), sync_every=1)
+    fill(shelter)
+    buddy = shelter.animals[0]
+    shelter.close()
+    buddy.age = 30  # no longer journaled, and must not fail
+    buddy.breed = "Pug"
+    assert buddy._observers == []
+    with pytest.raises(ValueError):
+        shelter.add_animal(Cat("Late", 1))
+    shelter.close()  # closing twice is harmless
+    with JournaledShelter(str(tmp_path)) as reopened:
+        assert state(reopened) == EXPECTED
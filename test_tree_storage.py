@@ -0,0 +1,109 @@
+"""
+Save/load round-trip tests for tree_storage.
+
+Run with: python -m pytest test_tree_storage.py
+"""
+
+import pytest
+
+from compact_tree import NO_CHILD, ArrayTree
+from recursivity import TreeNode
+from tree_storage import _CHUNK_NODES, load_tree, save_tree
+from tree_traversal import build_balanced_tree, build_skewed_tree
+
+
+def columns(tree):
+    """Return the columns of an ArrayTree as plain lists."""
+    return ([value.item() if hasattr(value, "item") else value for value in tree.values],
+            [int(index) for index in tree.left],
+            [int(index) for index in tree.right],
+            tree.root_index)
+
+
+def round_trip(tmp_path, tree, use_mmap, **options):
+    """Save tree, load it back and return the loaded columns."""
+    path = str(tmp_path / "tree.bin")
+    save_tree(tree, path, **options)
+    with load_tree(path, use_mmap=use_mmap) as loaded:
+        return columns(loaded), list(loaded.iter_inorder())
+
+
+@pytest.fixture(params=[True, False], ids=["mmap", "read"])
+def use_mmap(request):
+    return request.param
+
+
+def test_empty_tree(tmp_path, use_mmap):
+    (values, left, right, root), inorder = round_trip(tmp_path, None, use_mmap)
+    assert (values, left, right, root, inorder) == ([], [], [], NO_CHILD, [])
+
+
+def test_single_node(tmp_path, use_mmap):
+    loaded, inorder = round_trip(tmp_path, TreeNode(42), use_mmap)
+    assert loaded == ([42], [NO_CHILD], [NO_CHILD], 0)
+    assert inorder == [42]
+
+
+def test_linked_tree(tmp_path, use_mmap):
+    root = build_balanced_tree(range(100))
+    loaded, inorder = round_trip(tmp_path, root, use_mmap)
+    assert loaded == columns(ArrayTree.from_treenode(root))
+    assert inorder == list(range(100))
+
+
+def test_float_values(tmp_path, use_mmap):
+    values = [-1.5, 0.0, 0.1, 2.25, 1e300]
+    loaded, inorder = round_trip(tmp_path, build_balanced_tree(values), use_mmap, typecode="d")
+    assert inorder == values
+    assert all(type(value) is float for value in loaded[0])
+
+
+def test_array_tree_across_chunks(tmp_path, use_mmap):
+    tree = ArrayTree.from_sorted(range(_CHUNK_NODES + 10))
+    loaded, inorder = round_trip(tmp_path, tree, use_mmap)
+    assert loaded == columns(tree)
+    assert inorder == list(range(_CHUNK_NODES + 10))
+
+
+def test_skewed_tree(tmp_path, use_mmap):
+    root = build_skewed_tree(range(5000))
+    loaded, inorder = round_trip(tmp_path, root, use_mmap)
+    assert loaded == columns(ArrayTree.from_treenode(root))
+    assert inorder == list(range(5000))
+
+
+@pytest.mark.parametrize("dtype", ["int64", "float64"])
+def test_numpy_backed_tree(tmp_path, use_mmap, dtype):
+    np = pytest.importorskip("numpy")
+    tree = ArrayTree.from_sorted(np.arange(1000, dtype=dtype), storage="numpy")
+    loaded, inorder = round_trip(tmp_path, tree, use_mmap)
+    assert loaded == columns(tree)
+    assert inorder == list(range(1000))
+
+
+@pytest.mark.parametrize("typecode", ["q", "d"])
+def test_loaded_tree_round_trips_again(tmp_path, use_mmap, typecode):
+    first = str(tmp_path / "first.bin")
+    save_tree(build_balanced_tree([i / 2 if typecode == "d" else i for i in range(50)]),
+              first, typecode=typecode)
+    with load_tree(first, use_mmap=use_mmap) as loaded:
+        expected = columns(loaded)
+        loaded, _ = round_trip(tmp_path, loaded, use_mmap)
+    assert loaded == expected
+
+
+def test_invalid_files(tmp_path):
+    path = str(tmp_path / "tree.bin")
+    with open(path, "wb") as file:
+        file.write(b"NOTATREE" * 8)
+    with pytest.raises(ValueError):
+        load_tree(path)
+
+    save_tree(build_balanced_tree(range(10)), path)
+    with open(path, "r+b") as file:
+        file.truncate(40)
+    with pytest.raises(ValueError):
+        load_tree(path)
+
+    with pytest.raises(FileNotFoundError):
+        load_tree(str(tmp_path / "missing.bin"))
@@ -0,0 +1,143 @@
+"""
+Tests for tree_traversal, with recursivity.inorder_traversal as the reference.
+
+Run with: python -m pytest test_tree_traversal.py
+"""
+
+import random
+from itertools import islice
+
+import pytest
+
+from recursivity import TreeNode, inorder_traversal
+from tree_traversal import (build_balanced_tree, build_skewed_tree, iter_inorder,
+                            iter_level_order, iter_postorder, iter_preorder,
+                            morris_inorder, traverse)
+
+
+def preorder_reference(root):
+    if root is None:
+        return []
+    return [root.value] + preorder_reference(root.left) + preorder_reference(root.right)
+
+
+def postorder_reference(root):
+    if root is None:
+        return []
+    return postorder_reference(root.left) + postorder_reference(root.right) + [root.value]
+
+
+def level_order_reference(root):
+    levels = {}
+
+    def visit(node, depth):
+        if node is not None:
+            levels.setdefault(depth, []).append(node.value)
+            visit(node.left, depth + 1)
+            visit(node.right, depth + 1)
+
+    visit(root, 0)
+    return [value for depth in sorted(levels) for value in levels[depth]]
+
+
+def right_chain(values):
+    """Build a tree where every node only has a right child."""
+    root = None
+    for value in reversed(values):
+        node = TreeNode(value)
+        node.right = root
+        root = node
+    return root
+
+
+def random_tree(count, seed):
+    """Build a randomly shaped tree by inserting shuffled keys into a search tree."""
+    rng = random.Random(seed)
+    keys = list(range(count))
+    rng.shuffle(keys)
+    root = None
+    for key in keys:
+        node = TreeNode(key)
+        if root is None:
+            root = node
+            continue
+        parent = root
+        while True:
+            side = "left" if key < parent.value else "right"
+            child = getattr(parent, side)
+            if child is None:
+                setattr(parent, side, node)
+                break
+            parent = child
+    return root
+
+
+def shape(root):
+    """Return the structure of a tree as nested tuples (to detect changes)."""
+    if root is None:
+        return None
+    return (root.value, shape(root.left), shape(root.right))
+
+
+TREES = {
+    "empty": lambda: None,
+    "single": lambda: TreeNode(7),
+    "balanced": lambda: build_balanced_tree(range(100)),
+    "left chain": lambda: build_skewed_tree(range(300)),
+    "right chain": lambda: right_chain(list(range(300))),
+    "random": lambda: random_tree(500, seed=1),
+    "random small": lambda: random_tree(20, seed=2),
+    "duplicates": lambda: build_balanced_tree([3, 3, 1, 1, 2]),
+}
+
+
+@pytest.fixture(params=list(TREES), ids=list(TREES))
+def tree(request):
+    return TREES[request.param]()
+
+
+def test_inorder_matches_reference(tree):
+    expected = inorder_traversal(tree)
+    assert list(iter_inorder(tree)) == expected
+    assert list(traverse(tree)) == expected
+
+
+def test_morris_matches_reference_and_restores_tree(tree):
+    before = shape(tree)
+    assert list(morris_inorder(tree)) == inorder_traversal(tree)
+    assert shape(tree) == before
+
+
+def test_other_orders_match_recursive_definitions(tree):
+    assert list(iter_preorder(tree)) == preorder_reference(tree)
+    assert list(iter_postorder(tree)) == postorder_reference(tree)
+    assert list(iter_level_order(tree)) == level_order_reference(tree)
+    assert list(traverse(tree, "preorder")) == preorder_reference(tree)
+    assert list(traverse(tree, "postorder")) == postorder_reference(tree)
+    assert list(traverse(tree, "level")) == level_order_reference(tree)
+
+
+@pytest.mark.parametrize("stop", [0, 1, 5, 50, 299])
+def test_morris_early_close_restores_tree(stop):
+    for build in (lambda: random_tree(300, seed=3), lambda: build_balanced_tree(range(300)),
+                  lambda: right_chain(list(range(300)))):
+        root = build()
+        before = shape(root)
+        expected = inorder_traversal(root)
+        walk = morris_inorder(root)
+        assert list(islice(walk, stop)) == expected[:stop]
+        walk.close()
+        assert shape(root) == before
+        assert list(morris_inorder(root)) == expected
+
+
+def test_iterators_are_lazy_on_deep_trees():
+    root = build_skewed_tree(range(100_000))  # far deeper than the recursion limit
+    assert list(islice(iter_inorder(root), 3)) == [0, 1, 2]
+    assert sum(1 for _ in iter_postorder(root)) == 100_000
+    assert list(morris_inorder(root))[-1] == 99_999
+
+
+def test_unknown_order():
+    with pytest.raises(ValueError):
+        traverse(TreeNode(1), "sideways")
@@ -0,0 +1,237 @@
+"""
+trampoline.py: Stack-safe recursion without raising the recursion limit
+
+Python does not optimize tail calls, so even recursivity.factorial_tail
+overflows the stack for large n. This module covers:
+1. tail_recursive: runs self tail calls in a constant-stack loop
+2. stack_safe: a continuation (generator) based mode for non-tail recursion
+3. A benchmark of both against plain recursion and sys.setrecursionlimit
+
+Both decorators work the same way: while the decorated function is running,
+a call to itself does not recurse. It returns a small "pending call" object
+instead, and a loop in the decorator runs that call. The depth of the
+recursion is then only limited by memory.
+"""
+
+import functools
+import sys
+import threading
+import timeit
+import types
+
+from recursivity import factorial_tail, inorder_traversal
+from tree_traversal import build_balanced_tree, build_skewed_tree
+
+
+class _TailCall:
+    """A pending self call, returned instead of recursing."""
+
+    __slots__ = ("args", "kwargs")
+
+    def __init__(self, args, kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+
+def rebind_self(func, wrapper):
+    """
+    Return a copy of func whose own name resolves to wrapper.
+
+    This lets the decorators work on functions defined elsewhere, such as
+    recursivity.factorial_tail, whose recursive call looks up the original
+    function in its module globals. Only that case needs a copy, and the copy
+    sees a snapshot of those globals. With decorator syntax the name is not
+    bound yet (or still bound to an older definition) and is rebound to
+    wrapper afterwards, so func is returned unchanged and keeps seeing the
+    live module globals, including names defined below it.
+    """
+    if func.__globals__.get(func.__name__) is not func:
+        return func
+    namespace = dict(func.__globals__)
+    namespace[func.__name__] = wrapper
+    rebound = types.FunctionType(func.__code__, namespace, func.__name__,
+                                 func.__defaults__, func.__closure__)
+    rebound.__kwdefaults__ = func.__kwdefaults__
+    return rebound
+
+
+def tail_recursive(func):
+    """
+    Run the tail calls of func in a loop instead of on the stack.
+
+    Every recursive call in func must be a tail call (its result is returned
+    as is), like the call in recursivity.factorial_tail. A call that is not a
+    tail call would receive a pending call object instead of a value.
+
+    Args:
+        func (callable): The accumulator-style recursive function.
+
+    Returns:
+        callable: A function with the same signature that never grows the stack.
+
+    Example:
+        >>> safe_factorial = tail_recursive(factorial_tail)
+        >>> safe_factorial(5)
+        120
+    """
+    state = threading.local()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(state, "active", False):
+            return _TailCall(args, kwargs)
+        state.active = True
+        try:
+            result = body(*args, **kwargs)
+            while type(result) is _TailCall:
+                result = body(*result.args, **result.kwargs)
+            return result
+        finally:
+            state.active = False
+
+    body = rebind_self(func, wrapper)
+    return wrapper
+
+
+def stack_safe(func):
+    """
+    Run a general recursive generator function on an explicit stack.
+
+    The decorated function is written as a generator that yields its
+    recursive calls and receives their results, so the driver can keep the
+    suspended callers in a list instead of on the interpreter stack:
+
+        @stack_safe
+        def depth(node):
+            if node is None:
+                return 0
+            left = yield depth(node.left)
+            right = yield depth(node.right)
+            return 1 + max(left, right)
+
+    Args:
+        func (callable): A generator function that yields its self calls.
+
+    Returns:
+        callable: A function that returns the final value directly.
+    """
+    state = threading.local()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(state, "active", False):
+            return _TailCall(args, kwargs)
+        state.active = True
+        try:
+            stack = [body(*args, **kwargs)]
+            value = None
+            while stack:
+                try:
+                    request = stack[-1].send(value)
+                except StopIteration as finished:
+                    stack.pop()
+                    value = finished.value
+                    continue
+                if type(request) is not _TailCall:
+                    raise TypeError(f"{func.__name__} must only yield calls to itself")
+                stack.append(body(*request.args, **request.kwargs))
+                value = None
+            return value
+        finally:
+            state.active = False
+
+    body = rebind_self(func, wrapper)
+    return wrapper
+
+
+# Stack-safe versions of the functions from recursivity.py.
+safe_factorial_tail = tail_recursive(factorial_tail)
+
+
+@stack_safe
+def safe_inorder_traversal(root):
+    """
+    Perform an inorder traversal that works on trees of any depth.
+
+    Args:
+        root (TreeNode): The root of the binary tree.
+
+    Returns:
+        list: The values of the nodes in inorder.
+    """
+    if root is None:
+        return []
+    values = yield safe_inorder_traversal(root.left)
+    values.append(root.value)
+    values.extend((yield safe_inorder_traversal(root.right)))
+    return values
+
+
+def _sum_to(n, accumulator=0):
+    """Add up 1..n with a tail call (cheap per step, to measure overhead)."""
+    if n == 0:
+        return accumulator
+    return _sum_to(n - 1, accumulator + n)
+
+
+def _time(func, number=1, repeat=3):
+    """Return the best time in milliseconds for one call of func."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e3
+
+
+def benchmark_trampoline():
+    """Compare trampolined calls with plain recursion."""
+    safe_sum = tail_recursive(_sum_to)
+    old_limit = sys.getrecursionlimit()
+
+    print("Tail calls, n = 900 (fits on the default stack):")
+    print(f"  plain recursion        {_time(lambda: _sum_to(900), 20):8.3f} ms")
+    print(f"  tail_recursive         {_time(lambda: safe_sum(900), 20):8.3f} ms")
+
+    print("\nTail calls, n = 50,000:")
+    sys.setrecursionlimit(60_000)
+    try:
+        hack = _time(lambda: _sum_to(50_000))
+    except RecursionError:  # the C stack can still run out first
+        hack = float("nan")
+    finally:
+        sys.setrecursionlimit(old_limit)
+    print(f"  setrecursionlimit hack {hack:8.3f} ms")
+    print(f"  tail_recursive         {_time(lambda: safe_sum(50_000)):8.3f} ms")
+    print(f"  tail_recursive, 10**6  {_time(lambda: safe_sum(1_000_000), repeat=1):8.3f} ms")
+
+    print("\nNon-tail recursion, inorder traversal of a balanced tree (2**16 nodes):")
+    tree = build_balanced_tree(range(2 ** 16))
+    print(f"  inorder_traversal      {_time(lambda: inorder_traversal(tree)):8.3f} ms")
+    print(f"  stack_safe version     {_time(lambda: safe_inorder_traversal(tree)):8.3f} ms")
+
+    print("\nNon-tail recursion, a left-leaning chain of 100,000 nodes:")
+    chain = build_skewed_tree(range(100_000))
+    print(f"  stack_safe version     {_time(lambda: safe_inorder_traversal(chain)):8.3f} ms")
+
+
+def demonstrate_trampoline():
+    """Show the decorators handling recursion far beyond the default limit."""
+    limit = sys.getrecursionlimit()
+    print(f"Recursion limit: {limit}")
+
+    print("\n1. Tail recursion with tail_recursive:")
+    print(f"factorial_tail(5) = {safe_factorial_tail(5)}")
+    try:
+        factorial_tail(limit * 2)
+    except RecursionError:
+        print(f"factorial_tail({limit * 2}) raises RecursionError")
+    bits = safe_factorial_tail(limit * 2).bit_length()
+    print(f"safe_factorial_tail({limit * 2}) works: {bits} bits")
+
+    print("\n2. Non-tail recursion with stack_safe:")
+    chain = build_skewed_tree(range(limit * 10))
+    values = safe_inorder_traversal(chain)
+    print(f"Inorder traversal of a {len(values)}-node chain: "
+          f"{values[:3]} ... {values[-3:]}")
+
+
+if __name__ == "__main__":
+    demonstrate_trampoline()
+    print()
+    benchmark_trampoline()
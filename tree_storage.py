@@ -0,0 +1,284 @@
+"""
+tree_storage.py: Saving binary trees to disk and loading them with mmap
+
+A TreeNode tree only exists in memory, so every restart means rebuilding it
+from scratch. This module covers:
+1. A compact binary file format with a header and fixed-width node records
+2. Loading a file through mmap, so a reader can traverse or search a
+   multi-GB tree without turning it into Python objects first
+3. A load-time benchmark
+
+File layout (all numbers little-endian):
+
+    header   magic b"PYTREE", version (u16), value type code ("q" or "d"),
+             padding, node count (u64), root index (i64)     -- 32 bytes
+    records  one per node: value, left index, right index   -- 24 bytes each
+
+A missing child is stored as -1, the same convention as compact_tree.ArrayTree,
+and a loaded file is exposed as an ArrayTree whose columns are zero-copy views
+into the mapped file.
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+from compact_tree import ArrayTree
+from recursivity import TreeNode
+
+MAGIC = b"PYTREE"
+VERSION = 1
+HEADER = struct.Struct("<6sHc7xQq")
+RECORD = struct.Struct("<8sqq")
+FIELDS_PER_RECORD = 3
+VALUE_TYPECODES = ("q", "d")
+
+# Nodes are written in chunks of this many records to keep memory bounded.
+_CHUNK_NODES = 1 << 16
+
+
+class MappedTree(ArrayTree):
+    """
+    An ArrayTree whose columns point straight into a memory-mapped file.
+
+    Use it as a context manager, or call close(), to release the mapping.
+    The mapping is copy-on-write, so traversals that modify the tree
+    temporarily (such as morris_inorder) never change the file.
+    """
+
+    def __init__(self, buffer, typecode, node_count, root_index, mapping=None, file=None):
+        """
+        Initialize the tree from a buffer holding the node records.
+
+        Args:
+            buffer: The bytes of the records section (mmap or bytearray).
+            typecode (str): The value type code from the header.
+            node_count (int): The number of records.
+            root_index (int): The root index from the header.
+            mapping (mmap.mmap, optional): The mapping to close with the tree.
+            file (file object, optional): The file to close with the tree.
+        """
+        self._mapping = mapping
+        self._file = file
+        whole = memoryview(buffer)
+        records = whole[HEADER.size:HEADER.size + node_count * RECORD.size]
+        as_values = records.cast(typecode)
+        as_indexes = records.cast("q")
+        self._views = [whole, records, as_values, as_indexes]
+        values = as_values[0::FIELDS_PER_RECORD]
+        left = as_indexes[1::FIELDS_PER_RECORD]
+        right = as_indexes[2::FIELDS_PER_RECORD]
+        self._views += [values, left, right]
+        super().__init__(values, left, right, root_index)
+
+    def close(self):
+        """Release the views and close the mapping and file."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def save_tree(tree, path, typecode="q"):
+    """
+    Write a tree to a file in the binary tree format.
+
+    Args:
+        tree (TreeNode or ArrayTree): The tree to save. Linked trees are
+            converted to an ArrayTree first.
+        path (str): The file to write.
+        typecode (str): "q" for 64-bit integer values, "d" for floats. Ignored
+            when tree is already an ArrayTree, whose own column type is used.
+    """
+    if not isinstance(tree, ArrayTree):
+        tree = ArrayTree.from_treenode(tree, typecode=typecode)
+    if isinstance(tree.values, array):
+        typecode = tree.values.typecode
+    elif isinstance(tree.values, memoryview):  # a loaded MappedTree
+        typecode = tree.values.format
+    elif hasattr(tree.values, "dtype"):  # NumPy storage
+        typecode = "d" if tree.values.dtype.kind == "f" else "q"
+    if typecode not in VALUE_TYPECODES:
+        raise ValueError(f"Unsupported value type code: {typecode!r}")
+
+    count = len(tree)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, typecode.encode(), count, tree.root_index))
+        for start in range(0, count, _CHUNK_NODES):
+            stop = min(start + _CHUNK_NODES, count)
+            chunk = bytearray((stop - start) * RECORD.size)
+            view = memoryview(chunk)
+            # Interleave the three columns into records in one step each.
+            view.cast(typecode)[0::FIELDS_PER_RECORD] = _column(tree.values, start, stop, typecode)
+            indexes = view.cast("q")
+            indexes[1::FIELDS_PER_RECORD] = _column(tree.left, start, stop, "q")
+            indexes[2::FIELDS_PER_RECORD] = _column(tree.right, start, stop, "q")
+            if sys.byteorder == "big":
+                swapped = array("q", chunk)
+                swapped.byteswap()
+                chunk = swapped.tobytes()
+            file.write(chunk)
+
+
+def _column(column, start, stop, typecode):
+    """Return column[start:stop] as an array with the given type code."""
+    part = column[start:stop]
+    if isinstance(part, array) and part.typecode == typecode:
+        return part
+    return array(typecode, part.tolist() if hasattr(part, "tolist") else part)
+
+
+def _read_header(header_bytes):
+    """Parse and validate a file header."""
+    if len(header_bytes) < HEADER.size:
+        raise ValueError("File is too short to be a tree file")
+    magic, version, typecode, count, root_index = HEADER.unpack_from(header_bytes)
+    if magic != MAGIC:
+        raise ValueError("Not a tree file (bad magic number)")
+    if version != VERSION:
+        raise ValueError(f"Unsupported tree file version: {version}")
+    typecode = typecode.decode()
+    if typecode not in VALUE_TYPECODES:
+        raise ValueError(f"Unsupported value type code: {typecode!r}")
+    return typecode, count, root_index
+
+
+def load_tree(path, use_mmap=True):
+    """
+    Open a tree file as a MappedTree.
+
+    With use_mmap the file is mapped and nothing is read until a node is
+    accessed, so opening takes the same time for any file size. Otherwise
+    the whole file is read into memory first.
+
+    Args:
+        path (str): The file to open.
+        use_mmap (bool): Map the file instead of reading it (default True).
+
+    Returns:
+        MappedTree: The tree. Close it when done.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not a valid tree file.
+    """
+    file = open(path, "rb")
+    try:
+        typecode, count, root_index = _read_header(file.read(HEADER.size))
+        expected = HEADER.size + count * RECORD.size
+        if os.fstat(file.fileno()).st_size < expected:
+            raise ValueError("Tree file is truncated")
+
+        if sys.byteorder == "big":
+            use_mmap = False  # the records must be byte-swapped in memory
+        if use_mmap:
+            mapping = mmap.mmap(file.fileno(), expected, access=mmap.ACCESS_COPY)
+            return MappedTree(mapping, typecode, count, root_index, mapping, file)
+
+        file.seek(0)
+        buffer = bytearray(file.read(expected))
+        file.close()
+        if sys.byteorder == "big":
+            swapped = array("q", buffer[HEADER.size:])
+            swapped.byteswap()
+            buffer[HEADER.size:] = swapped.tobytes()
+        return MappedTree(buffer, typecode, count, root_index)
+    except BaseException:
+        file.close()
+        raise
+
+
+def _to_linked(path):
+    """Load a tree file and rebuild it as TreeNode objects (the slow way)."""
+    with load_tree(path, use_mmap=False) as tree:
+        return tree.to_treenode()
+
+
+def benchmark_loading(size=1_000_000):
+    """Compare the cost of getting a saved tree back."""
+    from tree_traversal import build_balanced_tree
+
+    with tempfile.TemporaryDirectory() as directory:
+        tree_path = os.path.join(directory, "tree.bin")
+        pickle_path = os.path.join(directory, "tree.pickle")
+
+        start = time.perf_counter()
+        save_tree(ArrayTree.from_sorted(range(size)), tree_path)
+        save_time = time.perf_counter() - start
+        linked = build_balanced_tree(range(size))
+        old_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(10_000)  # pickle recurses once per tree level
+        try:
+            with open(pickle_path, "wb") as file:
+                pickle.dump(linked, file, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            sys.setrecursionlimit(old_limit)
+        del linked
+
+        print(f"Balanced tree with {size:,} nodes, "
+              f"{os.path.getsize(tree_path) / 2 ** 20:.1f} MiB on disk "
+              f"(saved in {save_time * 1e3:.1f} ms)")
+
+        def timed(label, func):
+            start = time.perf_counter()
+            result = func()
+            print(f"  {label:<36} {(time.perf_counter() - start) * 1e3:10.3f} ms")
+            return result
+
+        with timed("open with mmap", lambda: load_tree(tree_path)) as tree:
+            timed("  then find one key", lambda: tree.find(size // 3))
+            timed("  then full inorder traversal", lambda: sum(tree.iter_inorder()))
+        timed("read into memory", lambda: load_tree(tree_path, use_mmap=False)).close()
+        timed("rebuild as TreeNode objects", lambda: _to_linked(tree_path))
+
+        def unpickle():
+            with open(pickle_path, "rb") as file:
+                return pickle.load(file)
+
+        timed("pickle.load of TreeNode objects", unpickle)
+
+
+def demonstrate_tree_storage():
+    """Save the example tree from recursivity.py and load it back."""
+    root = TreeNode(1)
+    root.left = TreeNode(2)
+    root.right = TreeNode(3)
+    root.left.left = TreeNode(4)
+    root.left.right = TreeNode(5)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "example.tree")
+        save_tree(root, path)
+        print(f"Saved 5 nodes in {os.path.getsize(path)} bytes "
+              f"({HEADER.size}-byte header + {RECORD.size} bytes per node)")
+
+        with load_tree(path) as tree:
+            print(f"Loaded with mmap, inorder: {list(tree.iter_inorder())}")
+            print(f"Preorder: {list(tree.iter_preorder())}")
+
+        path = os.path.join(directory, "search.tree")
+        save_tree(ArrayTree.from_sorted([x * 0.5 for x in range(100)], typecode="d"), path)
+        with load_tree(path) as tree:
+            print(f"Float search tree: 12.5 found: {12.5 in tree}, 12.25 found: {12.25 in tree}")
+
+
+if __name__ == "__main__":
+    demonstrate_tree_storage()
+    print()
+    benchmark_loading()
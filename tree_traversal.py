@@ -0,0 +1,300 @@
+"""
+tree_traversal.py: Streaming, non-recursive traversals of TreeNode trees
+
+recursivity.inorder_traversal concatenates lists at every level, which is
+O(n^2) on skewed trees and overflows the stack on deep ones. This module
+covers:
+1. Generator traversals (inorder, preorder, postorder, level order) that use
+   an explicit stack or queue and yield values one at a time
+2. Morris traversal, which threads the tree temporarily and needs only O(1)
+   extra memory
+3. A benchmark against the recursive version
+
+Because the traversals are generators, a million-node tree can be streamed
+without building any intermediate list.
+"""
+
+import time
+import tracemalloc
+from collections import deque
+
+from recursivity import TreeNode, inorder_traversal
+
+
+def iter_inorder(root):
+    """
+    Yield the values of a binary tree in inorder (left, node, right).
+
+    Args:
+        root (TreeNode): The root of the binary tree.
+
+    Yields:
+        The value of each node.
+    """
+    stack = []
+    node = root
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node.value
+        node = node.right
+
+
+def iter_preorder(root):
+    """
+    Yield the values of a binary tree in preorder (node, left, right).
+
+    Args:
+        root (TreeNode): The root of the binary tree.
+
+    Yields:
+        The value of each node.
+    """
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        yield node.value
+        # The right child goes on first so the left one is visited first.
+        if node.right is not None:
+            stack.append(node.right)
+        if node.left is not None:
+            stack.append(node.left)
+
+
+def iter_postorder(root):
+    """
+    Yield the values of a binary tree in postorder (left, right, node).
+
+    Args:
+        root (TreeNode): The root of the binary tree.
+
+    Yields:
+        The value of each node.
+    """
+    stack = []
+    node = root
+    last_visited = None
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        top = stack[-1]
+        # Visit the right subtree first, unless we just came back from it.
+        if top.right is not None and top.right is not last_visited:
+            node = top.right
+        else:
+            yield top.value
+            last_visited = stack.pop()
+
+
+def iter_level_order(root):
+    """
+    Yield the values of a binary tree level by level, left to right.
+
+    Args:
+        root (TreeNode): The root of the binary tree.
+
+    Yields:
+        The value of each node.
+    """
+    queue = deque([root] if root is not None else [])
+    while queue:
+        node = queue.popleft()
+        yield node.value
+        if node.left is not None:
+            queue.append(node.left)
+        if node.right is not None:
+            queue.append(node.right)
+
+
+def morris_inorder(root):
+    """
+    Yield the values of a binary tree in inorder using O(1) extra memory.
+
+    Before descending into a left subtree, the rightmost node of that subtree
+    gets a temporary link back to the current node. The link is removed on the
+    way back, so the tree is unchanged once the traversal finishes. If the
+    generator is closed early, the remaining links are removed before it exits.
+
+    Args:
+        root (TreeNode): The root of the binary tree.
+
+    Yields:
+        The value of each node.
+    """
+    node = root
+    try:
+        while node is not None:
+            if node.left is None:
+                yield node.value
+                node = node.right
+                continue
+            predecessor = node.left
+            while predecessor.right is not None and predecessor.right is not node:
+                predecessor = predecessor.right
+            if predecessor.right is None:
+                predecessor.right = node  # thread back to node
+                node = node.left
+            else:
+                predecessor.right = None  # remove the thread
+                yield node.value
+                node = node.right
+    finally:
+        # Finish the walk without yielding so every thread gets removed.
+        while node is not None:
+            if node.left is None:
+                node = node.right
+                continue
+            predecessor = node.left
+            while predecessor.right is not None and predecessor.right is not node:
+                predecessor = predecessor.right
+            if predecessor.right is None:
+                predecessor.right = node
+                node = node.left
+            else:
+                predecessor.right = None
+                node = node.right
+
+
+TRAVERSALS = {
+    "inorder": iter_inorder,
+    "preorder": iter_preorder,
+    "postorder": iter_postorder,
+    "level": iter_level_order,
+    "morris": morris_inorder,
+}
+
+
+def traverse(root, order="inorder"):
+    """
+    Yield the values of a binary tree in the requested order.
+
+    Args:
+        root (TreeNode): The root of the binary tree, or any tree object
+            with its own traverse(order) method.
+        order (str): One of "inorder", "preorder", "postorder", "level"
+            or "morris".
+
+    Returns:
+        generator: The values of the nodes.
+    """
+    if hasattr(root, "traverse"):
+        # Trees with their own layout, such as compact_tree.ArrayTree.
+        return root.traverse(order)
+    try:
+        return TRAVERSALS[order](root)
+    except KeyError:
+        raise ValueError(f"Unknown traversal order: {order!r}") from None
+
+
+def build_balanced_tree(values, node_class=TreeNode):
+    """
+    Build a balanced binary tree whose inorder traversal is values.
+
+    The tree is built with an explicit stack, so any number of values works.
+
+    Args:
+        values (sequence): The values, in the order they should be visited.
+        node_class (type): The node class to use (default is TreeNode).
+
+    Returns:
+        TreeNode: The root of the tree, or None if values is empty.
+    """
+    if not len(values):
+        return None
+    root = node_class(None)
+    # Each entry is (node to fill, low index, high index) for values[low:high].
+    stack = [(root, 0, len(values))]
+    while stack:
+        node, low, high = stack.pop()
+        middle = (low + high) // 2
+        node.value = values[middle]
+        if low < middle:
+            node.left = node_class(None)
+            stack.append((node.left, low, middle))
+        if middle + 1 < high:
+            node.right = node_class(None)
+            stack.append((node.right, middle + 1, high))
+    return root
+
+
+def build_skewed_tree(values):
+    """
+    Build a tree where every node only has a left child (the worst case).
+
+    Args:
+        values (sequence): The values, in the order they should be visited inorder.
+
+    Returns:
+        TreeNode: The root of the tree, or None if values is empty.
+    """
+    root = None
+    for value in values:
+        node = TreeNode(value)
+        node.left = root
+        root = node
+    return root
+
+
+def _measure(func):
+    """Return (seconds, peak traced bytes) for one call of func."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchmark_traversals():
+    """Compare the streaming traversals with the recursive version."""
+    def consume(iterator):
+        for _ in iterator:
+            pass
+
+    print("Balanced tree, 2**17 nodes:")
+    tree = build_balanced_tree(range(2 ** 17))
+    cases = [("inorder_traversal (recursive)", lambda: inorder_traversal(tree))]
+    cases += [(f"{name} (streamed)", lambda f=func: consume(f(tree)))
+              for name, func in TRAVERSALS.items()]
+    for label, func in cases:
+        elapsed, peak = _measure(func)
+        print(f"  {label:<32} {elapsed * 1e3:8.1f} ms  peak {peak / 1024:10.1f} KiB")
+
+    print("\nSkewed tree (recursive version shown at 900 nodes):")
+    small = build_skewed_tree(range(900))
+    elapsed, peak = _measure(lambda: inorder_traversal(small))
+    print(f"  {'inorder_traversal, 900 nodes':<32} {elapsed * 1e3:8.1f} ms  peak {peak / 1024:10.1f} KiB")
+    chain = build_skewed_tree(range(1_000_000))
+    for name in ("inorder", "morris"):
+        elapsed, peak = _measure(lambda: consume(traverse(chain, name)))
+        print(f"  {name + ', 10**6 nodes':<32} {elapsed * 1e3:8.1f} ms  peak {peak / 1024:10.1f} KiB")
+
+
+def demonstrate_traversals():
+    """Show the streaming traversals on the tree from recursivity.py."""
+    root = TreeNode(1)
+    root.left = TreeNode(2)
+    root.right = TreeNode(3)
+    root.left.left = TreeNode(4)
+    root.left.right = TreeNode(5)
+
+    print(f"Recursive inorder: {inorder_traversal(root)}")
+    for name in TRAVERSALS:
+        print(f"{name:>10}: {list(traverse(root, name))}")
+
+    print("\nStreaming the first values of a million-node tree:")
+    big = build_balanced_tree(range(1_000_000))
+    stream = morris_inorder(big)
+    print([next(stream) for _ in range(5)])
+    stream.close()  # removes the temporary threads
+    print(f"Tree restored after closing early: {list(iter_inorder(big))[:5]}")
+
+
+if __name__ == "__main__":
+    demonstrate_traversals()
+    print()
+    benchmark_traversals()